@@ -1,219 +1,358 @@
 """
 Analyze nightlight distribution for Bakool region 2022 and 2023
 Create 6-bin categorization based on data distribution
+
+Each {region}_nightlight_{year}.js file is parsed once into a sorted NumPy
+array (load_values is cached). All percentiles and quantile edges of a year
+come from a single np.quantile call and the counts of every bin scheme from
+one np.searchsorted over the sorted values, so adding regions or years only
+adds their own pass. Method 3 is the Fisher-Jenks natural breaks of each
+region and year (natural_breaks.py). analyze() returns the results as plain dicts:
+
+    python analyze_nightlight_distribution.py --regions bakool --years 2022 2023 --json distribution.json
+
+--streaming reads each file in fixed-size chunks into mergeable summaries
+(streaming_stats.py) instead of one array, so memory no longer grows with
+the data. Mean, std, min, max and the contextual bin counts stay exact;
+percentiles and the other bins come from a KLL sketch, with a guaranteed
+interval per percentile. The summaries are also merged across the years of
+each region and across all regions:
+
+    python analyze_nightlight_distribution.py --streaming --json distribution.json
 """
+import argparse
+import functools
+import glob
 import json
+import os
+import re
 import numpy as np
 
-def analyze_distribution(year):
-    print(f"\n{'='*70}")
-    print(f"Nightlight Distribution Analysis - Bakool {year}")
-    print(f"{'='*70}")
-
-    # Load data
-    js_file = f'bakool_nightlight_{year}.js'
-    with open(js_file, 'r') as f:
+from natural_breaks import goodness_of_variance_fit, jenks_breaks
+from region_names import data_file, region_title
+from streaming_stats import CHUNK_BYTES, DEFAULT_K, StreamingSummary
+
+FILE_PATTERN = re.compile(r'^(.+)_nightlight_(\d{4})\.js$')
+PERCENTILES = [10, 25, 50, 75, 90, 95, 99]
+BIN_COUNT = 6
+# Natural breaks run exactly up to this many distinct values; above it sorted
+# runs are merged (natural_breaks max_points). Radiances rounded to 3
+# decimals stay far below it, so their breaks are exact
+NATURAL_BREAKS_MAX_POINTS = 20000
+
+# Method 4 / recommended classification, based on Bakool context - extremely rural region
+CONTEXTUAL_BINS = [
+    {'bin': 1, 'label': 'Very Low (Background)', 'low': 0.000, 'high': 0.260, 'color': '#1e1b4b',  # Deep purple
+     'description': 'Background/minimal light'},
+    {'bin': 2, 'label': 'Low Rural', 'low': 0.260, 'high': 0.285, 'color': '#5b21b6',  # Dark purple
+     'description': 'Very sparse rural settlements'},
+    {'bin': 3, 'label': 'Rural', 'low': 0.285, 'high': 0.310, 'color': '#8b5cf6',  # Purple
+     'description': 'Typical rural areas'},
+    {'bin': 4, 'label': 'Moderate Rural', 'low': 0.310, 'high': 0.350, 'color': '#a855f7',  # Light purple
+     'description': 'More developed rural areas'},
+    {'bin': 5, 'label': 'Bright Rural', 'low': 0.350, 'high': 0.500, 'color': '#fbbf24',  # Yellow
+     'description': 'Rural centers/small settlements'},
+    {'bin': 6, 'label': 'Settlement/Urban', 'low': 0.500, 'high': 1.000, 'color': '#fde047',  # Bright yellow
+     'description': 'Small towns/settlements'},
+]
+CONTEXTUAL_EDGES = [b['low'] for b in CONTEXTUAL_BINS] + [CONTEXTUAL_BINS[-1]['high']]
+
+def discover(data_dir='.'):
+    """{region slug: [years]} of the nightlight point files in data_dir"""
+    found = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, '*_nightlight_*.js'))):
+        match = FILE_PATTERN.match(os.path.basename(path))
+        if match:
+            found.setdefault(match.group(1), []).append(int(match.group(2)))
+    return found
+
+@functools.lru_cache(maxsize=None)
+def load_values(path):
+    """Sorted radiance values of a nightlight points file, parsed once per path"""
+    with open(path, 'r', encoding='utf-8') as f:
         content = f.read()
+    # One declaration per file: const {region}Nightlight{year} = {"points": [...]};
+    points = json.loads(content.split('=', 1)[1].strip().rstrip(';'))['points']
+    values = np.fromiter((point['value'] for point in points), dtype=float, count=len(points))
+    values.sort()
+    values.flags.writeable = False
+    return values
+
+def bin_counts(sorted_values, edges, open_top=False, upper_bounds=False):
+    """
+    Counts per [edge_i, edge_i+1) bin of sorted values in one searchsorted call.
+    The last bin is closed like np.histogram's, or unbounded with open_top.
+    With upper_bounds the bins are (edge_i, edge_i+1] instead, the first one
+    closed (natural breaks are the largest value of each class).
+    """
+    if upper_bounds:
+        positions = np.searchsorted(sorted_values, edges, side='right')
+        positions[0] = 0
+        return np.diff(positions)
+    positions = np.searchsorted(sorted_values, edges, side='left')
+    if open_top:
+        positions[-1] = len(sorted_values)
+    else:
+        positions[-1] = np.searchsorted(sorted_values, edges[-1], side='right')
+    return np.diff(positions)
+
+def _bins(edges, counts, total, extra=None):
+    bins = []
+    for i, count in enumerate(counts.tolist()):
+        entry = {'low': float(edges[i]), 'high': float(edges[i + 1]), 'count': count,
+                 'percent': count / total * 100 if total else 0.0}
+        if extra:
+            entry.update(extra[i])
+        bins.append(entry)
+    return bins
+
+def analyze_values(values):
+    """Statistics and the four 6-bin schemes of one sorted value array"""
+    n = len(values)
+    sixths = np.linspace(0, 1, BIN_COUNT + 1)
+    probabilities = np.concatenate((np.array(PERCENTILES) / 100, sixths))
+    quantiles = np.quantile(values, probabilities)
+    percentiles = quantiles[:len(PERCENTILES)]
+    quantile_edges = quantiles[len(PERCENTILES):]
+
+    minimum, maximum = float(values[0]), float(values[-1])
+    equal_width = np.linspace(minimum, maximum, BIN_COUNT + 1)
+    natural = jenks_breaks(values, BIN_COUNT, max_points=NATURAL_BREAKS_MAX_POINTS)
+    labels = [{k: b[k] for k in ('bin', 'label', 'color', 'description')} for b in CONTEXTUAL_BINS]
+
+    return {
+        'count': n,
+        'min': minimum,
+        'max': maximum,
+        'mean': float(values.mean()),
+        'median': float(percentiles[PERCENTILES.index(50)]),
+        'std': float(values.std()),
+        'percentiles': {str(p): float(v) for p, v in zip(PERCENTILES, percentiles)},
+        'natural_breaks_gvf': goodness_of_variance_fit(values, natural),
+        'methods': {
+            'equal_width': _bins(equal_width, bin_counts(values, equal_width), n),
+            'quantile': _bins(quantile_edges, bin_counts(values, quantile_edges), n),
+            'natural_breaks': _bins(natural, bin_counts(values, natural, upper_bounds=True), n),
+            'contextual': _bins(CONTEXTUAL_EDGES, bin_counts(values, CONTEXTUAL_EDGES), n, labels),
+            # The recommended table counts everything from 0.5 up as Settlement/Urban
+            'recommended': _bins(CONTEXTUAL_EDGES, bin_counts(values, CONTEXTUAL_EDGES, open_top=True), n, labels)
+        }
+    }
 
-    # Extract JSON
-    json_start = content.index('{')
-    json_data = json.loads(content[json_start:-1])
+def analyze_summary(summary):
+    """analyze_values() for a streaming_stats.StreamingSummary, plus the error bounds of its estimates"""
+    n = summary.count
+    sixths = np.linspace(0, 1, BIN_COUNT + 1)
+    probabilities = np.concatenate((np.array(PERCENTILES) / 100, sixths))
+    quantiles = summary.quantiles(probabilities)
+    low, high = summary.quantile_bounds(np.array(PERCENTILES) / 100)
+    percentiles = quantiles[:len(PERCENTILES)]
+    quantile_edges = quantiles[len(PERCENTILES):]
+
+    minimum, maximum = summary.moments.min, summary.moments.max
+    equal_width = np.linspace(minimum, maximum, BIN_COUNT + 1)
+    natural, gvf = summary.natural_breaks(BIN_COUNT)
+    labels = [{k: b[k] for k in ('bin', 'label', 'color', 'description')} for b in CONTEXTUAL_BINS]
+
+    return {
+        'count': n,
+        'min': minimum,
+        'max': maximum,
+        'mean': summary.moments.mean,
+        'median': float(percentiles[PERCENTILES.index(50)]),
+        'std': summary.moments.std,
+        'percentiles': {str(p): float(v) for p, v in zip(PERCENTILES, percentiles)},
+        'natural_breaks_gvf': gvf,
+        'methods': {
+            'equal_width': _bins(equal_width, summary.bin_counts(equal_width), n),
+            'quantile': _bins(quantile_edges, summary.bin_counts(quantile_edges), n),
+            'natural_breaks': _bins(natural, summary.bin_counts(natural), n),
+            'contextual': _bins(CONTEXTUAL_EDGES, summary.bin_counts(CONTEXTUAL_EDGES), n, labels),
+            'recommended': _bins(CONTEXTUAL_EDGES, summary.bin_counts(CONTEXTUAL_EDGES, open_top=True), n, labels)
+        },
+        'streaming': {
+            'sketch_k': summary.sketch.k,
+            'sketch_items': len(summary.sketch.items()[0]),
+            'rank_error_bound': summary.sketch.rank_error / n if n else 0.0,
+            'percentile_bounds': {str(p): [float(a), float(b)] for p, a, b in zip(PERCENTILES, low, high)}
+        }
+    }
 
-    # Extract values
-    values = [point['value'] for point in json_data['points']]
-    values = np.array(values)
+def _change(old, new):
+    return {'old': old, 'new': new, 'change': new - old, 'percent': (new - old) / old * 100 if old else None}
+
+def compare(previous, current):
+    """Mean / median / max change between two analyze_values() results"""
+    return {stat: _change(previous[stat], current[stat]) for stat in ('mean', 'median', 'max')}
+
+def analyze(regions=None, years=None, data_dir='.', streaming=False, chunk_bytes=CHUNK_BYTES, sketch_k=DEFAULT_K):
+    """
+    {'regions': {slug: {'name', 'years': {year: result}, 'comparisons': [...]}}}
+    for the given region slugs and years (default: every file found in data_dir).
+    Consecutive years of a region are compared. With streaming, each region
+    also gets 'all_years' and the results an 'all_regions' entry, from the
+    merged summaries.
+    """
+    available = discover(data_dir)
+    results = {'regions': {}}
+    everything = StreamingSummary(sketch_k) if streaming else None
+    for region in regions or sorted(available):
+        region_years = sorted(years or available.get(region, []))
+        by_year = {}
+        region_summary = StreamingSummary(sketch_k) if streaming else None
+        for year in region_years:
+            path = data_file(region, year, data_dir)
+            if not os.path.exists(path):
+                print(f"WARNING: {path} not found, skipped")
+                continue
+            if streaming:
+                summary = StreamingSummary.from_file(path, chunk_bytes, k=sketch_k, seed=year)
+                by_year[year] = analyze_summary(summary)
+                region_summary.merge(summary)
+            else:
+                by_year[year] = analyze_values(load_values(path))
+        found = sorted(by_year)
+        results['regions'][region] = {
+            'name': region_title(region),
+            'years': {str(year): by_year[year] for year in found},
+            'comparisons': [{'from': a, 'to': b, **compare(by_year[a], by_year[b])} for a, b in zip(found, found[1:])]
+        }
+        if streaming and region_summary.count:
+            results['regions'][region]['all_years'] = analyze_summary(region_summary)
+            everything.merge(region_summary)
+    if streaming and everything.count:
+        results['all_regions'] = analyze_summary(everything)
+    return results
+
+def _print_bins(bins):
+    for i, b in enumerate(bins):
+        print(f"Bin {i+1}: {b['low']:.6f} - {b['high']:.6f} nW/cm²/sr")
+        print(f"  Count: {b['count']:,} ({b['percent']:.2f}%)")
+
+def print_year(name, year, result):
+    print(f"\n{'='*70}")
+    print(f"Nightlight Distribution Analysis - {name} {year}")
+    print(f"{'='*70}")
 
     print(f"\nBasic Statistics:")
-    print(f"  Total points: {len(values):,}")
-    print(f"  Min value: {values.min():.6f} nW/cm²/sr")
-    print(f"  Max value: {values.max():.6f} nW/cm²/sr")
-    print(f"  Mean value: {values.mean():.6f} nW/cm²/sr")
-    print(f"  Median value: {np.median(values):.6f} nW/cm²/sr")
-    print(f"  Std deviation: {values.std():.6f} nW/cm²/sr")
-
-    # Percentiles
+    print(f"  Total points: {result['count']:,}")
+    print(f"  Min value: {result['min']:.6f} nW/cm²/sr")
+    print(f"  Max value: {result['max']:.6f} nW/cm²/sr")
+    print(f"  Mean value: {result['mean']:.6f} nW/cm²/sr")
+    print(f"  Median value: {result['median']:.6f} nW/cm²/sr")
+    print(f"  Std deviation: {result['std']:.6f} nW/cm²/sr")
+
     print(f"\nPercentiles:")
-    percentiles = [10, 25, 50, 75, 90, 95, 99]
-    for p in percentiles:
-        val = np.percentile(values, p)
+    for p, val in result['percentiles'].items():
         print(f"  {p}th percentile: {val:.6f} nW/cm²/sr")
+    if 'streaming' in result:
+        streaming = result['streaming']
+        widths = [high - low for low, high in streaming['percentile_bounds'].values()]
+        print(f"  (KLL sketch, k={streaming['sketch_k']}, {streaming['sketch_items']:,} items: "
+              f"rank error <= {streaming['rank_error_bound']:.2%}, each percentile within a "
+              f"{max(widths):.6f} wide guaranteed interval)")
+
+    methods = result['methods']
+    for title, key in [("Method 1: Equal Width Bins", 'equal_width'),
+                       ("Method 2: Equal Frequency Bins (Quantiles)", 'quantile'),
+                       ("Method 3: Natural Breaks (Fisher-Jenks)", 'natural_breaks')]:
+        print(f"\n{'='*70}")
+        print(title)
+        print(f"{'='*70}")
+        _print_bins(methods[key])
+    print(f"Goodness of variance fit: {result['natural_breaks_gvf']:.4f}")
 
-    # Create 6 bins using different methods
     print(f"\n{'='*70}")
-    print(f"Method 1: Equal Width Bins")
+    print(f"Method 4: Contextual Classification (Recommended for {name})")
     print(f"{'='*70}")
-
-    bins_equal_width = np.linspace(values.min(), values.max(), 7)
-    counts_ew, _ = np.histogram(values, bins=bins_equal_width)
-
-    for i in range(6):
-        print(f"Bin {i+1}: {bins_equal_width[i]:.6f} - {bins_equal_width[i+1]:.6f} nW/cm²/sr")
-        print(f"  Count: {counts_ew[i]:,} ({counts_ew[i]/len(values)*100:.2f}%)")
-
-    # Method 2: Quantile-based bins (equal frequency)
+    for i, b in enumerate(methods['contextual']):
+        print(f"Bin {i+1}: {b['label']}")
+        print(f"  Range: {b['low']:.3f} - {b['high']:.3f} nW/cm²/sr")
+        print(f"  Color: {b['color']}")
+        print(f"  Count: {b['count']:,} ({b['percent']:.2f}%)")
+
+def print_comparison(comparison):
+    a, b = comparison['from'], comparison['to']
     print(f"\n{'='*70}")
-    print(f"Method 2: Equal Frequency Bins (Quantiles)")
+    print(f"Year-over-Year Comparison ({a} vs {b})")
     print(f"{'='*70}")
-
-    quantiles = [0, 1/6, 2/6, 3/6, 4/6, 5/6, 1.0]
-    bins_quantile = np.quantile(values, quantiles)
-    counts_q, _ = np.histogram(values, bins=bins_quantile)
-
-    for i in range(6):
-        print(f"Bin {i+1}: {bins_quantile[i]:.6f} - {bins_quantile[i+1]:.6f} nW/cm²/sr")
-        print(f"  Count: {counts_q[i]:,} ({counts_q[i]/len(values)*100:.2f}%)")
-
-    # Method 3: Natural Breaks (Jenks-like, simplified)
+    for stat, label in [('mean', 'Mean'), ('median', 'Median'), ('max', 'Max value')]:
+        change = comparison[stat]
+        percent = f"{change['percent']:+.2f}%" if change['percent'] is not None else 'n/a'
+        print(f"\n{label} change: {change['change']:.6f} nW/cm²/sr")
+        print(f"  {a} {stat}: {change['old']:.6f}")
+        print(f"  {b} {stat}: {change['new']:.6f}")
+        print(f"  Change: {percent}")
+
+def print_recommended(name, years):
     print(f"\n{'='*70}")
-    print(f"Method 3: Data-Driven Bins (Based on Distribution)")
+    print(f"RECOMMENDED 6-BIN CLASSIFICATION FOR {name.upper()}")
     print(f"{'='*70}")
 
-    # Define bins based on data characteristics
-    # Looking at the distribution, most data is concentrated in 0.25-0.50 range
-    custom_bins = [
-        values.min(),
-        0.270,  # ~25th percentile
-        0.290,  # ~50th percentile
-        0.310,  # ~75th percentile
-        0.350,  # ~90th percentile
-        0.450,  # ~95th percentile
-        values.max()
-    ]
-
-    counts_custom, _ = np.histogram(values, bins=custom_bins)
-
-    for i in range(6):
-        print(f"Bin {i+1}: {custom_bins[i]:.6f} - {custom_bins[i+1]:.6f} nW/cm²/sr")
-        print(f"  Count: {counts_custom[i]:,} ({counts_custom[i]/len(values)*100:.2f}%)")
-
-    # Method 4: Contextual Classification
+    print("\nBin Details:")
+    for b in CONTEXTUAL_BINS:
+        bin_range = f"{b['low']:.3f} - {b['high']:.3f}" if b is not CONTEXTUAL_BINS[-1] else f"{b['low']:.3f}+"
+        print(f"\n{b['bin']}. {b['label']}")
+        print(f"   Range: {bin_range} nW/cm²/sr")
+        print(f"   Color: {b['color']}")
+        print(f"   Description: {b['description']}")
+
     print(f"\n{'='*70}")
-    print(f"Method 4: Contextual Classification (Recommended for Bakool)")
+    print(f"Distribution by Recommended Bins")
     print(f"{'='*70}")
 
-    # Based on Bakool context - extremely rural region
-    contextual_bins = [
-        (0.000, 0.260, "Very Low (Background)", "#1e1b4b"),      # Deep purple
-        (0.260, 0.285, "Low Rural", "#5b21b6"),                  # Dark purple
-        (0.285, 0.310, "Rural", "#8b5cf6"),                      # Purple
-        (0.310, 0.350, "Moderate Rural", "#a855f7"),             # Light purple
-        (0.350, 0.500, "Bright Rural", "#fbbf24"),               # Yellow
-        (0.500, 1.000, "Settlement/Urban", "#fde047")            # Bright yellow
-    ]
-
-    for i, (low, high, label, color) in enumerate(contextual_bins):
-        count = np.sum((values >= low) & (values < high if i < 5 else values <= high))
-        print(f"Bin {i+1}: {label}")
-        print(f"  Range: {low:.3f} - {high:.3f} nW/cm²/sr")
-        print(f"  Color: {color}")
-        print(f"  Count: {count:,} ({count/len(values)*100:.2f}%)")
-
-    return values, contextual_bins
-
-# Analyze both years
-values_2022, bins_2022 = analyze_distribution(2022)
-values_2023, bins_2023 = analyze_distribution(2023)
-
-# Comparison
-print(f"\n{'='*70}")
-print(f"Year-over-Year Comparison (2022 vs 2023)")
-print(f"{'='*70}")
-
-print(f"\nMean change: {values_2023.mean() - values_2022.mean():.6f} nW/cm²/sr")
-print(f"  2022 mean: {values_2022.mean():.6f}")
-print(f"  2023 mean: {values_2023.mean():.6f}")
-print(f"  Change: {(values_2023.mean() - values_2022.mean())/values_2022.mean()*100:+.2f}%")
-
-print(f"\nMedian change: {np.median(values_2023) - np.median(values_2022):.6f} nW/cm²/sr")
-print(f"  2022 median: {np.median(values_2022):.6f}")
-print(f"  2023 median: {np.median(values_2023):.6f}")
-print(f"  Change: {(np.median(values_2023) - np.median(values_2022))/np.median(values_2022)*100:+.2f}%")
-
-print(f"\nMax value change: {values_2023.max() - values_2022.max():.6f} nW/cm²/sr")
-print(f"  2022 max: {values_2022.max():.6f}")
-print(f"  2023 max: {values_2023.max():.6f}")
-print(f"  Change: {(values_2023.max() - values_2022.max())/values_2022.max()*100:+.2f}%")
-
-# Recommended 6-bin classification
-print(f"\n{'='*70}")
-print(f"RECOMMENDED 6-BIN CLASSIFICATION FOR BAKOOL")
-print(f"{'='*70}")
-
-recommended_bins = [
-    {
-        'bin': 1,
-        'label': 'Very Low (Background)',
-        'range': '0.000 - 0.260',
-        'color': '#1e1b4b',
-        'description': 'Background/minimal light'
-    },
-    {
-        'bin': 2,
-        'label': 'Low Rural',
-        'range': '0.260 - 0.285',
-        'color': '#5b21b6',
-        'description': 'Very sparse rural settlements'
-    },
-    {
-        'bin': 3,
-        'label': 'Rural',
-        'range': '0.285 - 0.310',
-        'color': '#8b5cf6',
-        'description': 'Typical rural areas'
-    },
-    {
-        'bin': 4,
-        'label': 'Moderate Rural',
-        'range': '0.310 - 0.350',
-        'color': '#a855f7',
-        'description': 'More developed rural areas'
-    },
-    {
-        'bin': 5,
-        'label': 'Bright Rural',
-        'range': '0.350 - 0.500',
-        'color': '#fbbf24',
-        'description': 'Rural centers/small settlements'
-    },
-    {
-        'bin': 6,
-        'label': 'Settlement/Urban',
-        'range': '0.500+',
-        'color': '#fde047',
-        'description': 'Small towns/settlements'
-    }
-]
-
-print("\nBin Details:")
-for bin_info in recommended_bins:
-    print(f"\n{bin_info['bin']}. {bin_info['label']}")
-    print(f"   Range: {bin_info['range']} nW/cm²/sr")
-    print(f"   Color: {bin_info['color']}")
-    print(f"   Description: {bin_info['description']}")
+    header = f"\n{'Bin':<4} {'Label':<22}"
+    for year in years:
+        header += f" {year + ' Count':<15} {year + ' %':<10}"
+    print(header)
+    print("-" * max(90, len(header)))
+    for i, b in enumerate(CONTEXTUAL_BINS):
+        line = f"{b['bin']:<4} {b['label']:<22}"
+        for result in years.values():
+            row = result['methods']['recommended'][i]
+            line += f" {row['count']:>10,}     {row['percent']:>6.2f}%   "
+        print(line.rstrip())
+
+def print_report(results):
+    for region in results['regions'].values():
+        for year, result in region['years'].items():
+            print_year(region['name'], year, result)
+        for comparison in region['comparisons']:
+            print_comparison(comparison)
+        if region['years']:
+            print_recommended(region['name'], region['years'])
+        if 'all_years' in region:
+            print_year(region['name'], 'All Years', region['all_years'])
+    if 'all_regions' in results:
+        print_year('All Regions', 'All Years', results['all_regions'])
 
-# Count distribution in recommended bins for both years
-print(f"\n{'='*70}")
-print(f"Distribution by Recommended Bins")
-print(f"{'='*70}")
-
-bin_edges = [0.000, 0.260, 0.285, 0.310, 0.350, 0.500, 1.000]
-
-print(f"\n{'Bin':<4} {'Label':<22} {'2022 Count':<15} {'2022 %':<10} {'2023 Count':<15} {'2023 %':<10}")
-print("-" * 90)
-
-for i, bin_info in enumerate(recommended_bins):
-    if i < 5:
-        count_2022 = np.sum((values_2022 >= bin_edges[i]) & (values_2022 < bin_edges[i+1]))
-        count_2023 = np.sum((values_2023 >= bin_edges[i]) & (values_2023 < bin_edges[i+1]))
-    else:
-        count_2022 = np.sum(values_2022 >= bin_edges[i])
-        count_2023 = np.sum(values_2023 >= bin_edges[i])
-
-    pct_2022 = count_2022 / len(values_2022) * 100
-    pct_2023 = count_2023 / len(values_2023) * 100
-
-    print(f"{bin_info['bin']:<4} {bin_info['label']:<22} {count_2022:>10,}     {pct_2022:>6.2f}%    {count_2023:>10,}     {pct_2023:>6.2f}%")
+    print(f"\n{'='*70}")
+    print("Analysis Complete!")
+    print(f"{'='*70}")
 
-print(f"\n{'='*70}")
-print("Analysis Complete!")
-print(f"{'='*70}")
+def main():
+    parser = argparse.ArgumentParser(description='Nightlight radiance distribution and 6-bin classification')
+    parser.add_argument('--regions', nargs='*', help='Region slugs, e.g. bakool lower_shabelle (default: all files found)')
+    parser.add_argument('--years', type=int, nargs='*', help='Years (default: all found per region)')
+    parser.add_argument('--data-dir', default='.', help='Directory with the {region}_nightlight_{year}.js files')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    parser.add_argument('--quiet', action='store_true', help='Do not print the report')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Read files in chunks into mergeable sketches (bounded memory, approximate quantiles)')
+    parser.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / (1024 * 1024),
+                        help='Input read per chunk with --streaming (default: %(default)s)')
+    parser.add_argument('--sketch-k', type=int, default=DEFAULT_K,
+                        help='KLL sketch size with --streaming; rank error shrinks roughly as 1/k (default: %(default)s)')
+    args = parser.parse_args()
+
+    results = analyze(args.regions, args.years, args.data_dir, args.streaming,
+                      int(args.chunk_mb * 1024 * 1024), args.sketch_k)
+    if not args.quiet:
+        print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.json}")
+
+if __name__ == '__main__':
+    main()
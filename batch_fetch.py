@@ -0,0 +1,158 @@
+"""
+Parallel, resumable batch fetching for the Earth Engine extraction scripts
+
+BatchFetcher splits [0, total) into fixed-size batches and keeps a bounded
+number of them in flight on a thread pool (Earth Engine calls spend their
+time waiting on the network). Each finished batch is written to the
+checkpoint directory right away, so a rerun after a crash or a quota error
+only fetches the batches that are still missing. Failed batches are retried
+with exponential backoff before the run gives up.
+
+    fetcher = BatchFetcher(lambda start, count: samples.toList(count, start).getInfo(),
+                           'viirs_checkpoints/bakool_2022', params={'seed': 42})
+    items = fetcher.run(total, batch_size=5000)
+"""
+import json
+import os
+import random
+import re
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class BatchFetchError(Exception):
+    """A batch still failed after all retries; finished batches stay checkpointed"""
+
+
+# Phrases of Earth Engine and transport errors that go away on retry
+TRANSIENT_PHRASES = (
+    'too many concurrent', 'rate limit', 'quota exceeded', 'timed out', 'timeout', 'deadline exceeded',
+    'service unavailable', 'internal error', 'backend error', 'connection reset', 'connection aborted',
+    'connection refused'
+)
+# HTTP status codes, as whole words so "5000 elements" is not a 500
+TRANSIENT_STATUS = re.compile(r'\b(429|50[0234])\b')
+
+
+def is_transient_ee_error(exc):
+    """Errors worth retrying: quota, concurrency, timeouts, dropped connections and server errors"""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    message = str(exc).lower()
+    return any(phrase in message for phrase in TRANSIENT_PHRASES) or bool(TRANSIENT_STATUS.search(message))
+
+
+class BatchFetcher:
+    """
+    fetch_batch(start, count) returns the list of items in [start, start+count).
+    params describes what is being fetched; checkpoints written for different
+    params are discarded instead of being mixed into the result.
+    """
+
+    def __init__(self, fetch_batch, checkpoint_dir, params=None, workers=4, retries=5,
+                 backoff=2.0, max_backoff=60.0, is_transient=None, sleep=time.sleep, log=print):
+        self.fetch_batch = fetch_batch
+        self.checkpoint_dir = checkpoint_dir
+        self.params = params or {}
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.is_transient = is_transient or (lambda exc: True)
+        self.sleep = sleep
+        self.log = log
+        self.fetched = 0
+        self.resumed = 0
+        self.retried = 0
+
+    def _path(self, start):
+        return os.path.join(self.checkpoint_dir, f'batch_{start:09d}.json')
+
+    def _prepare_checkpoints(self, total, batch_size):
+        """Create the checkpoint directory, clearing it if it belongs to another run"""
+        state = dict(self.params, total=total, batch_size=batch_size)
+        state_path = os.path.join(self.checkpoint_dir, 'params.json')
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                if json.load(f) == state:
+                    return
+            self.log(f"  Checkpoints in {self.checkpoint_dir} are for different parameters, starting over")
+            shutil.rmtree(self.checkpoint_dir)
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+
+    def _load(self, start):
+        try:
+            with open(self._path(start), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save(self, start, items):
+        path = self._path(start)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(items, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def _fetch_with_retry(self, start, count):
+        for attempt in range(self.retries + 1):
+            try:
+                items = self.fetch_batch(start, count)
+                self._save(start, items)
+                return items
+            except Exception as exc:
+                if attempt == self.retries or not self.is_transient(exc):
+                    raise BatchFetchError(f"batch at {start} failed after {attempt + 1} attempt(s): {exc}") from exc
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                self.retried += 1
+                self.log(f"  Batch at {start} failed ({exc}), retrying in {delay:.1f}s...")
+                self.sleep(delay)
+
+    def run(self, total, batch_size):
+        """Fetch every batch (reusing checkpoints) and return all items in order"""
+        self._prepare_checkpoints(total, batch_size)
+        starts = list(range(0, total, batch_size))
+        results = {}
+        pending = []
+        for start in starts:
+            items = self._load(start)
+            if items is None:
+                pending.append(start)
+            else:
+                results[start] = items
+        self.resumed = len(results)
+        if self.resumed:
+            self.log(f"  Resuming: {self.resumed}/{len(starts)} batches already checkpointed")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            queue = iter(pending)
+            in_flight = {}
+            try:
+                # Keep at most `workers` requests in flight
+                for start in queue:
+                    in_flight[pool.submit(self._fetch_with_retry, start, min(batch_size, total - start))] = start
+                    if len(in_flight) >= self.workers:
+                        break
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        start = in_flight.pop(future)
+                        results[start] = future.result()
+                        self.fetched += 1
+                        self.log(f"  Batch {len(results)}/{len(starts)} done (points {start} to {start + len(results[start])})")
+                        next_start = next(queue, None)
+                        if next_start is not None:
+                            in_flight[pool.submit(self._fetch_with_retry, next_start,
+                                                  min(batch_size, total - next_start))] = next_start
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+        return [item for start in starts for item in results[start]]
+
+    def clear(self):
+        """Remove the checkpoints once the output has been written"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
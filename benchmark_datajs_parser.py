@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark the data.js variable scanner (datajs_parser.py)
+Builds a synthetic data.js of about 50 MB (ADM1/ADM2 boundaries with dense
+outlines plus indicator tables, formatted like the dashboard's) and compares
+the regular expressions previously used by process_roads_by_region.py and
+optimize_geojson.py with the bracket-depth scanner, then checks both against
+a property value containing '};'
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import time
+
+from datajs_parser import find_assignment, iter_assignments
+from optimize_geojson import optimize_javascript_geojson, round_coordinates
+
+OLD_ADM1_PATTERN = r'const adm1Boundaries = ({.*?});'
+OLD_VARIABLE_PATTERN = r'(const|var)\s+(\w+)\s*=\s*(\{.*?\});'
+
+
+def synthetic_boundaries(count, vertices, seed):
+    """Ring-shaped outlines with 7-decimal coordinates spread over Somalia's extent"""
+    rng = random.Random(seed)
+    features = []
+    for i in range(count):
+        cx, cy = rng.uniform(41.5, 50.5), rng.uniform(-1.0, 11.5)
+        ring = []
+        for k in range(vertices):
+            angle = 2 * math.pi * k / vertices
+            radius = 0.4 + 0.1 * math.sin(7 * angle) + rng.uniform(-0.02, 0.02)
+            ring.append([round(cx + radius * math.cos(angle), 7), round(cy + radius * math.sin(angle), 7)])
+        ring.append(ring[0])
+        features.append({
+            'type': 'Feature',
+            'properties': {'name': f'Region {i}', 'ADM1_EN': f'Region {i % 18}', 'MPI_value': round(rng.random(), 3)},
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]}
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def synthetic_datajs(target_mb=50, seed=42, tricky=False):
+    """data.js text of roughly target_mb; tricky puts '};' into a property value"""
+    adm2 = synthetic_boundaries(74, int(target_mb * 1024 * 1024 * 0.6 / 74 / 25), seed)
+    adm1 = synthetic_boundaries(18, int(target_mb * 1024 * 1024 * 0.4 / 18 / 25), seed + 1)
+    if tricky:
+        adm1['features'][0]['properties']['note'] = 'Source: OCHA {boundaries};'
+    rng = random.Random(seed)
+    indicators = {f'Region {i}': {'mpi': round(rng.random(), 3), 'population': rng.randint(10000, 900000)}
+                  for i in range(18)}
+    return (
+        "// Somalia dashboard data\n"
+        f"const indicatorMeta = {json.dumps({'source': 'synthetic', 'year': 2023})};\n\n"
+        f"const adm2Boundaries = {json.dumps(adm2)};\n\n"
+        f"const regionIndicators = {json.dumps(indicators)};\n\n"
+        f"const adm1Boundaries = {json.dumps(adm1)};\n"
+    )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def load_adm1_regex(content):
+    """The old process_roads_by_region.py lookup"""
+    match = re.search(OLD_ADM1_PATTERN, content, re.DOTALL)
+    return json.loads(match.group(1)) if match else None
+
+
+def load_adm1_scanner(content):
+    assignment = find_assignment(content, 'adm1Boundaries')
+    return assignment.value() if assignment else None
+
+
+def optimize_regex(content, precision=5):
+    """The old optimize_geojson.py rewrite of data.js, without the file handling"""
+    def optimize_json_match(match):
+        try:
+            data = json.loads(match.group(3))
+            for feature in data.get('features', []):
+                feature['geometry']['coordinates'] = round_coordinates(feature['geometry']['coordinates'], precision)
+            return f"{match.group(1)} {match.group(2)}={json.dumps(data, separators=(',', ':'))};"
+        except:
+            return match.group(0)
+    return re.sub(OLD_VARIABLE_PATTERN, optimize_json_match, content, flags=re.DOTALL)
+
+
+def optimize_scanner(path):
+    optimize_javascript_geojson(path, precision=5)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the data.js variable scanner against the old regexes')
+    parser.add_argument('--size-mb', type=float, default=50, help='Synthetic data.js size (default: 50)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  data.js Parser Benchmark")
+    print("=" * 70)
+
+    content = synthetic_datajs(args.size_mb)
+    print(f"\nSynthetic data.js: {len(content) / 1024 / 1024:.1f} MB, "
+          f"{sum(1 for _ in iter_assignments(content))} variables")
+
+    print(f"\n{'Step':<44} {'Time (s)':>10}")
+    print("-" * 56)
+    _, t = timed(lambda: re.search(OLD_ADM1_PATTERN, content, re.DOTALL))
+    print(f"{'Locate adm1Boundaries - regex':<44} {t:>10.3f}")
+    _, t = timed(find_assignment, content, 'adm1Boundaries')
+    print(f"{'Locate adm1Boundaries - scanner':<44} {t:>10.3f}")
+    _, t = timed(lambda: list(iter_assignments(content)))
+    print(f"{'List every variable - scanner':<44} {t:>10.3f}")
+    regex_adm1, t_regex = timed(load_adm1_regex, content)
+    print(f"{'Locate + parse adm1Boundaries - regex':<44} {t_regex:>10.3f}")
+    scanner_adm1, t_scanner = timed(load_adm1_scanner, content)
+    print(f"{'Locate + parse adm1Boundaries - scanner':<44} {t_scanner:>10.3f}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'data.js')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        regex_output, t = timed(optimize_regex, content)
+        print(f"{'Optimize data.js - regex':<44} {t:>10.3f}")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            scanner_output = optimize_scanner(path)
+        print(f"{'Optimize data.js - scanner (incl. file I/O)':<44} {time.perf_counter() - start:>10.3f}")
+
+    print("\nCorrectness:")
+    print(f"  • adm1Boundaries identical: {regex_adm1 == scanner_adm1}")
+    print(f"  • Optimized data.js identical: {regex_output == scanner_output}")
+
+    tricky = synthetic_datajs(1, tricky=True)
+    try:
+        regex_ok = load_adm1_regex(tricky) is not None
+    except json.JSONDecodeError:
+        regex_ok = False
+    scanner_ok = len(load_adm1_scanner(tricky)['features']) == 18
+    print(f"  • '}};' inside a property value: regex {'parsed' if regex_ok else 'FAILED'}, "
+          f"scanner {'parsed' if scanner_ok else 'FAILED'}")
+
+
+if __name__ == '__main__':
+    main()
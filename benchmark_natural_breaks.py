@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark natural_breaks.py (Fisher-Jenks, divide and conquer) against the
+textbook O(k * n^2) dynamic program on synthetic radiance-like values, and
+check that both reach the same minimal within-class squared deviation
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from natural_breaks import _weighted_points, classify, goodness_of_variance_fit, jenks_breaks
+
+
+def naive_jenks_breaks(values, k):
+    """Fisher's DP trying every split point for every class end: O(k * n^2)"""
+    lower, upper, (w, s1, s2) = _weighted_points(values)
+    n = len(lower)
+    k = min(k, n)
+    ends = np.arange(1, n + 1)
+    cost = np.concatenate(([0.0], s2[ends] - s1[ends] ** 2 / w[ends]))
+    splits = []
+    for layer in range(2, k + 1):
+        new_cost = np.full(n + 1, np.inf)
+        split = np.zeros(n + 1, dtype=np.int64)
+        for j in range(layer, n + 1):
+            i = np.arange(layer - 1, j)
+            weight = w[j] - w[i]
+            total = s1[j] - s1[i]
+            candidates = cost[i] + (s2[j] - s2[i]) - total * total / weight
+            best = int(np.argmin(candidates))
+            new_cost[j] = candidates[best]
+            split[j] = i[best]
+        cost = new_cost
+        splits.append(split)
+
+    starts = [n]
+    for split in reversed(splits):
+        starts.append(int(split[starts[-1]]))
+    starts = [0] + starts[::-1]
+    return [float(lower[0])] + [float(upper[s - 1]) for s in starts[1:-1]] + [float(upper[-1])]
+
+
+def within_class_sse(values, breaks):
+    classes = classify(values, breaks)
+    means = np.bincount(classes, weights=values) / np.bincount(classes)
+    return float(((values - means[classes]) ** 2).sum())
+
+
+def radiance(n, seed, decimals=None):
+    """Right-skewed values like the Bakool radiances (mostly 0.25-0.5, a few bright cells)"""
+    rng = np.random.default_rng(seed)
+    values = 0.2 + rng.lognormal(-2.4, 0.6, n)
+    values[:max(1, n // 2000)] = rng.uniform(0.5, 1.5, max(1, n // 2000))
+    return np.round(values, decimals) if decimals is not None else values
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Fisher-Jenks divide and conquer against the O(k n^2) DP')
+    parser.add_argument('--classes', type=int, default=6)
+    parser.add_argument('--naive-max', type=int, default=10000,
+                        help='Largest input the O(k n^2) DP is run on (default: 10000)')
+    args = parser.parse_args()
+    k = args.classes
+
+    print("=" * 70)
+    print(f"  Natural Breaks Benchmark ({k} classes)")
+    print("=" * 70)
+
+    cases = [(f'{n:,} distinct', radiance(n, n)) for n in (1000, 2000, 5000, 10000, 100000, 300000)]
+    cases.append(('104,211 rounded to 3 dp', radiance(104211, 1, decimals=3)))
+
+    print(f"\n{'Input':<26} {'Naive DP (s)':>13} {'D&C (s)':>10} {'Speedup':>9} {'Same SSE':>9} {'GVF':>7}")
+    print("-" * 79)
+    for label, values in cases:
+        breaks, t_fast = timed(jenks_breaks, values, k)
+        sse = within_class_sse(values, breaks)
+        if len(np.unique(values)) <= args.naive_max:
+            naive, t_naive = timed(naive_jenks_breaks, values, k)
+            same = abs(within_class_sse(values, naive) - sse) <= 1e-9 * max(sse, 1)
+            naive_text, speedup, same_text = f"{t_naive:>13.3f}", f"{t_naive / t_fast:>8.0f}x", f"{str(same):>9}"
+        else:
+            naive_text, speedup, same_text = f"{'-':>13}", f"{'-':>9}", f"{'-':>9}"
+        print(f"{label:<26} {naive_text} {t_fast:>10.3f} {speedup} {same_text} "
+              f"{goodness_of_variance_fit(values, breaks):>7.4f}")
+
+    values = radiance(300000, 300000)
+    exact = within_class_sse(values, jenks_breaks(values, k))
+    print(f"\n{'300,000 distinct, max_points':<30} {'Time (s)':>10} {'SSE vs exact':>14}")
+    print("-" * 56)
+    for max_points in (50000, 20000, 5000):
+        breaks, t = timed(jenks_breaks, values, k, max_points)
+        print(f"{max_points:<30,} {t:>10.3f} {within_class_sse(values, breaks) / exact - 1:>+13.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark nightlight point-to-polygon conversion in convert_points_to_polygons.py
+Compares the original per-point loop (classify_nightlight + create_500m_polygon
++ a Feature dict per cell) with the vectorized polygon_features() and checks
+that both produce the same feature text
+"""
+
+import argparse
+import os
+import random
+import time
+
+from convert_points_to_polygons import (POLYGON_PRECISION, classify_nightlight, create_500m_polygon,
+                                        load_points, polygon_features)
+from geojson_writer import compact_feature
+
+
+def synthetic_points(count=104211, seed=42):
+    """Points over Bakool's extent with values drawn like its VIIRS distribution"""
+    rng = random.Random(seed)
+    return [{
+        'value': round(rng.lognormvariate(-1.0, 0.2), 3),
+        'lat': rng.uniform(3.5, 5.0),
+        'lon': rng.uniform(43.3, 44.9)
+    } for _ in range(count)]
+
+
+def convert_loop(points, year):
+    """The original conversion: one classification, polygon and Feature dict per point"""
+    results = []
+    for point in points:
+        classification = classify_nightlight(point['value'])
+        if classification is None:
+            continue
+        feature = {
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [create_500m_polygon(point['lat'], point['lon'])]
+            },
+            'properties': {
+                'value': round(point['value'], 3),
+                'category': classification['category'],
+                'color': classification['color'],
+                'label': classification['label'],
+                'lat': point['lat'],
+                'lon': point['lon'],
+                'year': year,
+                'region': 'Bakool',
+                'grid_size': '500m × 500m'
+            }
+        }
+        results.append(compact_feature(feature, POLYGON_PRECISION))
+    return results
+
+
+def convert_vectorized(points, year):
+    return [feature_json for _, feature_json in polygon_features(points, year)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark point-to-polygon conversion')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023],
+                        help='Years to benchmark (reads bakool_nightlight_{year}.js)')
+    parser.add_argument('--points', type=int, default=104211,
+                        help='Synthetic point count when an input file is missing')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  Point-to-Polygon Conversion Benchmark")
+    print("=" * 70)
+
+    print(f"\n{'Input':<28} {'Points':>9} {'Loop (s)':>9} {'NumPy (s)':>10} {'Speedup':>8}")
+    print("-" * 68)
+    identical = True
+    for year in args.years:
+        js_file = f'bakool_nightlight_{year}.js'
+        if os.path.exists(js_file):
+            label, points = js_file, load_points(js_file)
+        else:
+            label, points = f'synthetic ({year})', synthetic_points(args.points, seed=year)
+
+        start = time.perf_counter()
+        loop_result = convert_loop(points, year)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized_result = convert_vectorized(points, year)
+        vectorized_time = time.perf_counter() - start
+
+        print(f"{label:<28} {len(points):>9,} {loop_time:>9.3f} {vectorized_time:>10.3f} "
+              f"{loop_time / vectorized_time:>7.1f}x")
+        if loop_result != vectorized_result:
+            identical = False
+            mismatches = sum(1 for a, b in zip(loop_result, vectorized_result) if a != b)
+            mismatches += abs(len(loop_result) - len(vectorized_result))
+            print(f"    ERROR: {mismatches:,} features differ")
+
+    if identical:
+        print("\n[OK] Both methods produce identical features")
+
+
+if __name__ == '__main__':
+    main()
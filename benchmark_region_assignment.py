@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark road-to-region assignment in process_roads_by_region.py
+Compares the original loop (region_poly.contains over every ADM1 polygon)
+with the STRtree + prepared geometry RegionAssigner on a synthetic road set
+"""
+
+import argparse
+import math
+import random
+import time
+
+import shapely
+from shapely.geometry import LineString, Polygon
+
+from process_roads_by_region import RegionAssigner, load_region_polygons
+
+
+def synthetic_regions(rows=3, cols=6, vertices=2000, seed=42):
+    """
+    Build rows x cols adjacent regions (18 by default, like Somalia's ADM1)
+    with jagged, full-detail borders so containment tests are realistic
+    """
+    rng = random.Random(seed)
+    regions = {}
+    for r in range(rows):
+        for c in range(cols):
+            x0, y0 = 41.0 + c * 1.0, -1.0 + r * 4.0
+            per_side = vertices // 4
+            ring = []
+            # Walk the rectangle's edges with noise across each edge so borders have detail
+            for side in range(4):
+                for k in range(per_side):
+                    t = k / per_side
+                    noise = rng.uniform(-0.004, 0.004)
+                    if side == 0:
+                        ring.append((x0 + t, y0 + noise))
+                    elif side == 1:
+                        ring.append((x0 + 1 + noise, y0 + 4 * t))
+                    elif side == 2:
+                        ring.append((x0 + 1 - t, y0 + 4 + noise))
+                    else:
+                        ring.append((x0 + noise, y0 + 4 - 4 * t))
+            regions[f'Region {r * cols + c + 1}'] = Polygon(ring)
+    return regions
+
+
+def synthetic_roads(count, bounds, seed=7):
+    """Random short polylines scattered over bounds (minx, miny, maxx, maxy)"""
+    rng = random.Random(seed)
+    minx, miny, maxx, maxy = bounds
+    roads = []
+    for _ in range(count):
+        x, y = rng.uniform(minx, maxx), rng.uniform(miny, maxy)
+        coords = [(x, y)]
+        for _ in range(rng.randint(1, 6)):
+            angle = rng.uniform(0, 2 * math.pi)
+            x += 0.01 * math.cos(angle)
+            y += 0.01 * math.sin(angle)
+            coords.append((x, y))
+        roads.append(LineString(coords))
+    return roads
+
+
+def assign_loop(centroids, region_polygons):
+    """The original assignment: test every region in dict order"""
+    results = []
+    for centroid in centroids:
+        for region_name, region_poly in region_polygons.items():
+            if region_poly.contains(centroid):
+                results.append(region_name)
+                break
+        else:
+            results.append(None)
+    return results
+
+
+def assign_indexed(centroids, region_polygons):
+    assigner = RegionAssigner(region_polygons)
+    return [assigner.assign(centroid) for centroid in centroids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark region assignment')
+    parser.add_argument('--roads', type=int, default=20000, help='Number of synthetic roads')
+    parser.add_argument('--data-js', help='Use ADM1 boundaries from this data.js instead of synthetic regions')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  Region Assignment Benchmark")
+    print("=" * 70)
+
+    if args.data_js:
+        region_polygons = load_region_polygons(args.data_js)
+    else:
+        region_polygons = synthetic_regions()
+    vertex_count = sum(shapely.get_num_coordinates(p) for p in region_polygons.values())
+
+    minx = min(p.bounds[0] for p in region_polygons.values())
+    miny = min(p.bounds[1] for p in region_polygons.values())
+    maxx = max(p.bounds[2] for p in region_polygons.values())
+    maxy = max(p.bounds[3] for p in region_polygons.values())
+    centroids = [road.centroid for road in synthetic_roads(args.roads, (minx, miny, maxx, maxy))]
+
+    print(f"\nRegions: {len(region_polygons)} ({vertex_count:,} boundary vertices)")
+    print(f"Roads:   {len(centroids):,}")
+
+    start = time.perf_counter()
+    loop_result = assign_loop(centroids, region_polygons)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed_result = assign_indexed(centroids, region_polygons)
+    indexed_time = time.perf_counter() - start
+
+    print(f"\n{'Method':<28} {'Time (s)':>10} {'Roads/s':>12}")
+    print("-" * 52)
+    print(f"{'Loop over all regions':<28} {loop_time:>10.3f} {len(centroids) / loop_time:>12,.0f}")
+    print(f"{'STRtree + prepared':<28} {indexed_time:>10.3f} {len(centroids) / indexed_time:>12,.0f}")
+    print(f"\nSpeedup: {loop_time / indexed_time:.1f}x")
+
+    mismatches = sum(1 for a, b in zip(loop_result, indexed_result) if a != b)
+    if mismatches:
+        print(f"\nERROR: {mismatches:,} roads assigned differently")
+    else:
+        print("\n[OK] Both methods assign every road to the same region")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Error of the streaming statistics (streaming_stats.py) against the exact
+in-memory analysis, on the {region}_nightlight_{year}.js files of a region
+(default: Bakool) and on their merge across years, plus a synthetic stream
+too large to hold comfortably as one Python list
+
+Without a points file the year falls back to its
+{region}_nightlight_polygons_{year}.js file (the cells the dashboard draws).
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from analyze_nightlight_distribution import CONTEXTUAL_EDGES, PERCENTILES, bin_counts, load_values
+from natural_breaks import goodness_of_variance_fit, jenks_breaks
+from region_names import data_file
+from streaming_stats import CHUNK_BYTES, DEFAULT_K, StreamingSummary
+
+
+def input_file(region, year, data_dir='.'):
+    """The points file of region and year, else its polygon file; None if neither exists"""
+    for path in (data_file(region, year, data_dir),
+                 os.path.join(data_dir, f'{region}_nightlight_polygons_{year}.js')):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_polygon_values(path):
+    """Sorted cell values of a {region}_nightlight_polygons_{year}.js file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    features = json.loads(content.split('=', 1)[1].strip().rstrip(';'))['features']
+    return np.sort(np.array([f['properties']['value'] for f in features], dtype=float))
+
+
+def measure(func, *args, **kwargs):
+    """(result, seconds, peak traced MB) of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def compare(summary, values):
+    """Error of summary against the exact statistics of the sorted values"""
+    n = len(values)
+    probabilities = np.array(PERCENTILES) / 100
+    exact = np.quantile(values, probabilities)
+    estimates = summary.quantiles(probabilities)
+    low, high = summary.quantile_bounds(probabilities)
+    # Normalized rank error: distance from the target rank to the ranks
+    # [first, last + 1) the estimate occupies (wider for a repeated value).
+    # The sketch picks an item without interpolating, so the value of rank
+    # floor(target) is no error, as in the bound
+    target = probabilities * (n - 1)
+    first = np.searchsorted(values, estimates, side='left')
+    last = np.searchsorted(values, estimates, side='right') - 1
+    rank_error = np.maximum(np.maximum(first - target, target - (last + 1)), 0) / n
+    breaks, gvf = summary.natural_breaks(6)
+    return {
+        'count': summary.count == n,
+        'mean': abs(summary.moments.mean - values.mean()),
+        'std': abs(summary.moments.std - values.std()),
+        'value': np.abs(estimates - exact).max(),
+        'rank': rank_error.max(),
+        'bound': summary.sketch.rank_error / n,
+        'within': bool(((low <= exact) & (exact <= high)).all()),
+        'width': (high - low).max(),
+        'contextual': all((summary.bin_counts(CONTEXTUAL_EDGES, open_top=open_top)
+                           == bin_counts(values, CONTEXTUAL_EDGES, open_top=open_top)).all()
+                          for open_top in (False, True)),
+        'gvf': gvf,
+        'exact_gvf': goodness_of_variance_fit(values, jenks_breaks(values, 6)),
+    }
+
+
+def print_row(label, errors):
+    print(f"{label:<22} {errors['mean']:>9.1e} {errors['std']:>9.1e} {errors['value']:>9.4f} "
+          f"{errors['rank']:>8.3%} {errors['bound']:>8.2%} {str(errors['within']):>7} {errors['width']:>7.3f} "
+          f"{str(errors['contextual']):>6} {errors['gvf']:>7.4f} {errors['exact_gvf']:>7.4f}")
+
+
+def synthetic_chunks(chunks, chunk_size, seed):
+    """Chunks of radiance-like values (rounded to 3 decimals), a few bright up to 60"""
+    rng = np.random.default_rng(seed)
+    for _ in range(chunks):
+        values = np.round(0.2 + rng.lognormal(-2.4, 0.6, chunk_size), 3)
+        values[:chunk_size // 2000] = np.round(rng.uniform(0.5, 60, chunk_size // 2000), 3)
+        yield values
+
+
+def stream(summary, chunks):
+    for chunk in chunks:
+        summary.update(chunk)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming statistics error bounds against the exact analysis')
+    parser.add_argument('--region', default='bakool')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023])
+    parser.add_argument('--data-dir', default='.')
+    parser.add_argument('--sketch-k', type=int, default=DEFAULT_K)
+    parser.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / (1024 * 1024))
+    parser.add_argument('--synthetic-chunks', type=int, default=20,
+                        help='1M-value chunks in the synthetic stream (default: 20)')
+    args = parser.parse_args()
+    chunk_bytes = int(args.chunk_mb * 1024 * 1024)
+
+    print("=" * 70)
+    print(f"  Streaming Statistics vs Exact (KLL k={args.sketch_k}, {args.chunk_mb:g} MB chunks)")
+    print("=" * 70)
+
+    print(f"\n{'Input':<22} {'Mean err':>9} {'Std err':>9} {'Pct err':>9} {'Rank err':>8} {'Bound':>8} "
+          f"{'In int.':>7} {'Width':>7} {'Ctx':>6} {'GVF':>7} {'Exact':>7}")
+    print("-" * 108)
+    merged = StreamingSummary(args.sketch_k)
+    all_values = []
+    timings = []
+    for year in args.years:
+        path = input_file(args.region, year, args.data_dir)
+        if path is None:
+            print(f"WARNING: {data_file(args.region, year, args.data_dir)} not found, skipped")
+            continue
+        polygons = path != data_file(args.region, year, args.data_dir)
+        summary, t_stream, m_stream = measure(StreamingSummary.from_file, path, chunk_bytes, k=args.sketch_k, seed=year)
+        load_values.cache_clear()
+        values, t_exact, m_exact = measure(load_polygon_values if polygons else load_values, path)
+        timings.append((year, t_exact, m_exact, t_stream, m_stream))
+        print_row(f"{args.region} {year}{' (cells)' if polygons else ''}", compare(summary, values))
+        merged.merge(summary)
+        all_values.append(values)
+    if len(all_values) > 1:
+        print_row(f"{args.region} merged", compare(merged, np.sort(np.concatenate(all_values))))
+
+    if timings:
+        print(f"\n{'Year':<8} {'Exact (s)':>10} {'Exact MB':>9} {'Stream (s)':>11} {'Stream MB':>10}")
+        print("-" * 52)
+        for year, t_exact, m_exact, t_stream, m_stream in timings:
+            print(f"{year:<8} {t_exact:>10.2f} {m_exact:>9.1f} {t_stream:>11.2f} {m_stream:>10.1f}")
+
+    n = args.synthetic_chunks
+    summary, t, peak = measure(stream, StreamingSummary(args.sketch_k), synthetic_chunks(n, 1_000_000, 7))
+    values = np.sort(np.concatenate(list(synthetic_chunks(n, 1_000_000, 7))))
+    print(f"\nSynthetic stream: {n}M values in 1M chunks, {t:.2f} s, peak {peak:.0f} MB traced "
+          f"(the values alone are {values.nbytes / (1024 * 1024):.0f} MB)")
+    print_row(f"synthetic {n}M", compare(summary, values))
+
+
+if __name__ == '__main__':
+    main()
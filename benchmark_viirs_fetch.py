@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark the batch fetch engine used by extract_viirs_bakool_full.py
+Runs offline against a fake of the Earth Engine client that simulates
+request latency and transient failures, comparing the original serial
+toList(batch_size, start).getInfo() loop with BatchFetcher, and checks that
+an interrupted run resumes from its checkpoints
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+from batch_fetch import BatchFetcher, BatchFetchError, is_transient_ee_error
+
+
+class FakeEEException(Exception):
+    pass
+
+
+class FakeComputedObject:
+    def __init__(self, compute):
+        self._compute = compute
+
+    def getInfo(self):
+        return self._compute()
+
+
+class FakeSampleCollection:
+    """
+    Stands in for the ee.FeatureCollection returned by image.sample():
+    size().getInfo() and toList(count, offset).getInfo() with latency,
+    random transient errors and an optional outage after a number of calls
+    """
+
+    def __init__(self, total, latency=0.25, jitter=0.1, failure_rate=0.0, fail_after=None, seed=1):
+        self.total = total
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.fail_after = fail_after
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._features = [self._feature(i) for i in range(total)]
+
+    def size(self):
+        return FakeComputedObject(lambda: self.total)
+
+    def _feature(self, i):
+        rng = random.Random(i)
+        lon, lat = 43.0 + rng.random() * 1.8, 3.3 + rng.random() * 1.9
+        return {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {'average': round(rng.lognormvariate(-1.1, 0.15), 4)}}
+
+    def toList(self, count, offset=0):
+        def compute():
+            with self._lock:
+                self.calls += 1
+                calls = self.calls
+                fail = self._rng.random() < self.failure_rate
+                delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+            time.sleep(max(0.0, delay))
+            if self.fail_after is not None and calls > self.fail_after:
+                raise FakeEEException('Service unavailable (simulated outage)')
+            if fail:
+                raise FakeEEException('Too many concurrent aggregations (simulated)')
+            return [dict(feature) for feature in self._features[offset:offset + count]]
+        return FakeComputedObject(compute)
+
+
+def fetch_serial(sample_points, batch_size):
+    """The original loop: one request at a time, no retries"""
+    all_features = []
+    total_count = sample_points.size().getInfo()
+    num_batches = (total_count // batch_size) + 1
+    for batch in range(num_batches):
+        start = batch * batch_size
+        batch_data = sample_points.toList(batch_size, start).getInfo()
+        all_features.extend(batch_data)
+        if len(batch_data) < batch_size:
+            break
+    return all_features
+
+
+def fetch_engine(sample_points, batch_size, workers, checkpoint_dir, retries=8):
+    fetcher = BatchFetcher(lambda start, count: sample_points.toList(count, start).getInfo(),
+                           checkpoint_dir, workers=workers, retries=retries, backoff=0.05,
+                           is_transient=is_transient_ee_error, log=lambda message: None)
+    return fetcher.run(sample_points.size().getInfo(), batch_size), fetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel batch fetching against a fake ee client')
+    parser.add_argument('--points', type=int, default=104211, help='Sampled points to fetch')
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.25, help='Simulated seconds per request')
+    parser.add_argument('--failure-rate', type=float, default=0.1, help='Share of requests that fail transiently')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  VIIRS Batch Fetch Benchmark (fake Earth Engine client)")
+    print("=" * 70)
+    batches = -(-args.points // args.batch_size)
+    print(f"\nPoints: {args.points:,} in {batches} batches of {args.batch_size:,}")
+    print(f"Latency: {args.latency}s per request, transient failure rate {args.failure_rate:.0%}")
+
+    start = time.perf_counter()
+    reference = fetch_serial(FakeSampleCollection(args.points, args.latency), args.batch_size)
+    serial_time = time.perf_counter() - start
+
+    print(f"\n{'Method':<34} {'Time (s)':>9} {'Retries':>8} {'Speedup':>8}")
+    print("-" * 62)
+    print(f"{'Serial loop (no failures)':<34} {serial_time:>9.2f} {'-':>8} {1.0:>7.1f}x")
+
+    all_identical = True
+    for workers in args.workers:
+        sample_points = FakeSampleCollection(args.points, args.latency, failure_rate=args.failure_rate)
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            start = time.perf_counter()
+            items, fetcher = fetch_engine(sample_points, args.batch_size, workers, checkpoint_dir)
+            elapsed = time.perf_counter() - start
+        all_identical &= items == reference
+        label = f"BatchFetcher, {workers} worker{'s' if workers > 1 else ''}"
+        print(f"{label:<34} {elapsed:>9.2f} {fetcher.retried:>8} {serial_time / elapsed:>7.1f}x")
+
+    # Interrupted run: the service goes down part way, then the rerun resumes
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        outage = FakeSampleCollection(args.points, args.latency, fail_after=batches // 2)
+        try:
+            fetch_engine(outage, args.batch_size, 4, checkpoint_dir, retries=1)
+            interrupted = False
+        except BatchFetchError:
+            interrupted = True
+        healthy = FakeSampleCollection(args.points, args.latency)
+        items, fetcher = fetch_engine(healthy, args.batch_size, 4, checkpoint_dir)
+        all_identical &= items == reference
+
+    print(f"\nResume after outage: first run {'stopped' if interrupted else 'DID NOT stop'}, rerun reused "
+          f"{fetcher.resumed}/{batches} checkpointed batches and fetched {fetcher.fetched}")
+
+    if all_identical:
+        print("\n[OK] Every run returned the same points as the serial loop")
+    else:
+        print("\nERROR: Some runs returned different points")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark the multi-region VIIRS driver (extract_viirs_regions.py) offline
+Builds synthetic VIIRS rasters over 18 regions (the synthetic layout from
+benchmark_region_assignment.py, or the ADM1 boundaries in --data-js) and
+runs every region x year job through LocalRasterBackend with a simulated
+per-job latency, comparing wall time across worker counts
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from shapely.geometry import mapping, shape
+
+from benchmark_region_assignment import synthetic_regions
+from extract_viirs_regions import LocalRasterBackend, run_jobs
+from nightlight_grid import NightlightGrid
+
+
+def make_fixture_rasters(raster_dir, bounds, years, pixel_size=0.02, seed=42):
+    """
+    Write viirs_{year}.npy grids with a dim background and a few bright towns.
+    Pixels are coarser than VIIRS (~2km) to keep 18 regions' outputs small.
+    """
+    os.makedirs(raster_dir, exist_ok=True)
+    west, south, east, north = bounds
+    width = int(np.ceil((east - west) / pixel_size))
+    height = int(np.ceil((north - south) / pixel_size))
+    rng = np.random.default_rng(seed)
+    for year in years:
+        data = rng.lognormal(-1.1, 0.15, size=(height, width)).astype(np.float32)
+        for _ in range(40):
+            row, col = rng.integers(0, height), rng.integers(0, width)
+            data[max(0, row - 3):row + 4, max(0, col - 3):col + 4] += rng.uniform(0.5, 20)
+        NightlightGrid(data, west, north, pixel_size, year, region='fixture', source='synthetic').save(
+            os.path.join(raster_dir, f'viirs_{year}.npy'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the multi-region VIIRS driver offline')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023])
+    parser.add_argument('--latency', type=float, default=2.0, help='Simulated seconds of remote compute per job')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 18])
+    parser.add_argument('--data-js', help='Use the ADM1 boundaries from this data.js instead of synthetic regions')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  Multi-Region VIIRS Extraction Benchmark (local raster backend)")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        raster_dir = os.path.join(work_dir, 'rasters')
+        backend = LocalRasterBackend(raster_dir, args.data_js, latency=args.latency)
+        if args.data_js:
+            from extract_viirs_regions import ADM1_REGIONS
+            boundaries = backend.boundaries(ADM1_REGIONS)
+        else:
+            boundaries = {name: mapping(poly) for name, poly in synthetic_regions(vertices=200).items()}
+
+        # Polygons and MultiPolygons alike
+        bounds = np.array([shape(geometry).bounds for geometry in boundaries.values()])
+        extent = (bounds[:, 0].min(), bounds[:, 1].min(), bounds[:, 2].max(), bounds[:, 3].max())
+        make_fixture_rasters(raster_dir, tuple(float(v) for v in extent), args.years)
+
+        jobs = len(boundaries) * len(args.years)
+        print(f"\nJobs: {len(boundaries)} regions x {len(args.years)} years = {jobs}, "
+              f"{args.latency}s simulated latency each")
+        print(f"\n{'Workers':>8} {'Wall (s)':>10} {'Points':>12} {'Speedup':>8}")
+        print("-" * 42)
+        baseline = None
+        for workers in args.workers:
+            output_dir = os.path.join(work_dir, f'out_{workers}')
+            os.makedirs(output_dir)
+            start = time.perf_counter()
+            results = run_jobs(backend, boundaries, args.years, output_dir, workers, log=lambda message: None)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            points = sum(r[2] or 0 for r in results)
+            print(f"{workers:>8} {elapsed:>10.2f} {points:>12,} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+// Decoder for the binary layer files written by export_binary_layers.py
+// Usage: loadBinaryLayer('roads_by_region/Bay_roads.bin').then(geojson => L.geoJSON(geojson))
+
+const BINARY_LAYER_GEOMETRY = {
+    1: ['Point', 0],
+    2: ['LineString', 1],
+    3: ['Polygon', 2],
+    4: ['MultiPoint', 1],
+    5: ['MultiLineString', 2],
+    6: ['MultiPolygon', 3]
+};
+
+function decodeBinaryLayer(buffer) {
+    const bytes = new Uint8Array(buffer);
+    if (String.fromCharCode(bytes[0], bytes[1], bytes[2], bytes[3]) !== 'SDGB') {
+        throw new Error('Not a binary layer file');
+    }
+    if (bytes[4] !== 1) {
+        throw new Error('Unsupported binary layer version ' + bytes[4]);
+    }
+    let pos = 5;
+
+    // Plain arithmetic instead of bit shifts: JS bitwise ops are 32-bit
+    function readVarint() {
+        let result = 0;
+        let scale = 1;
+        let byte;
+        do {
+            byte = bytes[pos++];
+            result += (byte & 0x7f) * scale;
+            scale *= 128;
+        } while (byte >= 0x80);
+        return result;
+    }
+
+    function readZigzag() {
+        const value = readVarint();
+        return value % 2 ? -(value + 1) / 2 : value / 2;
+    }
+
+    const headerLength = readVarint();
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(pos, pos + headerLength)));
+    pos += headerLength;
+
+    const scale = Math.pow(10, header.precision);
+    const keys = header.keys;
+    const values = [null].concat(header.values);
+    let x = 0;
+    let y = 0;
+
+    function readVertices() {
+        const count = readVarint();
+        const coords = new Array(count);
+        for (let i = 0; i < count; i++) {
+            x += readZigzag();
+            y += readZigzag();
+            coords[i] = [x / scale, y / scale];
+        }
+        return coords;
+    }
+
+    function readNested(depth) {
+        if (depth === 0) return readVertices()[0];
+        if (depth === 1) return readVertices();
+        const count = readVarint();
+        const parts = new Array(count);
+        for (let i = 0; i < count; i++) parts[i] = readNested(depth - 1);
+        return parts;
+    }
+
+    const features = new Array(header.count);
+    for (let f = 0; f < header.count; f++) {
+        const [type, depth] = BINARY_LAYER_GEOMETRY[readVarint()];
+        const geometry = { type: type, coordinates: readNested(depth) };
+        const properties = {};
+        for (let k = 0; k < keys.length; k++) {
+            const index = readVarint();
+            if (index) properties[keys[k]] = values[index];
+        }
+        features[f] = { type: 'Feature', geometry: geometry, properties: properties };
+    }
+
+    const collection = { type: 'FeatureCollection', features: features };
+    if (header.metadata && Object.keys(header.metadata).length) {
+        collection.metadata = header.metadata;
+    }
+    return collection;
+}
+
+function loadBinaryLayer(url) {
+    return fetch(url)
+        .then(response => {
+            if (!response.ok) throw new Error('Failed to load ' + url + ': ' + response.status);
+            return response.arrayBuffer();
+        })
+        .then(decodeBinaryLayer);
+}
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Local cache of the ADM1/ADM2 boundaries in data.js
+
+data.js is parsed once; every boundary is stored as WKB in boundary_cache.wkb
+with a JSON index (boundary_cache.json) of names, spelling variants, parent
+region, bounds and area. Later runs open the index and decode only the
+geometries they ask for. The cache is rebuilt automatically when data.js
+changes (checked by size/mtime, then content hash).
+
+    cache = BoundaryCache.open('data.js')
+    cache.resolve('Bakol')            # 'Bakool'
+    cache.geometry('Bakool')          # shapely geometry
+    cache.area_km2('Bakool')
+    cache.polygons(level=2)           # {district name: geometry}
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from shapely.prepared import prep
+
+from build_manifest import sha256_file
+from datajs_parser import find_assignment
+
+CACHE_PATH = 'boundary_cache'
+CACHE_VERSION = 1
+EARTH_RADIUS_M = 6371000
+
+# Boundary variables in data.js by admin level
+LEVEL_VARIABLES = {1: 'adm1Boundaries', 2: 'adm2Boundaries'}
+
+# Other spellings of ADM1 names (FAO GAUL, OCHA, older dashboard data)
+NAME_VARIANTS = {
+    'Bakool': ['Bakol', 'Bakkol'],
+    'Banadir': ['Banaadir', 'Benadir'],
+    'Galgaduud': ['Galguduud'],
+    'Hiraan': ['Hiiraan', 'Hiran'],
+    'Lower Juba': ['Jubbada Hoose', 'Juba Hoose'],
+    'Lower Shabelle': ['Shabeellaha Hoose', 'Lower Shabele', 'Shabelle Hoose'],
+    'Middle Juba': ['Jubbada Dhexe', 'Juba Dhexe'],
+    'Middle Shabelle': ['Shabeellaha Dhexe', 'Middle Shabele', 'Shabelle Dhexe'],
+    'Nugaal': ['Nugal'],
+    'Togdheer': ['Togdher'],
+    'Woqooyi Galbeed': ['Waqooyi Galbeed', 'Woqooyi Galbed']
+}
+
+
+def name_key(name):
+    """Case, spacing and punctuation-insensitive key used for name lookups"""
+    return ''.join(ch for ch in name.lower() if ch.isalnum())
+
+
+def read_datajs_variable(content, name):
+    """Parse `const|var|let name = {...};` from data.js text, or None if absent"""
+    assignment = find_assignment(content, name)
+    return None if assignment is None else assignment.value()
+
+
+def _ring_area_m2(coords):
+    """Area of a lon/lat ring on the sphere (spherical excess approximation)"""
+    ring = np.radians(np.asarray(coords, dtype=float)[:, :2])
+    lon, lat = ring[:, 0], ring[:, 1]
+    total = np.sum((np.roll(lon, -1) - lon) * (2 + np.sin(lat) + np.sin(np.roll(lat, -1))))
+    return abs(total) * EARTH_RADIUS_M ** 2 / 2
+
+
+def geodesic_area_km2(geometry):
+    """Area of a (Multi)Polygon in lon/lat degrees, in km²"""
+    area = 0.0
+    for polygon in shapely.get_parts(geometry):
+        area += _ring_area_m2(polygon.exterior.coords)
+        area -= sum(_ring_area_m2(ring.coords) for ring in polygon.interiors)
+    return area / 1e6
+
+
+class BoundaryCache:
+    """Boundary index loaded from the cache files; geometries are decoded on first use"""
+
+    def __init__(self, index, wkb):
+        self.index = index
+        self._wkb = wkb
+        self._geometries = {}
+        self._by_key = {}
+        for i, entry in enumerate(index['entries']):
+            for alias in [entry['name']] + entry['aliases']:
+                self._by_key.setdefault((entry['level'], name_key(alias)), i)
+
+    @classmethod
+    def open(cls, data_js='data.js', cache_path=None, rebuild=False):
+        """
+        Load the cache for data_js, building or refreshing it first if needed.
+        The cache files live next to data_js unless cache_path is given.
+        """
+        cache_path = cache_path or os.path.join(os.path.dirname(data_js), CACHE_PATH)
+        index_path, wkb_path = cache_path + '.json', cache_path + '.wkb'
+        if not rebuild and os.path.exists(index_path) and os.path.exists(wkb_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == CACHE_VERSION and cls._source_current(index, data_js, index_path):
+                with open(wkb_path, 'rb') as f:
+                    return cls(index, f.read())
+        return cls.build(data_js, cache_path)
+
+    @staticmethod
+    def _source_current(index, data_js, index_path):
+        source = index['source']
+        if not os.path.exists(data_js):
+            # No data.js next to us (e.g. a copied cache): trust the cache
+            return True
+        st = os.stat(data_js)
+        if st.st_size == source['size'] and st.st_mtime_ns == source['mtime_ns']:
+            return True
+        if st.st_size == source['size'] and sha256_file(data_js) == source['sha256']:
+            source['mtime_ns'] = st.st_mtime_ns
+            # Replaced atomically: another process may be reading the index right now.
+            # The temporary name is per process so concurrent refreshes do not collide
+            tmp_path = f'{index_path}.tmp{os.getpid()}'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+            return True
+        return False
+
+    @classmethod
+    def build(cls, data_js='data.js', cache_path=CACHE_PATH):
+        """Parse data.js and write the cache files"""
+        with open(data_js, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        entries = []
+        blobs = []
+        offset = 0
+        adm1 = []
+        for level, variable in LEVEL_VARIABLES.items():
+            collection = read_datajs_variable(content, variable)
+            if collection is None:
+                continue
+            for feature in collection['features']:
+                props = feature.get('properties') or {}
+                name = props.get('name') or props.get('ADM1_EN') or props.get('shapeName')
+                if not name or not feature.get('geometry'):
+                    continue
+                geometry = shape(feature['geometry'])
+                parent = None
+                if level == 2:
+                    parent = props.get('ADM1_EN')
+                    if parent is None:
+                        point = geometry.representative_point()
+                        parent = next((n for n, g in adm1 if g.contains(point)), None)
+                else:
+                    adm1.append((name, prep(geometry)))
+                blob = shapely.to_wkb(geometry)
+                blobs.append(blob)
+                entries.append({
+                    'level': level,
+                    'name': name,
+                    'aliases': NAME_VARIANTS.get(name, []) if level == 1 else [],
+                    'parent': parent,
+                    'bounds': list(geometry.bounds),
+                    'area_km2': round(geodesic_area_km2(geometry), 3),
+                    'properties': {k: v for k, v in props.items() if not isinstance(v, (dict, list))},
+                    'offset': offset,
+                    'length': len(blob)
+                })
+                offset += len(blob)
+
+        st = os.stat(data_js)
+        index = {
+            'version': CACHE_VERSION,
+            'source': {'path': data_js, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                       'sha256': sha256_file(data_js)},
+            'entries': entries
+        }
+        wkb = b''.join(blobs)
+        with open(cache_path + '.wkb.tmp', 'wb') as f:
+            f.write(wkb)
+        with open(cache_path + '.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(cache_path + '.wkb.tmp', cache_path + '.wkb')
+        os.replace(cache_path + '.json.tmp', cache_path + '.json')
+        return cls(index, wkb)
+
+    def _entry(self, name, level):
+        i = self._by_key.get((level, name_key(name)))
+        if i is None:
+            raise KeyError(f"No ADM{level} boundary named {name!r}")
+        return i, self.index['entries'][i]
+
+    def names(self, level=1):
+        return [e['name'] for e in self.index['entries'] if e['level'] == level]
+
+    def resolve(self, name, level=1):
+        """Canonical name for name or one of its spelling variants, or None"""
+        i = self._by_key.get((level, name_key(name)))
+        return None if i is None else self.index['entries'][i]['name']
+
+    def geometry(self, name, level=1):
+        i, entry = self._entry(name, level)
+        if i not in self._geometries:
+            blob = self._wkb[entry['offset']:entry['offset'] + entry['length']]
+            self._geometries[i] = shapely.from_wkb(blob)
+        return self._geometries[i]
+
+    def bounds(self, name, level=1):
+        """(west, south, east, north)"""
+        return tuple(self._entry(name, level)[1]['bounds'])
+
+    def area_km2(self, name, level=1):
+        return self._entry(name, level)[1]['area_km2']
+
+    def parent(self, name):
+        """ADM1 region containing an ADM2 district"""
+        return self._entry(name, 2)[1]['parent']
+
+    def properties(self, name, level=1):
+        return dict(self._entry(name, level)[1]['properties'])
+
+    def polygons(self, level=1):
+        """{name: geometry} for every boundary at level, in data.js order"""
+        return {name: self.geometry(name, level) for name in self.names(level)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or inspect the local boundary cache')
+    parser.add_argument('--data-js', default='data.js')
+    parser.add_argument('--cache', help='Cache path prefix (default: boundary_cache next to data.js)')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild even if data.js is unchanged')
+    parser.add_argument('--resolve', nargs='+', metavar='NAME', help='Resolve region names and exit')
+    args = parser.parse_args()
+
+    cache = BoundaryCache.open(args.data_js, args.cache, rebuild=args.rebuild)
+    if args.resolve:
+        for name in args.resolve:
+            print(f"{name} -> {cache.resolve(name) or cache.resolve(name, level=2) or 'not found'}")
+        return
+
+    print("=" * 60)
+    print("  Boundary Cache")
+    print("=" * 60)
+    print(f"\nSource: {cache.index['source']['path']}")
+    print(f"Cache:  {len(cache.index['entries'])} boundaries, {len(cache._wkb) / 1024 / 1024:.2f} MB of WKB")
+    print(f"ADM1 regions: {len(cache.names(1))}, ADM2 districts: {len(cache.names(2))}")
+    print(f"\n{'Region':<22} {'Area km²':>12} {'Districts':>10}")
+    print("-" * 46)
+    districts = [e['parent'] for e in cache.index['entries'] if e['level'] == 2]
+    for name in cache.names(1):
+        print(f"{name:<22} {cache.area_km2(name):>12,.0f} {districts.count(name):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Split data.js into content-hashed, independently cacheable bundles
+
+Every top-level variable in data.js becomes its own bundle, and each extra
+data file (the Bakool nightlight polygons) and app script is copied under a
+hashed name:
+
+    bundles/adm1Boundaries.3f9c2a71d0.js
+    bundles/populationData.8e41b07c55.js
+    bundles/script.c02d6e9a14.js
+    bundles/manifest.json    {"eager": [...], "datasets": {name: {"file": ...}}, "scripts": [...]}
+
+A bundle's name changes whenever its content does, so the files can be served
+with `Cache-Control: public, max-age=31536000, immutable`; only index.html,
+data_loader.js and manifest.json need revalidating. data_loader.js loads the
+eager datasets (the boundaries) and the scripts at startup, and every other
+dataset when script.js first needs it. Bundles of the previous build are kept
+so pages still holding the old manifest can finish loading.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+from build_stats_cube import CUBE_FILE, CUBE_VARIABLE, stale_sources
+from datajs_parser import iter_assignments, read_variable
+
+BUNDLE_DIR = 'bundles'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+
+# Loaded before script.js runs: the map is drawn from these
+EAGER_DATASETS = ['adm1Boundaries', 'adm2Boundaries']
+
+# Missing files are skipped; the columnar cells and dissolved layers are optional
+# (convert_points_to_polygons.py --format columnar / dissolved)
+DATA_FILES = ['bakool_nightlight_polygons_2022.js', 'bakool_nightlight_polygons_2023.js',
+              'bakool_nightlight_cells_2022.js', 'bakool_nightlight_cells_2023.js',
+              'bakool_nightlight_dissolved_2022.js', 'bakool_nightlight_dissolved_2023.js', 'stats_cube.js']
+APP_SCRIPTS = ['nightlight_cells.js', 'isee_analytics.js', 'script.js']
+
+# Top-level data.js text that is not a declaration but may be ignored
+_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def write_bundle(bundle_dir, stem, data):
+    """Write data as {stem}.{hash}.js (unless it already exists) and return the file name"""
+    name = f"{stem}.{content_hash(data)}.js"
+    path = os.path.join(bundle_dir, name)
+    if not os.path.exists(path):
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    return name
+
+
+def split_datajs(content):
+    """
+    ([(variable name, declaration source)] for every top-level variable in
+    data.js, the other top-level statements). Comments, blank lines and stray
+    semicolons between the declarations are not statements.
+    """
+    assignments = list(iter_assignments(content))
+    gaps = zip([0] + [a.end for a in assignments], [a.start for a in assignments] + [len(content)])
+    statements = [content[start:end].strip() for start, end in gaps
+                  if _COMMENT.sub('', content[start:end]).strip().strip(';').strip()]
+    return [(a.name, content[a.start:a.end]) for a in assignments], '\n'.join(statements)
+
+
+def load_manifest(bundle_dir):
+    path = os.path.join(bundle_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def manifest_files(manifest):
+    if not manifest:
+        return set()
+    return {entry['file'] for entry in manifest['datasets'].values()} | set(manifest['scripts'])
+
+
+def build_bundles(data_js='data.js', data_files=DATA_FILES, scripts=APP_SCRIPTS,
+                  bundle_dir=BUNDLE_DIR, eager=EAGER_DATASETS):
+    """Write the bundles and manifest; returns (manifest, removed file names)"""
+    os.makedirs(bundle_dir, exist_ok=True)
+    previous = load_manifest(bundle_dir)
+    datasets = {}
+
+    with open(data_js, 'r', encoding='utf-8') as f:
+        content = f.read()
+    declarations, statements = split_datajs(content)
+    for name, source in declarations:
+        data = (source + '\n').encode('utf-8')
+        datasets[name] = {'file': write_bundle(bundle_dir, name, data), 'bytes': len(data), 'source': data_js}
+    script_files = []
+    if statements:
+        # Kept and run with the app scripts, after the eager datasets but before any lazy one
+        print(f"  WARNING: {data_js} has {len(statements):,} bytes of top-level code besides the declarations; "
+              f"it is bundled as an app script and runs before the lazy datasets are loaded")
+        stem = os.path.splitext(os.path.basename(data_js))[0] + '_statements'
+        script_files.append(write_bundle(bundle_dir, stem, (statements + '\n').encode('utf-8')))
+
+    for path in data_files:
+        if not os.path.exists(path):
+            print(f"  WARNING: {path} not found, skipped")
+            continue
+        if os.path.basename(path) == CUBE_FILE:
+            # The panel scans the features itself rather than show statistics of other data
+            stale = stale_sources(read_variable(path, CUBE_VARIABLE))
+            if stale:
+                print(f"  WARNING: {path} is stale ({', '.join(stale)} changed), skipped; "
+                      f"rerun build_stats_cube.py")
+                continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem = os.path.splitext(os.path.basename(path))[0]
+        file_name = write_bundle(bundle_dir, stem, data)
+        # A data file can declare several variables; they all share its bundle
+        for assignment in iter_assignments(data.decode('utf-8')):
+            datasets[assignment.name] = {'file': file_name, 'bytes': len(data), 'source': path}
+
+    for path in scripts:
+        with open(path, 'rb') as f:
+            data = f.read()
+        script_files.append(write_bundle(bundle_dir, os.path.splitext(os.path.basename(path))[0], data))
+
+    manifest = {
+        'version': 1,
+        'built': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'eager': [name for name in eager if name in datasets],
+        'datasets': datasets,
+        'scripts': script_files
+    }
+    manifest_path = os.path.join(bundle_dir, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    # Keep this build's and the previous build's bundles, drop anything older
+    keep = manifest_files(manifest) | manifest_files(previous) | {MANIFEST_NAME}
+    removed = []
+    for name in sorted(os.listdir(bundle_dir)):
+        if name.endswith('.js') and name not in keep:
+            os.remove(os.path.join(bundle_dir, name))
+            removed.append(name)
+    return manifest, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split data.js into content-hashed, lazily loaded bundles')
+    parser.add_argument('--data-js', default='data.js')
+    parser.add_argument('--data-files', nargs='*', default=DATA_FILES, help='Other data scripts to bundle')
+    parser.add_argument('--scripts', nargs='*', default=APP_SCRIPTS, help='App scripts run after the eager data')
+    parser.add_argument('--output-dir', default=BUNDLE_DIR)
+    parser.add_argument('--eager', nargs='*', default=EAGER_DATASETS,
+                        help='Datasets loaded before the app scripts (default: the boundaries)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Data Bundles")
+    print("=" * 60)
+
+    manifest, removed = build_bundles(args.data_js, args.data_files, args.scripts, args.output_dir, args.eager)
+
+    print(f"\n{'Dataset':<30} {'Size (KB)':>10}  {'Load':<6} File")
+    print("-" * 80)
+    for name, entry in manifest['datasets'].items():
+        load = 'eager' if name in manifest['eager'] else 'lazy'
+        print(f"{name:<30} {entry['bytes'] / 1024:>10,.1f}  {load:<6} {entry['file']}")
+    for file_name in manifest['scripts']:
+        print(f"{'(script)':<30} {os.path.getsize(os.path.join(args.output_dir, file_name)) / 1024:>10,.1f}  "
+              f"{'eager':<6} {file_name}")
+
+    eager_bytes = sum(manifest['datasets'][name]['bytes'] for name in manifest['eager'])
+    lazy_bytes = sum(entry['bytes'] for name, entry in manifest['datasets'].items()
+                     if name not in manifest['eager'] and entry['source'] == args.data_js)
+    print(f"\n✓ Startup data: {eager_bytes / 1024 / 1024:.2f} MB "
+          f"(was {os.path.getsize(args.data_js) / 1024 / 1024:.2f} MB of data.js), "
+          f"{lazy_bytes / 1024 / 1024:.2f} MB of data.js deferred")
+    if removed:
+        print(f"✓ Removed {len(removed)} bundles no longer referenced")
+    print(f"✓ Manifest: {os.path.join(args.output_dir, MANIFEST_NAME)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Build manifest shared by the roads pipeline scripts
+(process_roads_by_region.py, optimize_geojson.py, optimize_roads_js.py)
+
+Records content hashes of inputs and outputs plus per-step parameters in
+build_manifest.json, so a rerun can tell what actually changed and only
+rebuild that. File hashes are cached against (size, mtime) so unchanged files
+are recognised without reading them again.
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = 'build_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class BuildManifest:
+    """
+    build_manifest.json layout:
+
+        {"version": 1,
+         "files": {path: {"size": ..., "mtime_ns": ..., "sha256": ...}},
+         "steps": {step name: {...step-specific state...}}}
+
+    "files" holds the last state recorded for each input or output; "steps"
+    is free-form state owned by each pipeline script.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.data = {'version': MANIFEST_VERSION, 'files': {}, 'steps': {}}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.data = data
+
+    @staticmethod
+    def _key(path):
+        return os.path.normpath(path).replace(os.sep, '/')
+
+    def file_hash(self, path):
+        """
+        Current SHA-256 of path (None if missing). Reuses the recorded hash
+        when size and mtime still match, otherwise reads the file.
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        entry = self.data['files'].get(self._key(path))
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['sha256']
+        return sha256_file(path)
+
+    def recorded_hash(self, path):
+        """Hash recorded for path by the last pipeline step that touched it"""
+        entry = self.data['files'].get(self._key(path))
+        return entry['sha256'] if entry else None
+
+    def is_unchanged(self, path):
+        """True if path exists and still matches what was last recorded for it"""
+        recorded = self.recorded_hash(path)
+        return recorded is not None and self.file_hash(path) == recorded
+
+    def record_file(self, path, sha256=None):
+        """Record the current state of path (hashing it unless sha256 is given)"""
+        st = os.stat(path)
+        self.data['files'][self._key(path)] = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': sha256 or sha256_file(path)
+        }
+
+    def forget_file(self, path):
+        self.data['files'].pop(self._key(path), None)
+
+    def step(self, name):
+        """Mutable state dict owned by one pipeline step"""
+        return self.data['steps'].setdefault(name, {})
+
+    def is_current(self, step, path, params):
+        """
+        True if step already produced path with these params and the file
+        has not changed since (used by in-place optimizers to skip work)
+        """
+        entry = self.step(step).get(self._key(path))
+        return (entry is not None and entry['params'] == params and
+                self.file_hash(path) == entry['sha256'])
+
+    def record_output(self, step, path, params):
+        """Record that step produced path with params"""
+        self.record_file(path)
+        self.step(step)[self._key(path)] = {'params': params, 'sha256': self.recorded_hash(path)}
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
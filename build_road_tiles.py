@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Build a Mapbox Vector Tile (MVT/PBF) pyramid from the clipped regional roads
+Reads roads_by_region/*_roads.geojson (written by process_roads_by_region.py)
+and writes z/x/y tiles so the map only downloads the roads that are visible:
+- Geometry is simplified per zoom (one screen pixel tolerance)
+- Minor road classes (fclass) are dropped at low zooms
+- Output goes to a z/x/y.pbf directory or a single-file MBTiles archive
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import sqlite3
+import struct
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+# Tile coordinate resolution and clip buffer (MVT defaults)
+EXTENT = 4096
+BUFFER = 64
+
+# Lowest zoom at which each road class appears
+FCLASS_MIN_ZOOM = {
+    'motorway': 0, 'motorway_link': 0,
+    'trunk': 0, 'trunk_link': 0,
+    'primary': 0, 'primary_link': 0,
+    'secondary': 7, 'secondary_link': 7,
+    'tertiary': 8, 'tertiary_link': 8,
+    'unclassified': 10, 'residential': 10, 'track': 10,
+}
+DEFAULT_MIN_ZOOM = 11  # service, footway, path, unknown, ...
+
+LAYER_NAME = 'roads'
+
+# Web Mercator latitude limit
+MAX_LATITUDE = 85.0511287798
+
+
+def fclass_min_zoom(fclass):
+    if fclass in FCLASS_MIN_ZOOM:
+        return FCLASS_MIN_ZOOM[fclass]
+    if fclass.startswith('track'):
+        return FCLASS_MIN_ZOOM['track']
+    return DEFAULT_MIN_ZOOM
+
+
+# ---------------------------------------------------------------------------
+# Minimal MVT (protobuf) encoder - only what the roads layer needs
+# ---------------------------------------------------------------------------
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number, wire_type):
+    return _varint((number << 3) | wire_type)
+
+
+def _bytes_field(number, payload):
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed_field(number, values):
+    return _bytes_field(number, b''.join(_varint(v) for v in values))
+
+
+def _zigzag(n):
+    return (n << 1) ^ (n >> 31)
+
+
+def _encode_value(value):
+    """Tile.Value message: string (1), double (3), uint (5) or sint (6)"""
+    if isinstance(value, str):
+        return _bytes_field(1, value.encode('utf-8'))
+    if isinstance(value, float):
+        return _field(3, 1) + struct.pack('<d', value)
+    if value >= 0:
+        return _field(5, 0) + _varint(value)
+    return _field(6, 0) + _varint(_zigzag(value))
+
+
+def _encode_lines(lines):
+    """MVT geometry commands for a set of lines in tile coordinates"""
+    commands = []
+    cx = cy = 0
+    for line in lines:
+        x, y = line[0]
+        commands += [(1 & 0x7) | (1 << 3), _zigzag(x - cx), _zigzag(y - cy)]
+        cx, cy = x, y
+        commands.append((2 & 0x7) | ((len(line) - 1) << 3))
+        for x, y in line[1:]:
+            commands += [_zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+    return commands
+
+
+def encode_tile(features):
+    """Encode [(lines, properties)] as a one-layer vector tile"""
+    keys, values = {}, {}
+    encoded = []
+    for lines, properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value).__name__, value), len(values)))
+        encoded.append(_bytes_field(2,
+                                    _packed_field(2, tags) +
+                                    _field(3, 0) + _varint(2) +  # LINESTRING
+                                    _packed_field(4, _encode_lines(lines))))
+
+    layer = (_field(15, 0) + _varint(2) +
+             _bytes_field(1, LAYER_NAME.encode('utf-8')) +
+             b''.join(encoded) +
+             b''.join(_bytes_field(3, k.encode('utf-8')) for k in keys) +
+             b''.join(_bytes_field(4, _encode_value(v)) for (_, v) in values) +
+             _field(5, 0) + _varint(EXTENT))
+    return _bytes_field(3, layer)
+
+
+# ---------------------------------------------------------------------------
+# Tiling
+# ---------------------------------------------------------------------------
+
+def load_roads(input_dir):
+    """Read every regional roads GeoJSON into (geometry, properties, min zoom) tuples"""
+    roads = []
+    for geojson_file in sorted(Path(input_dir).glob('*_roads.geojson')):
+        with open(geojson_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for feature in data['features']:
+            props = feature['properties']
+            fclass = props.get('fclass') or 'unknown'
+            properties = {
+                'fclass': fclass,
+                'Length_m': round(float(props.get('Length_m') or 0), 1),
+                'Source_Yea': str(props.get('Source_Yea') or '')
+            }
+            roads.append((shape(feature['geometry']), properties, fclass_min_zoom(fclass)))
+        print(f"  ✓ {geojson_file.name}: {len(data['features']):,} roads")
+    return roads
+
+
+def _project(world_size):
+    """lon/lat -> Web Mercator world coordinates (origin top-left) at a zoom"""
+    def transform(coords):
+        lon = coords[:, 0]
+        lat = np.radians(coords[:, 1].clip(-MAX_LATITUDE, MAX_LATITUDE))
+        x = (lon + 180.0) / 360.0 * world_size
+        y = (0.5 - np.log(np.tan(math.pi / 4 + lat / 2)) / (2 * math.pi)) * world_size
+        return np.column_stack([x, y])
+    return transform
+
+
+def tile_zoom(roads, zoom):
+    """Return {(x, y): [(lines, properties)]} for one zoom level"""
+    world_size = EXTENT * (1 << zoom)
+    tolerance = EXTENT / 256.0  # one screen pixel on a 256px tile
+    project = _project(world_size)
+    tiles = defaultdict(list)
+
+    for geom, properties, min_zoom in roads:
+        if zoom < min_zoom:
+            continue
+        projected = shapely.transform(geom, project)
+        simplified = projected.simplify(tolerance, preserve_topology=False)
+        if simplified.is_empty:
+            continue
+
+        minx, miny, maxx, maxy = simplified.bounds
+        for tx in range(int((minx - BUFFER) // EXTENT), int((maxx + BUFFER) // EXTENT) + 1):
+            for ty in range(int((miny - BUFFER) // EXTENT), int((maxy + BUFFER) // EXTENT) + 1):
+                ox, oy = tx * EXTENT, ty * EXTENT
+                clipped = shapely.clip_by_rect(simplified, ox - BUFFER, oy - BUFFER,
+                                               ox + EXTENT + BUFFER, oy + EXTENT + BUFFER)
+                lines = []
+                for part in shapely.get_parts(clipped):
+                    if part.geom_type != 'LineString':
+                        continue
+                    line = []
+                    for x, y in part.coords:
+                        point = (int(round(x - ox)), int(round(y - oy)))
+                        if not line or line[-1] != point:
+                            line.append(point)
+                    if len(line) >= 2:
+                        lines.append(line)
+                if lines:
+                    tiles[(tx, ty)].append((lines, properties))
+    return tiles
+
+
+class DirectoryTileStore:
+    """Tiles as <output>/<z>/<x>/<y>.pbf (uncompressed protobuf)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def put(self, z, x, y, data):
+        tile_path = self.path / str(z) / str(x) / f'{y}.pbf'
+        tile_path.parent.mkdir(parents=True, exist_ok=True)
+        tile_path.write_bytes(data)
+        return len(data)
+
+    def close(self, metadata):
+        with open(self.path / 'metadata.json', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+
+class MBTilesStore:
+    """Tiles in a single MBTiles (SQLite) archive, gzip-compressed, TMS row order"""
+
+    def __init__(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE metadata (name TEXT, value TEXT)')
+        self.db.execute('CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, '
+                        'tile_row INTEGER, tile_data BLOB)')
+        self.db.execute('CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)')
+
+    def put(self, z, x, y, data):
+        blob = gzip.compress(data, compresslevel=9)
+        self.db.execute('INSERT INTO tiles VALUES (?, ?, ?, ?)', (z, x, (1 << z) - 1 - y, blob))
+        return len(blob)
+
+    def close(self, metadata):
+        rows = [(key, value if isinstance(value, str) else json.dumps(value))
+                for key, value in metadata.items()]
+        self.db.executemany('INSERT INTO metadata VALUES (?, ?)', rows)
+        self.db.commit()
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a vector tile pyramid from regional roads')
+    parser.add_argument('--input-dir', default='roads_by_region',
+                        help='Directory with *_roads.geojson files (default: roads_by_region)')
+    parser.add_argument('--output', default='road_tiles',
+                        help='Tile directory, or a .mbtiles file for a single archive (default: road_tiles)')
+    parser.add_argument('--min-zoom', type=int, default=5)
+    parser.add_argument('--max-zoom', type=int, default=12)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  Regional Roads Vector Tile Builder")
+    print("=" * 70)
+
+    print(f"\n[1/2] Loading roads from {args.input_dir}/...")
+    roads = load_roads(args.input_dir)
+    print(f"✓ {len(roads):,} roads loaded")
+
+    if args.output.endswith('.mbtiles'):
+        store = MBTilesStore(args.output)
+    else:
+        store = DirectoryTileStore(args.output)
+
+    print(f"\n[2/2] Building tiles z{args.min_zoom}-z{args.max_zoom} -> {args.output}")
+    report = []
+    bounds = [180.0, 90.0, -180.0, -90.0]
+    for geom, _, _ in roads:
+        minx, miny, maxx, maxy = geom.bounds
+        bounds = [min(bounds[0], minx), min(bounds[1], miny), max(bounds[2], maxx), max(bounds[3], maxy)]
+
+    for zoom in range(args.min_zoom, args.max_zoom + 1):
+        start = time.perf_counter()
+        tiles = tile_zoom(roads, zoom)
+        sizes = []
+        features = 0
+        for (x, y), tile_features in sorted(tiles.items()):
+            sizes.append(store.put(zoom, x, y, encode_tile(tile_features)))
+            features += len(tile_features)
+        elapsed = time.perf_counter() - start
+        report.append((zoom, len(sizes), features, sum(sizes), max(sizes, default=0), elapsed))
+        print(f"  ✓ z{zoom}: {len(sizes):,} tiles ({sum(sizes) / 1024 / 1024:.2f} MB, {elapsed:.1f}s)")
+
+    store.close({
+        'name': 'Somalia OSM roads',
+        'format': 'pbf',
+        'minzoom': str(args.min_zoom),
+        'maxzoom': str(args.max_zoom),
+        'bounds': ','.join(f'{b:.6f}' for b in bounds),
+        'json': {'vector_layers': [{'id': LAYER_NAME, 'minzoom': args.min_zoom, 'maxzoom': args.max_zoom,
+                                    'fields': {'fclass': 'String', 'Length_m': 'Number',
+                                               'Source_Yea': 'String'}}]}
+    })
+
+    # Summary
+    print("\n" + "=" * 70)
+    print("  TILES COMPLETE")
+    print("=" * 70)
+    print(f"\n{'Zoom':<6} {'Tiles':>8} {'Features':>10} {'Total MB':>10} {'Max tile KB':>12} {'Avg tile KB':>12}")
+    print("-" * 62)
+    for zoom, count, features, total, largest, _ in report:
+        average = total / count if count else 0
+        print(f"z{zoom:<5} {count:>8,} {features:>10,} {total / 1024 / 1024:>10.2f} "
+              f"{largest / 1024:>12.1f} {average / 1024:>12.1f}")
+    total_tiles = sum(r[1] for r in report)
+    total_bytes = sum(r[3] for r in report)
+    print("-" * 62)
+    print(f"{'All':<6} {total_tiles:>8,} {'':>10} {total_bytes / 1024 / 1024:>10.2f}")
+    print(f"\n[OK] Tiles written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
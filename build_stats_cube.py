@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Per-region statistics cube for the iSEE analytics panel
+
+isee_analytics.js used to recompute its numbers in the browser every time a
+region was analysed: haversine lengths of every road segment, a full sort of
+every nightlight and population value. This computes them once at build time
+for each region x layer x year and writes stats_cube.js:
+
+    const statsCube = {"version": 1, "histogramBins": 30, "regions": {
+        "Bakool": {
+            "nightlight": {"2022": {count, min, max, mean, median, stdDev, q1, q3, histogram}, ...},
+            "population": {"all": {...}},
+            "roads": {"all": {count, totalLength, byClass, lengthByClass, bySourceYear,
+                              lengthBySourceYear, lengthStats}}}}};
+
+The statistics follow calculateStats() in isee_analytics.js (quartiles are
+the sorted value at floor(n * p), stdDev is the population deviation) and
+the histogram has the 30 equal-width bins the panel draws. Every value of
+every layer goes into one array with a region x layer x year group id, so
+all groups are sorted, reduced and binned together in a few NumPy calls.
+
+Inputs: *_nightlight_polygons_{year}.js (the layers the panel analyses),
+roads_by_region/*_roads.js and populationData in data.js; missing inputs are
+skipped. The cube records the SHA-256 of every input (sources), so
+stale_sources() can tell when it no longer describes them; build_data_bundles.py
+leaves a stale cube out and the panel scans the features instead.
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from build_manifest import sha256_file
+from datajs_parser import iter_assignments, read_variable
+from geojson_writer import COMPACT
+
+CUBE_FILE = 'stats_cube.js'
+CUBE_VARIABLE = 'statsCube'
+NIGHTLIGHT_PATTERN = '*_nightlight_polygons_*.js'
+ROADS_PATTERN = 'roads_by_region/*_roads.js'
+
+# Bin count of generateHistogramWithBellCurve() in isee_analytics.js
+HISTOGRAM_BINS = 30
+QUARTILES = {'q1': 0.25, 'median': 0.5, 'q3': 0.75}
+ALL_YEARS = 'all'
+EARTH_RADIUS_KM = 6371.0
+DECIMALS = 6
+
+
+def read_collections(path):
+    """Every object declared in a .js data file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return [a.value() for a in iter_assignments(content) if a.raw.startswith('{')]
+
+
+def group_stats(groups, values, n_groups, bins=HISTOGRAM_BINS):
+    """
+    calculateStats() plus a histogram for every group at once.
+    Returns a dict of arrays indexed by group id; empty groups have count 0.
+    """
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    first = np.where(present, starts, 0)
+    last = np.where(present, starts + counts - 1, 0)
+    safe_counts = np.maximum(counts, 1)
+
+    mean = np.bincount(groups, weights=values, minlength=n_groups) / safe_counts
+    deviation = values - mean[groups]
+    variance = np.bincount(groups, weights=deviation * deviation, minlength=n_groups) / safe_counts
+    stats = {
+        'count': counts,
+        'min': sorted_values[first] if len(values) else np.zeros(n_groups),
+        'max': sorted_values[last] if len(values) else np.zeros(n_groups),
+        'mean': mean,
+        'stdDev': np.sqrt(variance)
+    }
+    for name, p in QUARTILES.items():
+        index = np.where(present, starts + np.floor(counts * p).astype(np.int64), 0)
+        stats[name] = sorted_values[index] if len(values) else np.zeros(n_groups)
+
+    # Same binning as the panel: floor((v - min) / width), the maximum in the last bin
+    width = (stats['max'] - stats['min']) / bins
+    offset = values - stats['min'][groups]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bin_index = np.where(width[groups] > 0, np.floor(offset / width[groups]), 0)
+    bin_index = np.minimum(bin_index.astype(np.int64), bins - 1)
+    stats['histogram'] = np.bincount(groups * bins + bin_index, minlength=n_groups * bins).reshape(n_groups, bins)
+    return stats
+
+
+def line_lengths_km(geometries):
+    """Haversine length of each (Multi)LineString, all segments in one vectorized pass"""
+    coords, owners, parts = [], [], []
+    part_id = 0
+    for i, geometry in enumerate(geometries):
+        lines = geometry['coordinates'] if geometry['type'] == 'MultiLineString' else [geometry['coordinates']]
+        for line in lines:
+            coords.extend(position[:2] for position in line)
+            owners.extend([i] * len(line))
+            parts.extend([part_id] * len(line))
+            part_id += 1
+    if not coords:
+        return np.zeros(len(geometries))
+
+    lon, lat = np.radians(np.array(coords, dtype=float)).T
+    owners = np.array(owners)
+    # Segments join consecutive positions of the same line
+    same_line = np.diff(np.array(parts)) == 0
+    dlat = np.diff(lat)
+    dlon = np.diff(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    segments = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return np.bincount(owners[:-1][same_line], weights=segments[same_line], minlength=len(geometries))
+
+
+class CubeInput:
+    """Values gathered from every source, tagged with their region x layer x year group"""
+
+    def __init__(self):
+        self.keys = []
+        self._key_index = {}
+        self.groups = []
+        self.values = []
+
+    def group(self, region, layer, year):
+        key = (region, layer, str(year))
+        if key not in self._key_index:
+            self._key_index[key] = len(self.keys)
+            self.keys.append(key)
+        return self._key_index[key]
+
+    def add(self, region, layer, year, values):
+        values = np.asarray(values, dtype=float)
+        self.groups.append(np.full(len(values), self.group(region, layer, year), dtype=np.int64))
+        self.values.append(values)
+
+    def arrays(self):
+        if not self.values:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        return np.concatenate(self.groups), np.concatenate(self.values)
+
+
+def add_nightlight(cube_input, paths):
+    for path in paths:
+        for collection in read_collections(path):
+            metadata = collection.get('metadata', {})
+            features = collection.get('features', [])
+            region = metadata.get('region') or (features[0]['properties'].get('region') if features else None)
+            year = metadata.get('year') or (features[0]['properties'].get('year') if features else ALL_YEARS)
+            if not region:
+                print(f"  WARNING: {path} has no region, skipped")
+                continue
+            values = [f['properties']['value'] for f in features if f['properties'].get('value') is not None]
+            cube_input.add(region, 'nightlight', year, values)
+
+
+def add_population(cube_input, data_js):
+    if not os.path.exists(data_js):
+        return
+    collection = read_variable(data_js, 'populationData')
+    if collection is None:
+        return
+    by_region = {}
+    for feature in collection['features']:
+        props = feature['properties']
+        population = props.get('population') or 0
+        # extractPopulationStats() only counts populated cells
+        if population > 0 and props.get('region'):
+            by_region.setdefault(props['region'], []).append(population)
+    for region, values in by_region.items():
+        cube_input.add(region, 'population', ALL_YEARS, values)
+
+
+def read_roads(paths):
+    """(region, fclass, source year, length km) arrays over every road file"""
+    regions, classes, years, lengths = [], [], [], []
+    for path in paths:
+        for collection in read_collections(path):
+            features = collection.get('features', [])
+            region = collection.get('metadata', {}).get('region')
+            if not region:
+                region = os.path.basename(path)[:-len('_roads.js')].replace('_', ' ')
+            length = np.array([float(f['properties'].get('Length_m') or 0) / 1000 for f in features])
+            # Files without Length_m (the older HDX export) are measured from the geometry
+            missing = [i for i, f in enumerate(features)
+                       if f['properties'].get('Length_m') is None and f.get('geometry')]
+            if missing:
+                length[missing] = line_lengths_km([features[i]['geometry'] for i in missing])
+            regions.extend([region] * len(features))
+            classes.extend(f['properties'].get('fclass') or f['properties'].get('TYPE') or 'unknown'
+                           for f in features)
+            years.extend(str(f['properties'].get('Source_Yea') or 'Unknown') for f in features)
+            lengths.append(length)
+    return regions, classes, years, np.concatenate(lengths) if lengths else np.zeros(0)
+
+
+def _breakdown(region_codes, codes, labels, weights, n_regions):
+    """{region code: {label: total}} of weights summed per region x label"""
+    n_labels = len(labels)
+    totals = np.bincount(region_codes * n_labels + codes, weights=weights,
+                         minlength=n_regions * n_labels).reshape(n_regions, n_labels)
+    return [{labels[j]: totals[r, j] for j in np.flatnonzero(totals[r])} for r in range(n_regions)]
+
+
+def add_roads(cube_input, paths):
+    """Road segment lengths go into the cube input; returns the per-region class / year breakdowns"""
+    regions, classes, years, lengths = read_roads(paths)
+    if not regions:
+        return {}
+    region_names, region_codes = np.unique(regions, return_inverse=True)
+    class_names, class_codes = np.unique(classes, return_inverse=True)
+    year_names, year_codes = np.unique(years, return_inverse=True)
+    n = len(region_names)
+    ones = np.ones(len(lengths))
+    by_class = _breakdown(region_codes, class_codes, class_names, ones, n)
+    length_by_class = _breakdown(region_codes, class_codes, class_names, lengths, n)
+    by_year = _breakdown(region_codes, year_codes, year_names, ones, n)
+    length_by_year = _breakdown(region_codes, year_codes, year_names, lengths, n)
+
+    breakdowns = {}
+    for r, region in enumerate(region_names.tolist()):
+        cube_input.add(region, 'roads', ALL_YEARS, lengths[region_codes == r])
+        breakdowns[region] = {
+            'byClass': {k: int(v) for k, v in by_class[r].items()},
+            'lengthByClass': {k: round(float(v), 3) for k, v in length_by_class[r].items()},
+            'bySourceYear': {k: int(v) for k, v in by_year[r].items()},
+            'lengthBySourceYear': {k: round(float(v), 3) for k, v in length_by_year[r].items()}
+        }
+    return breakdowns
+
+
+def _stats_entry(stats, i):
+    entry = {'count': int(stats['count'][i])}
+    for name in ('min', 'max', 'mean', 'median', 'stdDev', 'q1', 'q3'):
+        entry[name] = round(float(stats[name][i]), DECIMALS)
+    entry['histogram'] = stats['histogram'][i].tolist()
+    return entry
+
+
+def build_cube(nightlight_paths, road_paths, data_js='data.js'):
+    cube_input = CubeInput()
+    add_nightlight(cube_input, nightlight_paths)
+    add_population(cube_input, data_js)
+    road_breakdowns = add_roads(cube_input, road_paths)
+
+    groups, values = cube_input.arrays()
+    stats = group_stats(groups, values, len(cube_input.keys))
+
+    regions = {}
+    for i, (region, layer, year) in enumerate(cube_input.keys):
+        if stats['count'][i] == 0:
+            continue
+        entry = _stats_entry(stats, i)
+        if layer == 'roads':
+            entry = {
+                'count': entry['count'],
+                'totalLength': round(float(values[groups == i].sum()), 3),
+                **road_breakdowns[region],
+                'lengthStats': entry
+            }
+        regions.setdefault(region, {}).setdefault(layer, {})[year] = entry
+
+    return {
+        # No build time: the bundle hash should only change with the statistics
+        'version': 1,
+        'histogramBins': HISTOGRAM_BINS,
+        'sources': {path: sha256_file(path) for path in sorted(
+            set(nightlight_paths) | set(road_paths) | ({data_js} if os.path.exists(data_js) else set()))},
+        'regions': regions
+    }
+
+
+def stale_sources(cube):
+    """Sources of cube that changed or disappeared since it was built"""
+    sources = cube.get('sources')
+    if not isinstance(sources, dict):
+        # Cubes from before the hashes were recorded cannot be checked
+        return ['(no source hashes)']
+    return [path for path, digest in sources.items()
+            if not os.path.exists(path) or sha256_file(path) != digest]
+
+
+def write_cube(cube, path=CUBE_FILE):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(f"const {CUBE_VARIABLE} = {json.dumps(cube, separators=COMPACT)};\n")
+    os.replace(path + '.tmp', path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute per-region statistics for the iSEE analytics panel')
+    parser.add_argument('--data-js', default='data.js', help='Source of populationData')
+    parser.add_argument('--nightlight', nargs='*', help=f'Nightlight polygon files (default: {NIGHTLIGHT_PATTERN})')
+    parser.add_argument('--roads', nargs='*', help=f'Road files (default: {ROADS_PATTERN})')
+    parser.add_argument('--output', default=CUBE_FILE)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  iSEE Statistics Cube")
+    print("=" * 60)
+
+    nightlight_paths = args.nightlight if args.nightlight is not None else sorted(glob.glob(NIGHTLIGHT_PATTERN))
+    road_paths = args.roads if args.roads is not None else sorted(glob.glob(ROADS_PATTERN))
+    print(f"\nSources: {len(nightlight_paths)} nightlight file(s), {len(road_paths)} road file(s), "
+          f"{args.data_js if os.path.exists(args.data_js) else 'no data.js'}")
+
+    start = time.perf_counter()
+    cube = build_cube(nightlight_paths, road_paths, args.data_js)
+    write_cube(cube, args.output)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'Region':<20} {'Layer':<12} {'Year':<6} {'Count':>9} {'Mean':>12}")
+    print("-" * 63)
+    for region, layers in sorted(cube['regions'].items()):
+        for layer, years in sorted(layers.items()):
+            for year, entry in sorted(years.items()):
+                mean = entry['lengthStats']['mean'] if layer == 'roads' else entry['mean']
+                print(f"{region:<20} {layer:<12} {year:<6} {entry['count']:>9,} {mean:>12.4f}")
+
+    print(f"\n✓ {args.output}: {os.path.getsize(args.output) / 1024:.1f} KB in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -13,9 +13,39 @@ Instead, using Bakool-adjusted thresholds based on local distribution:
 - 0.35 - 0.50: Rural Light (#a855f7 - purple)
 - 0.50 - 0.70: Bright Rural/Small Town (#fbbf24 - yellow)
 - > 0.70: Urban Center (#fde047 - bright yellow)
+
+--breaks natural derives the thresholds from each year's data instead:
+Fisher-Jenks natural breaks (natural_breaks.py) into a background class plus
+one class per category.
 """
+import argparse
+import bisect
 import json
 import math
+import os
+
+import numpy as np
+
+from geojson_writer import FeatureCollectionWriter, round_array
+from natural_breaks import class_minimums
+
+# Decimal places kept in polygon coordinates (~1m), as optimize_geojson.py uses
+POLYGON_PRECISION = 5
+
+# 500m in degrees latitude (constant); longitude is divided by cos(lat)
+CELL_SIZE_M = 500
+METERS_PER_DEGREE = 111320
+# Pixel size of the 500m sampling grid used by extract_viirs_bakool_full.py
+PIXEL_SIZE = CELL_SIZE_M / METERS_PER_DEGREE
+
+# Lower bound of each class; values below the first are background noise
+CATEGORY_BREAKS = [0.25, 0.35, 0.50, 0.70]
+CATEGORIES = [
+    {'category': 'Low Rural Light', 'color': '#5b21b6', 'label': 'Low Rural'},              # Dark purple
+    {'category': 'Rural Light', 'color': '#a855f7', 'label': 'Rural'},                      # Purple
+    {'category': 'Bright Rural / Small Town', 'color': '#fbbf24', 'label': 'Small Town'},  # Yellow
+    {'category': 'Urban Center', 'color': '#fde047', 'label': 'Urban'}                      # Bright yellow
+]
 
 def create_500m_polygon(lat, lon):
     """
@@ -27,11 +57,11 @@ def create_500m_polygon(lat, lon):
     # For Somalia (latitude ~4-5°), this is close enough
 
     # 500m in degrees latitude (constant)
-    lat_offset = 500 / 111320  # ~0.00449°
+    lat_offset = CELL_SIZE_M / METERS_PER_DEGREE  # ~0.00449°
 
     # 500m in degrees longitude (varies by latitude)
     # At latitude L: 1 degree longitude = 111,320 * cos(L) meters
-    lon_offset = 500 / (111320 * math.cos(math.radians(lat)))  # ~0.00449° at equator
+    lon_offset = CELL_SIZE_M / (METERS_PER_DEGREE * math.cos(math.radians(lat)))  # ~0.00449° at equator
 
     # Create polygon coordinates (counterclockwise from bottom-left)
     polygon = [
@@ -44,155 +74,182 @@ def create_500m_polygon(lat, lon):
 
     return polygon
 
-def classify_nightlight(value):
+def classify_nightlight(value, breaks=CATEGORY_BREAKS):
     """
     Classify nightlight value using Bakool-adjusted thresholds
     Bakool is extremely rural - max value is only 0.903 nW/cm²/sr
+    Returns None for background noise (< 0.25)
     """
-    if value < 0.25:
-        return None  # Remove background noise
-    elif value < 0.35:
-        return {
-            'category': 'Low Rural Light',
-            'color': '#5b21b6',  # Dark purple
-            'label': 'Low Rural'
-        }
-    elif value < 0.50:
-        return {
-            'category': 'Rural Light',
-            'color': '#a855f7',  # Purple
-            'label': 'Rural'
-        }
-    elif value < 0.70:
-        return {
-            'category': 'Bright Rural / Small Town',
-            'color': '#fbbf24',  # Yellow
-            'label': 'Small Town'
-        }
-    else:
-        return {
-            'category': 'Urban Center',
-            'color': '#fde047',  # Bright yellow
-            'label': 'Urban'
-        }
-
-# Process both years
-years = [2022, 2023]
-
-for year in years:
-    print(f"\n{'='*60}")
-    print(f"Processing Bakool {year} - Converting Points to Polygons")
-    print(f"{'='*60}")
+    index = bisect.bisect_right(breaks, value) - 1
+    return CATEGORIES[index] if index >= 0 else None
 
-    # Load the JavaScript file
-    js_file = f'bakool_nightlight_{year}.js'
+def classify_values(values, breaks=CATEGORY_BREAKS):
+    """Vectorized classify_nightlight: CATEGORIES index per value, -1 for background"""
+    return np.digitize(values, breaks) - 1
 
+def natural_category_breaks(values):
+    """
+    CATEGORY_BREAKS derived from the data: the lower bound of each category
+    when the values are split into natural breaks, the lowest class being
+    background. Falls back to CATEGORY_BREAKS with too few distinct values.
+    """
+    breaks = class_minimums(values, len(CATEGORIES) + 1)[1:]
+    return breaks if len(breaks) == len(CATEGORY_BREAKS) else CATEGORY_BREAKS
+
+def format_range(breaks, index):
+    """'0.25-0.35' style label of a category's value range; '>0.70' for the last"""
+    text = [f"{b:.2f}" if round(b, 2) == b else f"{b:.3f}" for b in breaks]
+    return f">{text[index]}" if index == len(breaks) - 1 else f"{text[index]}-{text[index + 1]}"
+
+def cell_bounds(lat, lon):
+    """Vectorized create_500m_polygon: (west, south, east, north) arrays"""
+    half_lat = CELL_SIZE_M / METERS_PER_DEGREE / 2
+    half_lon = CELL_SIZE_M / (METERS_PER_DEGREE * np.cos(np.radians(lat))) / 2
+    return lon - half_lon, lat - half_lat, lon + half_lon, lat + half_lat
+
+def load_points(js_file):
+    """Read the points list from a bakool_nightlight_{year}.js file"""
     with open(js_file, 'r') as f:
         content = f.read()
 
     # Extract JSON data (remove the "const bakoolNightlight{year} = " part)
     json_start = content.index('{')
-    json_data = json.loads(content[json_start:-1])  # -1 to remove trailing semicolon
-
-    points = json_data['points']
-    print(f"Original points: {len(points):,}")
+    return json.loads(content[json_start:-1])['points']  # -1 to remove trailing semicolon
 
-    # Convert to polygons with classification
-    features = []
-    removed_count = 0
-    category_counts = {
-        'Low Rural Light': 0,
-        'Rural Light': 0,
-        'Bright Rural / Small Town': 0,
-        'Urban Center': 0
-    }
+def _number_json(value):
+    """json.dumps() for a single number, without the encoder overhead"""
+    if type(value) is float and math.isfinite(value):
+        return float.__repr__(value)
+    return json.dumps(value)
 
-    for point in points:
-        value = point['value']
-        lat = point['lat']
-        lon = point['lon']
-
-        # Classify the point
-        classification = classify_nightlight(value)
-
-        if classification is None:
-            removed_count += 1
-            continue
-
-        # Create 500m × 500m polygon
-        polygon_coords = create_500m_polygon(lat, lon)
-
-        # Count by category
-        category_counts[classification['category']] += 1
-
-        # Create feature
-        feature = {
-            'type': 'Feature',
-            'geometry': {
-                'type': 'Polygon',
-                'coordinates': [polygon_coords]
-            },
-            'properties': {
-                'value': round(value, 3),
-                'category': classification['category'],
-                'color': classification['color'],
-                'label': classification['label'],
-                'lat': lat,
-                'lon': lon,
-                'year': year,
-                'region': 'Bakool',
-                'grid_size': '500m × 500m'
-            }
-        }
-
-        features.append(feature)
+def polygon_features(points, year, precision=POLYGON_PRECISION, breaks=CATEGORY_BREAKS):
+    """
+    Classify all points and build their cell polygons in bulk, yielding
+    (category index, minified Feature JSON) for every kept point. The text
+    is identical to FeatureCollectionWriter.add() on the per-point features.
+    """
+    values = [point['value'] for point in points]
+    lats = [point['lat'] for point in points]
+    lons = [point['lon'] for point in points]
+
+    classes = classify_values(np.array(values, dtype=float), breaks)
+    keep = np.flatnonzero(classes >= 0)
+    bounds = cell_bounds(np.array(lats, dtype=float)[keep], np.array(lons, dtype=float)[keep])
+    west, south, east, north = (list(map(_number_json, round_array(b, precision).tolist())) for b in bounds)
+
+    # Per-category and constant pieces of the properties object, serialized once
+    middle = [
+        ',"category":{},"color":{},"label":{},"lat":'.format(
+            json.dumps(c['category']), json.dumps(c['color']), json.dumps(c['label']))
+        for c in CATEGORIES
+    ]
+    suffix = ',"year":{},"region":"Bakool","grid_size":{}}}}}'.format(
+        json.dumps(year), json.dumps('500m × 500m'))
+
+    for k, (i, c) in enumerate(zip(keep.tolist(), classes[keep].tolist())):
+        w, s, e, n = west[k], south[k], east[k], north[k]
+        yield c, (
+            f'{{"type":"Feature","geometry":{{"type":"Polygon","coordinates":'
+            f'[[[{w},{s}],[{e},{s}],[{e},{n}],[{w},{n}],[{w},{s}]]]}},'
+            f'"properties":{{"value":{_number_json(round(values[i], 3))}{middle[c]}'
+            f'{_number_json(lats[i])},"lon":{_number_json(lons[i])}{suffix}'
+        )
+
+def cell_columns(points, year, precision=POLYGON_PRECISION, breaks=CATEGORY_BREAKS):
+    """
+    Columnar form of the kept cells: centroid, value and category index
+    arrays plus the category table. The 500m square is not stored; readers
+    rebuild it from the centroid (see nightlight_cells.py).
+    """
+    values = np.array([point['value'] for point in points], dtype=float)
+    classes = classify_values(values, breaks)
+    keep = np.flatnonzero(classes >= 0)
+    lats = np.array([point['lat'] for point in points], dtype=float)[keep]
+    lons = np.array([point['lon'] for point in points], dtype=float)[keep]
 
-    print(f"\nFiltering Results:")
-    print(f"  • Removed (< 0.25 nW/cm²/sr): {removed_count:,} points")
-    print(f"  • Kept: {len(features):,} polygons")
-    print(f"\nClassification Breakdown:")
-    print(f"  Low Rural Light (0.25-0.35): {category_counts['Low Rural Light']:,}")
-    print(f"  Rural Light (0.35-0.50): {category_counts['Rural Light']:,}")
-    print(f"  Bright Rural/Small Town (0.50-0.70): {category_counts['Bright Rural / Small Town']:,}")
-    print(f"  Urban Center (>0.70): {category_counts['Urban Center']:,}")
-
-    # Create GeoJSON
-    geojson_output = {
-        'type': 'FeatureCollection',
+    return {
         'metadata': {
             'year': year,
             'region': 'Bakool',
             'grid_size': '500m × 500m',
-            'classification': {
-                'low_rural': f'0.25-0.35 nW/cm²/sr ({category_counts["Low Rural Light"]:,} cells)',
-                'rural': f'0.35-0.50 nW/cm²/sr ({category_counts["Rural Light"]:,} cells)',
-                'small_town': f'0.50-0.70 nW/cm²/sr ({category_counts["Bright Rural / Small Town"]:,} cells)',
-                'urban': f'>0.70 nW/cm²/sr ({category_counts["Urban Center"]:,} cells)'
-            },
-            'total_polygons': len(features),
-            'removed_background': removed_count
+            'cell_size_m': CELL_SIZE_M,
+            'meters_per_degree': METERS_PER_DEGREE,
+            'count': len(keep),
+            'removed_background': len(points) - len(keep)
         },
-        'features': features
+        'categories': [dict(c, min=lower) for c, lower in zip(CATEGORIES, breaks)],
+        'lon': round_array(lons, precision).tolist(),
+        'lat': round_array(lats, precision).tolist(),
+        'value': round_array(values[keep], 3).tolist(),
+        'class': classes[keep].tolist()
     }
 
-    # Save GeoJSON
+def write_cells(year, points, breaks=CATEGORY_BREAKS):
+    """Write bakool_nightlight_cells_{year}.json / .js (columnar store)"""
+    cells = cell_columns(points, year, breaks=breaks)
+    text = json.dumps(cells, separators=(',', ':'))
+    json_file = f'bakool_nightlight_cells_{year}.json'
+    js_output_file = f'bakool_nightlight_cells_{year}.js'
+    for path, content in ((json_file, text), (js_output_file, f"const bakoolNightlightCells{year}={text};")):
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(path + '.tmp', path)
+
+    print(f"\nColumnar Store:")
+    print(f"  • Cells: {cells['metadata']['count']:,}")
+    print(f"  • JSON: {json_file} ({os.path.getsize(json_file) / (1024 * 1024):.2f} MB)")
+    print(f"  • JavaScript: {js_output_file} ({os.path.getsize(js_output_file) / (1024 * 1024):.2f} MB)")
+    polygon_js = f'bakool_nightlight_polygons_{year}.js'
+    if os.path.exists(polygon_js):
+        print(f"  • {os.path.getsize(polygon_js) / os.path.getsize(js_output_file):.1f}x smaller than {polygon_js}")
+
+def write_polygons(year, points, js_file, breaks=CATEGORY_BREAKS):
+    """Write bakool_nightlight_polygons_{year}.geojson / .js (one Feature per cell)"""
+    # Convert to polygons with classification, writing each feature once
+    # (minified) into both the GeoJSON and the JavaScript file
     geojson_file = f'bakool_nightlight_polygons_{year}.geojson'
-    with open(geojson_file, 'w') as f:
-        json.dump(geojson_output, f, indent=2)
+    js_output_file = f'bakool_nightlight_polygons_{year}.js'
+    writer = FeatureCollectionWriter(geojson_file, js_output_file, f'bakoolNightlightPolygons{year}',
+                                     js_declaration='const', precision=POLYGON_PRECISION)
 
-    print(f"\nSUCCESS: GeoJSON saved: {geojson_file}")
+    counts = [0] * len(CATEGORIES)
+    for category_index, feature_json in polygon_features(points, year, breaks=breaks):
+        counts[category_index] += 1
+        writer.add_json(feature_json)
 
-    # Create JavaScript file for dashboard
-    js_content = f"const bakoolNightlightPolygons{year} = {json.dumps(geojson_output, indent=2)};"
+    category_counts = {c['category']: count for c, count in zip(CATEGORIES, counts)}
+    removed_count = len(points) - writer.count
 
-    js_output_file = f'bakool_nightlight_polygons_{year}.js'
-    with open(js_output_file, 'w') as f:
-        f.write(js_content)
+    print(f"\nFiltering Results:")
+    ranges = [format_range(breaks, i) for i in range(len(breaks))]
+    print(f"  • Removed (< {ranges[0].split('-')[0]} nW/cm²/sr): {removed_count:,} points")
+    print(f"  • Kept: {writer.count:,} polygons")
+    print(f"\nClassification Breakdown:")
+    print(f"  Low Rural Light ({ranges[0]}): {category_counts['Low Rural Light']:,}")
+    print(f"  Rural Light ({ranges[1]}): {category_counts['Rural Light']:,}")
+    print(f"  Bright Rural/Small Town ({ranges[2]}): {category_counts['Bright Rural / Small Town']:,}")
+    print(f"  Urban Center ({ranges[3]}): {category_counts['Urban Center']:,}")
+
+    # Finish the collection; metadata follows the features array
+    writer.close({
+        'year': year,
+        'region': 'Bakool',
+        'grid_size': '500m × 500m',
+        'classification': {
+            'low_rural': f'{ranges[0]} nW/cm²/sr ({category_counts["Low Rural Light"]:,} cells)',
+            'rural': f'{ranges[1]} nW/cm²/sr ({category_counts["Rural Light"]:,} cells)',
+            'small_town': f'{ranges[2]} nW/cm²/sr ({category_counts["Bright Rural / Small Town"]:,} cells)',
+            'urban': f'{ranges[3]} nW/cm²/sr ({category_counts["Urban Center"]:,} cells)'
+        },
+        'total_polygons': writer.count,
+        'removed_background': removed_count
+    })
+    writer.commit()
 
+    print(f"\nSUCCESS: GeoJSON saved: {geojson_file}")
     print(f"SUCCESS: JavaScript file saved: {js_output_file}")
 
     # Show file sizes
-    import os
     geojson_size = os.path.getsize(geojson_file) / (1024 * 1024)
     js_size = os.path.getsize(js_output_file) / (1024 * 1024)
 
@@ -205,11 +262,89 @@ for year in years:
     print(f"  • GeoJSON: {geojson_size:.2f} MB")
     print(f"  • Size reduction: {reduction:.1f}%")
 
-print(f"\n{'='*60}")
-print("Conversion Complete!")
-print("="*60)
-print("\nNext Steps:")
-print("1. Update index.html to load the new polygon files")
-print("2. Update script.js to render polygons instead of points")
-print("3. Add category-based styling with the classification colors")
-print(f"{'='*60}\n")
+def cell_value_lookup(grid):
+    """
+    Per-cell values for popups on the dissolved layer: flat pixel index
+    (row * width + col) of every kept cell, ascending, with its value
+    """
+    classes = grid.classify().ravel()
+    index = np.flatnonzero(classes >= 0)
+    return {
+        'west': grid.west,
+        'north': grid.north,
+        'pixel_size': grid.pixel_size,
+        'width': grid.width,
+        'index': index.tolist(),
+        'value': round_array(np.asarray(grid.data, dtype=float).ravel()[index], 3).tolist()
+    }
+
+def write_dissolved(year, points, breaks=CATEGORY_BREAKS):
+    """
+    Write bakool_nightlight_dissolved_{year}.geojson / .js: the cells snapped
+    to their 500m grid and merged into one (Multi)Polygon per category, with
+    the per-cell values kept in metadata.lookup. The cells are the 500m
+    squares of write_polygons(), snapped to the grid.
+    """
+    # nightlight_grid imports this module, so it can only be imported here
+    from nightlight_grid import NightlightGrid, write_merged_polygons
+
+    grid = NightlightGrid.from_points(points, year)
+    grid.breaks = breaks
+    lookup = cell_value_lookup(grid)
+    geojson_file = f'bakool_nightlight_dissolved_{year}.geojson'
+    js_output_file = f'bakool_nightlight_dissolved_{year}.js'
+    count, parts = write_merged_polygons(grid, geojson_file, js_output_file, f'bakoolNightlightDissolved{year}',
+                                         {'grid_size': '500m × 500m', 'lookup': lookup}, square_cells=True)
+
+    print(f"\nDissolved Polygons:")
+    print(f"  • Before: {len(lookup['index']):,} cell polygons")
+    print(f"  • After: {count} features, {parts:,} polygons")
+    print(f"  • GeoJSON: {geojson_file}")
+    print(f"  • JavaScript: {js_output_file} ({os.path.getsize(js_output_file) / (1024 * 1024):.2f} MB)")
+
+def convert_year(year, output_formats=('polygons',), natural_breaks=False):
+    print(f"\n{'='*60}")
+    print(f"Processing Bakool {year} - Converting Points to Polygons")
+    print(f"{'='*60}")
+
+    js_file = f'bakool_nightlight_{year}.js'
+    points = load_points(js_file)
+    print(f"Original points: {len(points):,}")
+
+    breaks = CATEGORY_BREAKS
+    if natural_breaks:
+        breaks = natural_category_breaks(np.array([point['value'] for point in points], dtype=float))
+        print(f"Natural breaks (category lower bounds): {', '.join(f'{b:.3f}' for b in breaks)}")
+
+    if 'polygons' in output_formats:
+        write_polygons(year, points, js_file, breaks)
+    if 'columnar' in output_formats:
+        write_cells(year, points, breaks)
+    if 'dissolved' in output_formats:
+        write_dissolved(year, points, breaks)
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert Bakool nightlight points to 500m polygons')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023],
+                        help='Years to convert (reads bakool_nightlight_{year}.js)')
+    parser.add_argument('--format', nargs='+', choices=['polygons', 'columnar', 'dissolved'], default=['polygons'],
+                        help='polygons: GeoJSON cells; columnar: compact bakool_nightlight_cells_{year} store; '
+                             'dissolved: one merged polygon per category')
+    parser.add_argument('--breaks', choices=['fixed', 'natural'], default='fixed',
+                        help='fixed: the Bakool thresholds above; natural: Fisher-Jenks breaks of each year')
+    args = parser.parse_args()
+
+    for year in args.years:
+        convert_year(year, args.format, args.breaks == 'natural')
+
+    print(f"\n{'='*60}")
+    print("Conversion Complete!")
+    print("="*60)
+    print("\nNext Steps:")
+    print("1. Update index.html to load the new polygon files")
+    print("2. Update script.js to render polygons instead of points")
+    print("3. Add category-based styling with the classification colors")
+    print(f"{'='*60}\n")
+
+if __name__ == '__main__':
+    main()
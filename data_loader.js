@@ -0,0 +1,84 @@
+// Loader for the content-hashed data bundles written by build_data_bundles.py
+// index.html calls loadDashboard(version): the boundary bundles and the app scripts listed in
+// bundles/manifest.json are loaded first, every other dataset when script.js asks for it:
+//     loadDataset('populationData').then(() => L.geoJSON(populationData))
+// Without a manifest (bundles not built) the source files are loaded as before.
+
+const DATA_BUNDLE_DIR = 'bundles/';
+const DATA_SOURCE_SCRIPTS = [
+    'data.js', 'bakool_nightlight_polygons_2022.js', 'bakool_nightlight_polygons_2023.js', 'stats_cube.js',
+    'nightlight_cells.js', 'isee_analytics.js', 'script.js'
+];
+
+let dataManifest = null;
+const dataBundleRequests = {};
+
+function loadScript(src) {
+    return new Promise(function(resolve, reject) {
+        const script = document.createElement('script');
+        script.src = src;
+        // Dynamically inserted scripts run in insertion order only when async is off
+        script.async = false;
+        script.onload = resolve;
+        script.onerror = function() {
+            reject(new Error('Failed to load ' + src));
+        };
+        document.head.appendChild(script);
+    });
+}
+
+function loadDataset(name) {
+    if (!dataManifest) {
+        // Source files: data.js already declared everything
+        return Promise.resolve();
+    }
+    const entry = dataManifest.datasets[name];
+    if (!entry) {
+        return Promise.reject(new Error('Unknown dataset ' + name));
+    }
+    if (!dataBundleRequests[entry.file]) {
+        dataBundleRequests[entry.file] = loadScript(DATA_BUNDLE_DIR + entry.file);
+    }
+    return dataBundleRequests[entry.file];
+}
+
+// A dataset from a generated file that may not exist (e.g. bakool_nightlight_cells_2022.js):
+// its bundle when the manifest lists it, else the source file itself. Rejects when it is missing,
+// so callers can fall back to another dataset.
+function loadOptionalDataset(name, file) {
+    if (dataManifest) {
+        return loadDataset(name);
+    }
+    if (!dataBundleRequests[file]) {
+        dataBundleRequests[file] = loadScript(file);
+    }
+    return dataBundleRequests[file];
+}
+
+function loadDatasets(names) {
+    return Promise.all(names.map(loadDataset));
+}
+
+function loadDashboard(version) {
+    // The manifest is the only file that must be revalidated; a bundle never changes under its name
+    return fetch(DATA_BUNDLE_DIR + 'manifest.json', {cache: 'no-cache'})
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error('No data bundle manifest (' + response.status + ')');
+            }
+            return response.json();
+        })
+        .then(function(manifest) {
+            dataManifest = manifest;
+            const eager = manifest.eager.map(loadDataset);
+            const scripts = manifest.scripts.map(function(file) {
+                return loadScript(DATA_BUNDLE_DIR + file);
+            });
+            return Promise.all(eager.concat(scripts));
+        }, function(error) {
+            console.warn(error.message + ' - loading the source files');
+            return Promise.all(DATA_SOURCE_SCRIPTS.map(function(file) {
+                return loadScript(file + '?v=' + version);
+            }));
+        });
+}
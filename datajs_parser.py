@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Top-level variable scanner for data.js and the other dashboard .js data files
+
+Finds every top-level `const|var|let name = <value>;` and hands back where its
+value starts and ends, without parsing it. Object and array values are
+delimited by tracking bracket depth; brackets and semicolons inside string
+literals are skipped, so a `};` in a property value does not end the
+variable early. Parsing happens only when .value() is called.
+
+The scan works a string literal at a time: the text between two literals is
+handled with str.count, so coordinate arrays are never walked in Python.
+
+    for assignment in iter_assignments(content):
+        print(assignment.name, len(assignment.raw))
+    boundaries = find_assignment(content, 'adm1Boundaries').value()
+"""
+
+import argparse
+import json
+import os
+import re
+
+# A declaration, or a comment that may contain something that looks like one
+_TOP_LEVEL = re.compile(r'//[^\n]*|/\*.*?\*/|\b(const|var|let)\s+([A-Za-z_$][\w$]*)\s*=\s*', re.DOTALL)
+
+# Rest of a string literal after its opening quote, including the closing quote
+_STRING_TAIL = {
+    '"': re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL),
+    "'": re.compile(r"[^'\\]*(?:\\.[^'\\]*)*'", re.DOTALL),
+    '`': re.compile(r'[^`\\]*(?:\\.[^`\\]*)*`', re.DOTALL)
+}
+
+_CLOSING = {'{': '}', '[': ']'}
+_BRACKETS = {'{': re.compile(r'[{}]'), '[': re.compile(r'[\[\]]')}
+
+
+class Assignment:
+    """One top-level variable; raw is its value's source text"""
+
+    __slots__ = ('keyword', 'name', 'start', 'value_start', 'value_end', 'end', '_text', '_value')
+
+    def __init__(self, text, keyword, name, start, value_start, value_end, end):
+        self._text = text
+        self.keyword = keyword
+        self.name = name
+        self.start = start              # offset of the keyword
+        self.value_start = value_start
+        self.value_end = value_end
+        self.end = end                  # just past the trailing ';' (if any)
+        self._value = None
+
+    @property
+    def raw(self):
+        return self._text[self.value_start:self.value_end]
+
+    def value(self):
+        """The value parsed as JSON (cached); ValueError if it is not JSON"""
+        if self._value is None:
+            self._value = json.loads(self.raw)
+        return self._value
+
+    def __repr__(self):
+        return f"Assignment({self.keyword} {self.name}, {self.value_end - self.value_start:,} chars)"
+
+
+def _skip_string(text, pos):
+    """Offset just past the string literal whose opening quote is at pos"""
+    match = _STRING_TAIL[text[pos]].match(text, pos + 1)
+    if not match:
+        raise ValueError(f"Unterminated string literal at offset {pos}")
+    return match.end()
+
+
+def _bracket_end(text, start):
+    """Offset just past the object/array opened at start"""
+    opening = text[start]
+    closing = _CLOSING[opening]
+    brackets = _BRACKETS[opening]
+    length = len(text)
+    next_quote = {q: text.find(q, start) for q in _STRING_TAIL}
+    depth = 0
+    pos = start
+    while pos < length:
+        # Next string literal; everything before it is plain JSON punctuation
+        for q, found in next_quote.items():
+            if found != -1 and found < pos:
+                next_quote[q] = text.find(q, pos)
+        quote = min((found for found in next_quote.values() if found != -1), default=length)
+        closes = text.count(closing, pos, quote)
+        if closes >= depth:
+            # Depth may reach zero in this stretch: step through its brackets
+            for match in brackets.finditer(text, pos, quote):
+                depth += 1 if match.group() == opening else -1
+                if depth == 0:
+                    return match.end()
+        else:
+            depth += text.count(opening, pos, quote) - closes
+        if quote == length:
+            break
+        pos = _skip_string(text, quote)
+    raise ValueError(f"Unbalanced {opening!r} starting at offset {start}")
+
+
+def _value_end(text, start):
+    """Offset just past the value starting at start"""
+    ch = text[start:start + 1]
+    if ch in _CLOSING:
+        return _bracket_end(text, start)
+    if ch in _STRING_TAIL:
+        return _skip_string(text, start)
+    # Number, literal or expression: up to the end of the statement
+    end = len(text)
+    for stop in (text.find(';', start), text.find('\n', start)):
+        if stop != -1:
+            end = min(end, stop)
+    return end
+
+
+def iter_assignments(text):
+    """Yield an Assignment for every top-level declaration in text, in order"""
+    pos = 0
+    while True:
+        match = _TOP_LEVEL.search(text, pos)
+        if not match:
+            return
+        if match.group(1) is None:
+            pos = match.end()
+            continue
+        value_start = match.end()
+        value_end = _value_end(text, value_start)
+        end = value_end
+        while end < len(text) and text[end] in ' \t\r':
+            end += 1
+        if text[end:end + 1] == ';':
+            end += 1
+        else:
+            end = value_end
+        yield Assignment(text, match.group(1), match.group(2), match.start(), value_start, value_end, end)
+        pos = end
+
+
+def find_assignment(text, name):
+    """The Assignment declaring name, or None"""
+    for assignment in iter_assignments(text):
+        if assignment.name == name:
+            return assignment
+    return None
+
+
+def read_variable(path, name):
+    """Parse one variable from a .js data file, or None if it is not declared there"""
+    with open(path, 'r', encoding='utf-8') as f:
+        assignment = find_assignment(f.read(), name)
+    return None if assignment is None else assignment.value()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List the top-level variables in a .js data file')
+    parser.add_argument('path', nargs='?', default='data.js')
+    args = parser.parse_args()
+
+    with open(args.path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    print(f"{args.path}: {os.path.getsize(args.path) / 1024 / 1024:.2f} MB")
+    print(f"\n{'Variable':<32} {'Offset':>12} {'Size (KB)':>12}")
+    print("-" * 58)
+    for assignment in iter_assignments(content):
+        print(f"{assignment.keyword + ' ' + assignment.name:<32} {assignment.start:>12,} "
+              f"{(assignment.value_end - assignment.value_start) / 1024:>12,.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Export dashboard layers to a compact binary geometry format (.bin)
+
+Coordinates are quantized to integers at the layer's precision, delta-encoded
+against the previous vertex and zigzag/varint packed. Properties are stored
+as a table of distinct values plus one varint index per feature and key, so
+repeated strings (fclass, category, color, year...) are written once.
+binary_layers.js decodes the files back into GeoJSON in the browser.
+
+Layout (all integers are unsigned LEB128 varints unless noted):
+
+    b'SDGB' magic, 1 byte version
+    header length, header JSON (utf-8):
+        {"precision": 6, "count": N, "keys": [...], "values": [...],
+         "metadata": {...}}
+    per feature:
+        geometry type (1 Point, 2 LineString, 3 Polygon,
+                       4 MultiPoint, 5 MultiLineString, 6 MultiPolygon)
+        nested part/ring/vertex counts, each vertex as zigzag dx, dy
+        one index into "values" per key (0 = property missing)
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import time
+
+MAGIC = b'SDGB'
+FORMAT_VERSION = 1
+DEFAULT_PRECISION = 6
+
+GEOMETRY_TYPES = {
+    'Point': 1, 'LineString': 2, 'Polygon': 3,
+    'MultiPoint': 4, 'MultiLineString': 5, 'MultiPolygon': 6
+}
+GEOMETRY_NAMES = {code: name for name, code in GEOMETRY_TYPES.items()}
+
+# Nesting depth of the coordinate arrays below the vertex level
+GEOMETRY_DEPTH = {1: 0, 2: 1, 3: 2, 4: 1, 5: 2, 6: 3}
+
+# Layers exported when no files are given on the command line
+DEFAULT_LAYERS = [
+    'roads_by_region/*_roads.geojson',
+    'bakool_viirs_500m_*.geojson',
+    'bakool_nightlight_polygons_*.js',
+]
+
+
+def load_layer(path):
+    """Read a .geojson file or a `var name = {...};` JS wrapper"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.endswith('.js'):
+        content = content.split('=', 1)[1].strip().rstrip(';')
+    return json.loads(content)
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class _Encoder:
+    """Encodes features into one byte buffer, carrying the delta cursor across features"""
+
+    def __init__(self, precision):
+        self.scale = 10 ** precision
+        self.out = bytearray()
+        self.x = 0
+        self.y = 0
+
+    def vertices(self, coords):
+        out = self.out
+        scale = self.scale
+        _write_varint(out, len(coords))
+        for position in coords:
+            x = round(position[0] * scale)
+            y = round(position[1] * scale)
+            dx, dy = x - self.x, y - self.y
+            _write_varint(out, (dx << 1) ^ (dx >> 63))
+            _write_varint(out, (dy << 1) ^ (dy >> 63))
+            self.x, self.y = x, y
+
+    def nested(self, coords, depth):
+        if depth == 0:
+            self.vertices([coords])
+        elif depth == 1:
+            self.vertices(coords)
+        else:
+            _write_varint(self.out, len(coords))
+            for part in coords:
+                self.nested(part, depth - 1)
+
+
+def encode_layer(data, precision=DEFAULT_PRECISION):
+    """Encode a FeatureCollection dict, returning the .bin bytes"""
+    features = data['features']
+    keys = []
+    for feature in features:
+        for key in (feature.get('properties') or {}):
+            if key not in keys:
+                keys.append(key)
+
+    values = []
+    value_index = {}
+    encoder = _Encoder(precision)
+    for feature in features:
+        geometry = feature['geometry']
+        code = GEOMETRY_TYPES[geometry['type']]
+        _write_varint(encoder.out, code)
+        encoder.nested(geometry['coordinates'], GEOMETRY_DEPTH[code])
+
+        properties = feature.get('properties') or {}
+        for key in keys:
+            if key not in properties:
+                _write_varint(encoder.out, 0)
+                continue
+            # Key on the JSON text so 1, 1.0 and True stay distinct
+            token = json.dumps(properties[key], separators=(',', ':'))
+            index = value_index.get(token)
+            if index is None:
+                values.append(properties[key])
+                index = value_index[token] = len(values)
+            _write_varint(encoder.out, index)
+
+    header = json.dumps({
+        'precision': precision,
+        'count': len(features),
+        'keys': keys,
+        'values': values,
+        'metadata': data.get('metadata', {})
+    }, separators=(',', ':')).encode('utf-8')
+
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    _write_varint(out, len(header))
+    return bytes(out + header + encoder.out)
+
+
+def decode_layer(data):
+    """Decode .bin bytes back into a FeatureCollection dict"""
+    if data[:4] != MAGIC:
+        raise ValueError('Not a binary layer file (bad magic)')
+    if data[4] != FORMAT_VERSION:
+        raise ValueError(f'Unsupported binary layer version {data[4]}')
+    header_length, pos = _read_varint(data, 5)
+    header = json.loads(data[pos:pos + header_length].decode('utf-8'))
+    pos += header_length
+
+    scale = 10 ** header['precision']
+    keys = header['keys']
+    values = [None] + header['values']
+    cursor = [0, 0]
+
+    def vertices():
+        nonlocal pos
+        count, pos = _read_varint(data, pos)
+        coords = []
+        for _ in range(count):
+            zx, pos = _read_varint(data, pos)
+            zy, pos = _read_varint(data, pos)
+            cursor[0] += (zx >> 1) ^ -(zx & 1)
+            cursor[1] += (zy >> 1) ^ -(zy & 1)
+            coords.append([cursor[0] / scale, cursor[1] / scale])
+        return coords
+
+    def nested(depth):
+        nonlocal pos
+        if depth == 0:
+            return vertices()[0]
+        if depth == 1:
+            return vertices()
+        count, pos = _read_varint(data, pos)
+        return [nested(depth - 1) for _ in range(count)]
+
+    features = []
+    for _ in range(header['count']):
+        code, pos = _read_varint(data, pos)
+        geometry = {'type': GEOMETRY_NAMES[code], 'coordinates': nested(GEOMETRY_DEPTH[code])}
+        properties = {}
+        for key in keys:
+            index, pos = _read_varint(data, pos)
+            if index:
+                properties[key] = values[index]
+        features.append({'type': 'Feature', 'geometry': geometry, 'properties': properties})
+
+    collection = {'type': 'FeatureCollection', 'features': features}
+    if header['metadata']:
+        collection['metadata'] = header['metadata']
+    return collection
+
+
+def _quantize(coords, scale):
+    if isinstance(coords[0], (int, float)):
+        return [round(c * scale) for c in coords]
+    return [_quantize(c, scale) for c in coords]
+
+
+def verify_round_trip(original, decoded, precision):
+    """
+    Compare a decoded layer with its source. Coordinates must match after
+    quantizing both to the layer precision; properties must match exactly.
+    Returns a list of problems (empty when the round trip is lossless).
+    """
+    scale = 10 ** precision
+    problems = []
+    if len(original['features']) != len(decoded['features']):
+        return [f"feature count {len(decoded['features'])} != {len(original['features'])}"]
+    if original.get('metadata', {}) != decoded.get('metadata', {}):
+        problems.append('metadata differs')
+    for i, (a, b) in enumerate(zip(original['features'], decoded['features'])):
+        if a['geometry']['type'] != b['geometry']['type']:
+            problems.append(f"feature {i}: geometry type differs")
+        elif _quantize(a['geometry']['coordinates'], scale) != _quantize(b['geometry']['coordinates'], scale):
+            problems.append(f"feature {i}: coordinates differ")
+        if (a.get('properties') or {}) != b['properties']:
+            problems.append(f"feature {i}: properties differ")
+        if len(problems) >= 10:
+            break
+    return problems
+
+
+def export_file(path, output_dir, precision, verify):
+    """Export one layer and return its report row"""
+    data = load_layer(path)
+    with open(path, 'rb') as f:
+        source = f.read()
+
+    encoded = encode_layer(data, precision)
+    name = os.path.basename(path).rsplit('.', 1)[0] + '.bin'
+    out_path = os.path.join(output_dir or os.path.dirname(path), name)
+    with open(out_path, 'wb') as f:
+        f.write(encoded)
+
+    start = time.perf_counter()
+    json.loads(source.decode('utf-8').split('=', 1)[1].strip().rstrip(';') if path.endswith('.js') else source)
+    json_time = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = decode_layer(encoded)
+    bin_time = time.perf_counter() - start
+
+    problems = verify_round_trip(data, decoded, precision) if verify else []
+    return {
+        'path': out_path,
+        'features': len(data['features']),
+        'json': len(source),
+        'bin': len(encoded),
+        'json_gz': len(gzip.compress(source, 9)),
+        'bin_gz': len(gzip.compress(encoded, 9)),
+        'json_time': json_time,
+        'bin_time': bin_time,
+        'problems': problems
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export dashboard layers to compact binary geometry')
+    parser.add_argument('files', nargs='*', help='GeoJSON or JS layer files (default: roads, VIIRS and polygon layers)')
+    parser.add_argument('--output-dir', help='Write .bin files here instead of next to each input')
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION,
+                        help=f'Coordinate decimal places kept (default: {DEFAULT_PRECISION})')
+    parser.add_argument('--verify', action='store_true',
+                        help='Decode every file again and check it against the source')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("  Binary Layer Export")
+    print("=" * 70)
+
+    files = args.files or sorted(p for pattern in DEFAULT_LAYERS for p in glob.glob(pattern))
+    if not files:
+        print("\nERROR: No layer files found")
+        return
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"\n{'File':<34} {'Features':>9} {'JSON MB':>8} {'BIN MB':>7} {'Ratio':>6} {'gz JSON':>8} {'gz BIN':>7}")
+    print("-" * 84)
+    totals = {'json': 0, 'bin': 0, 'json_gz': 0, 'bin_gz': 0, 'json_time': 0, 'bin_time': 0}
+    failures = 0
+    for path in files:
+        row = export_file(path, args.output_dir, args.precision, args.verify)
+        for key in totals:
+            totals[key] += row[key]
+        mb = 1024 * 1024
+        print(f"{os.path.basename(row['path']):<34} {row['features']:>9,} {row['json'] / mb:>8.2f} "
+              f"{row['bin'] / mb:>7.2f} {row['json'] / row['bin']:>5.1f}x "
+              f"{row['json_gz'] / mb:>8.2f} {row['bin_gz'] / mb:>7.2f}")
+        for problem in row['problems']:
+            print(f"    ERROR: {problem}")
+        failures += bool(row['problems'])
+
+    print("-" * 84)
+    print(f"\nTotal JSON:         {totals['json'] / 1024 / 1024:.2f} MB ({totals['json_gz'] / 1024 / 1024:.2f} MB gzipped)")
+    print(f"Total binary:       {totals['bin'] / 1024 / 1024:.2f} MB ({totals['bin_gz'] / 1024 / 1024:.2f} MB gzipped)")
+    print(f"Size reduction:     {(1 - totals['bin'] / totals['json']) * 100:.1f}% "
+          f"({(1 - totals['bin_gz'] / totals['json_gz']) * 100:.1f}% gzipped)")
+    print(f"Parse time (Python): json.loads {totals['json_time']:.2f}s, decode_layer {totals['bin_time']:.2f}s")
+
+    if args.verify:
+        if failures:
+            print(f"\nERROR: {failures} file(s) did not round-trip")
+            raise SystemExit(1)
+        print(f"\n[OK] All {len(files)} files round-trip at {args.precision} decimal places")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,85 +1,109 @@
 """
 Extract VIIRS DNB data for complete Bakool region coverage
 Using proper admin boundaries and dense sampling
+
+Sampled points are fetched in parallel batches (batch_fetch.py). Every batch
+is checkpointed under viirs_checkpoints/, so an interrupted run picks up
+where it stopped when rerun.
 """
-import ee
+import argparse
 import json
+import os
 
-PROJECT_ID = 'somalia-dashboard'
-print(f"Initializing Earth Engine with project: {PROJECT_ID}")
-ee.Initialize(project=PROJECT_ID)
-
-# Try to get Bakool boundary from FAO GAUL dataset
-print("Loading Bakool administrative boundary from FAO GAUL...")
-
-# Option 1: Try FAO GAUL
-try:
-    bakool_boundary = ee.FeatureCollection('FAO/GAUL/2015/level1').filter(
-        ee.Filter.And(
-            ee.Filter.eq('ADM0_NAME', 'Somalia'),
-            ee.Filter.eq('ADM1_NAME', 'Bakool')
-        )
-    )
+import ee
+from shapely.geometry import mapping
+
+from batch_fetch import BatchFetcher, BatchFetchError, is_transient_ee_error
+from boundary_cache import BoundaryCache
 
-    # Check if we got a result
-    count = bakool_boundary.size().getInfo()
-    if count > 0:
-        print(f"Found Bakool in FAO GAUL dataset ({count} features)")
-        bakool_region = bakool_boundary.geometry()
-    else:
-        raise Exception("Bakool not found in FAO GAUL")
-except:
-    print("Bakool not found in FAO GAUL, trying alternative sources...")
-
-    # Option 2: Try to list available regions to find the correct name
+PROJECT_ID = 'somalia-dashboard'
+CHECKPOINT_DIR = 'viirs_checkpoints'
+
+# Sampling parameters; checkpoints are only reused when these match
+SAMPLE_SCALE = 500
+SAMPLE_PIXELS = 15000  # Increased from 4000 to 15000 for better coverage
+SAMPLE_SEED = 42  # For reproducibility
+
+def load_bakool_region(data_js='data.js'):
+    """
+    Bakool boundary from the local boundary cache (data.js adm1Boundaries),
+    else FAO GAUL with spelling variants and a manual fallback
+    """
+    if os.path.exists(data_js):
+        cache = BoundaryCache.open(data_js)
+        name = cache.resolve('Bakool')
+        if name:
+            print(f"Loaded {name} boundary from {data_js} (boundary cache)")
+            print(f"Bakool region area: {cache.area_km2(name):.2f} km²")
+            return ee.Geometry(mapping(cache.geometry(name)))
+
+    # Try to get Bakool boundary from FAO GAUL dataset
+    print("Loading Bakool administrative boundary from FAO GAUL...")
+
+    # Option 1: Try FAO GAUL
     try:
-        somalia_regions = ee.FeatureCollection('FAO/GAUL/2015/level1').filter(
-            ee.Filter.eq('ADM0_NAME', 'Somalia')
+        bakool_boundary = ee.FeatureCollection('FAO/GAUL/2015/level1').filter(
+            ee.Filter.And(
+                ee.Filter.eq('ADM0_NAME', 'Somalia'),
+                ee.Filter.eq('ADM1_NAME', 'Bakool')
+            )
         )
-        region_names = somalia_regions.aggregate_array('ADM1_NAME').getInfo()
-        print(f"Available regions in Somalia: {region_names}")
-
-        # Look for Bakool with different spellings
-        bakool_variants = ['Bakool', 'Bakol', 'Bakkol']
-        found = False
-        for variant in bakool_variants:
-            if variant in region_names:
-                print(f"Found region as: {variant}")
-                bakool_boundary = somalia_regions.filter(ee.Filter.eq('ADM1_NAME', variant))
-                bakool_region = bakool_boundary.geometry()
-                found = True
-                break
-
-        if not found:
-            raise Exception("Bakool not found with any variant")
+
+        # Check if we got a result
+        count = bakool_boundary.size().getInfo()
+        if count > 0:
+            print(f"Found Bakool in FAO GAUL dataset ({count} features)")
+            bakool_region = bakool_boundary.geometry()
+        else:
+            raise Exception("Bakool not found in FAO GAUL")
     except:
-        print("Using manual boundary definition...")
-        # Manual boundary based on approximate coordinates
-        # Expanded to cover more of Bakool region
-        bakool_coords = [
-            [43.0, 3.3],   # Southwest (extended)
-            [44.8, 3.3],   # Southeast (extended)
-            [44.8, 5.2],   # Northeast (extended)
-            [43.0, 5.2],   # Northwest (extended)
-            [43.0, 3.3]    # Close polygon
-        ]
-        bakool_region = ee.Geometry.Polygon([bakool_coords])
-        print("Using manual boundary for Bakool")
-
-# Calculate area
-area_km2 = bakool_region.area().divide(1000000).getInfo()
-print(f"Bakool region area: {area_km2:.2f} km²")
-
-# Load VIIRS DNB dataset
-viirs = ee.ImageCollection('NOAA/VIIRS/DNB/ANNUAL_V22')
-
-# Extract for both years
-years_to_extract = [2022, 2023]
-
-for year in years_to_extract:
-    print(f"\n{'='*60}")
-    print(f"Extracting VIIRS DNB data for Bakool - Year {year}")
-    print(f"{'='*60}")
+        print("Bakool not found in FAO GAUL, trying alternative sources...")
+
+        # Option 2: Try to list available regions to find the correct name
+        try:
+            somalia_regions = ee.FeatureCollection('FAO/GAUL/2015/level1').filter(
+                ee.Filter.eq('ADM0_NAME', 'Somalia')
+            )
+            region_names = somalia_regions.aggregate_array('ADM1_NAME').getInfo()
+            print(f"Available regions in Somalia: {region_names}")
+
+            # Look for Bakool with different spellings
+            bakool_variants = ['Bakool', 'Bakol', 'Bakkol']
+            found = False
+            for variant in bakool_variants:
+                if variant in region_names:
+                    print(f"Found region as: {variant}")
+                    bakool_boundary = somalia_regions.filter(ee.Filter.eq('ADM1_NAME', variant))
+                    bakool_region = bakool_boundary.geometry()
+                    found = True
+                    break
+
+            if not found:
+                raise Exception("Bakool not found with any variant")
+        except:
+            print("Using manual boundary definition...")
+            # Manual boundary based on approximate coordinates
+            # Expanded to cover more of Bakool region
+            bakool_coords = [
+                [43.0, 3.3],   # Southwest (extended)
+                [44.8, 3.3],   # Southeast (extended)
+                [44.8, 5.2],   # Northeast (extended)
+                [43.0, 5.2],   # Northwest (extended)
+                [43.0, 3.3]    # Close polygon
+            ]
+            bakool_region = ee.Geometry.Polygon([bakool_coords])
+            print("Using manual boundary for Bakool")
+
+    # Calculate area
+    area_km2 = bakool_region.area().divide(1000000).getInfo()
+    print(f"Bakool region area: {area_km2:.2f} km²")
+
+    return bakool_region
+
+def sample_year(bakool_region, year):
+    """Sampled VIIRS radiance points for one year, or None if the year has no data"""
+    # Load VIIRS DNB dataset
+    viirs = ee.ImageCollection('NOAA/VIIRS/DNB/ANNUAL_V22')
 
     # Filter to specific year
     filtered = viirs.filter(ee.Filter.calendarRange(year, year, 'year'))
@@ -87,8 +111,7 @@ for year in years_to_extract:
     # Check if we have data
     count = filtered.size().getInfo()
     if count == 0:
-        print(f"WARNING: No data available for {year}, skipping...")
-        continue
+        return None
 
     image = filtered.first()
     radiance = image.select('average').clip(bakool_region)
@@ -107,60 +130,44 @@ for year in years_to_extract:
     # Approximate cells = 43,000 / 0.25 = ~172,000 cells
     # We'll sample densely to get good coverage
 
-    sample_points = radiance.sample(
+    return radiance.sample(
         region=bakool_region,
-        scale=500,
-        numPixels=15000,  # Increased from 4000 to 15000 for better coverage
+        scale=SAMPLE_SCALE,
+        numPixels=SAMPLE_PIXELS,
         geometries=True,
-        seed=42  # For reproducibility
+        seed=SAMPLE_SEED
     )
 
-    print("Converting to GeoJSON...")
-
-    # Get all points (up to Earth Engine limit)
-    try:
-        # Try to get all points in batches
-        all_features = []
-        batch_size = 5000
-
-        # Get total count
-        total_count = sample_points.size().getInfo()
-        print(f"Total sampled points: {total_count}")
-
-        # If less than 5000, get all at once
-        if total_count <= 5000:
-            geojson_data = sample_points.getInfo()
-            all_features = geojson_data['features']
-        else:
-            # Get in batches
-            num_batches = (total_count // batch_size) + 1
-            for batch in range(num_batches):
-                start = batch * batch_size
-                print(f"  Fetching batch {batch+1}/{num_batches} (points {start} to {start+batch_size})...")
-                batch_data = sample_points.toList(batch_size, start).getInfo()
-
-                # Convert to features
-                for item in batch_data:
-                    if 'geometry' in item and 'properties' in item:
-                        all_features.append({
-                            'type': 'Feature',
-                            'geometry': item['geometry'],
-                            'properties': item['properties']
-                        })
-
-                if len(batch_data) < batch_size:
-                    break
-
-        geojson_data = {'features': all_features}
-
-    except Exception as e:
-        print(f"Error fetching all points: {e}")
-        print("Falling back to limited sample...")
-        geojson_data = sample_points.limit(5000).getInfo()
-
-    # Format for Leaflet
+def fetch_features(sample_points, year, workers=4, batch_size=5000, retries=5):
+    """
+    Fetch every sampled point in parallel, checkpointed batches. Raises
+    BatchFetchError if a batch keeps failing; rerunning resumes from the
+    checkpoints instead of starting over.
+    """
+    # Get total count
+    total_count = sample_points.size().getInfo()
+    print(f"Total sampled points: {total_count}")
+
+    fetcher = BatchFetcher(
+        lambda start, count: sample_points.toList(count, start).getInfo(),
+        os.path.join(CHECKPOINT_DIR, f'bakool_{year}'),
+        params={'year': year, 'scale': SAMPLE_SCALE, 'numPixels': SAMPLE_PIXELS, 'seed': SAMPLE_SEED},
+        workers=workers, retries=retries, is_transient=is_transient_ee_error)
+    items = fetcher.run(total_count, batch_size)
+    print(f"Fetched {fetcher.fetched} batches ({fetcher.resumed} from checkpoints, {fetcher.retried} retries)")
+
+    # Convert to features
+    features = [{
+        'type': 'Feature',
+        'geometry': item['geometry'],
+        'properties': item['properties']
+    } for item in items if 'geometry' in item and 'properties' in item]
+    return features, fetcher
+
+def format_features(raw_features, year):
+    """Format sampled features for Leaflet"""
     features = []
-    for feature in geojson_data['features']:
+    for feature in raw_features:
         coords = feature['geometry']['coordinates']
         value = feature['properties'].get('average', 0)
 
@@ -179,9 +186,9 @@ for year in years_to_extract:
                     'region': 'Bakool'
                 }
             })
+    return features
 
-    print(f"Total valid points: {len(features)}")
-
+def save_year(features, year):
     # Save GeoJSON
     geojson_output = {
         'type': 'FeatureCollection',
@@ -202,13 +209,53 @@ for year in years_to_extract:
         f.write(js_content)
 
     print(f"JavaScript file saved to {js_file}")
-    print(f"SUCCESS: Year {year} complete: {len(features)} points extracted")
-
-print(f"\n{'='*60}")
-print("Extraction complete!")
-print("Files created:")
-print("  - bakool_nightlight_2022.js")
-print("  - bakool_nightlight_2023.js")
-print("  - bakool_viirs_500m_2022_full.geojson")
-print("  - bakool_viirs_500m_2023_full.geojson")
-print(f"{'='*60}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract VIIRS DNB points for Bakool')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023])
+    parser.add_argument('--workers', type=int, default=4, help='Batch requests kept in flight (default: 4)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Points per request (default: 5000)')
+    parser.add_argument('--retries', type=int, default=5, help='Retries per batch on transient errors')
+    parser.add_argument('--data-js', default='data.js', help='Local ADM1 boundaries (default: data.js)')
+    args = parser.parse_args()
+
+    print(f"Initializing Earth Engine with project: {PROJECT_ID}")
+    ee.Initialize(project=PROJECT_ID)
+
+    bakool_region = load_bakool_region(args.data_js)
+
+    for year in args.years:
+        print(f"\n{'='*60}")
+        print(f"Extracting VIIRS DNB data for Bakool - Year {year}")
+        print(f"{'='*60}")
+
+        sample_points = sample_year(bakool_region, year)
+        if sample_points is None:
+            print(f"WARNING: No data available for {year}, skipping...")
+            continue
+
+        print("Converting to GeoJSON...")
+        try:
+            raw_features, fetcher = fetch_features(sample_points, year, args.workers, args.batch_size, args.retries)
+        except BatchFetchError as e:
+            print(f"ERROR: {e}")
+            print(f"Finished batches are saved in {CHECKPOINT_DIR}/; rerun to resume.")
+            raise SystemExit(1)
+
+        features = format_features(raw_features, year)
+        print(f"Total valid points: {len(features)}")
+        save_year(features, year)
+        fetcher.clear()
+        print(f"SUCCESS: Year {year} complete: {len(features)} points extracted")
+
+    print(f"\n{'='*60}")
+    print("Extraction complete!")
+    print("Files created:")
+    for year in args.years:
+        print(f"  - bakool_nightlight_{year}.js")
+    for year in args.years:
+        print(f"  - bakool_viirs_500m_{year}_full.geojson")
+    print(f"{'='*60}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Extract VIIRS DNB nightlight points for any set of ADM1 regions and years
+
+Generalizes extract_viirs_bakool_full.py: region boundaries come from the
+local boundary cache (boundary_cache.py, data.js adm1Boundaries); regions it
+lacks are resolved once through the backend and kept in viirs_boundaries.json.
+Every region x year job then runs
+concurrently on a thread pool. Outputs follow the Bakool naming, per region:
+
+    {region}_nightlight_{year}.js            const {region}Nightlight{year} = {"points": [...]}
+    {region}_viirs_500m_{year}_full.geojson
+
+so Bakool's files keep their current names. Sampling goes through a backend:
+
+    ee     Earth Engine (NOAA/VIIRS/DNB/ANNUAL_V22, FAO GAUL for missing boundaries)
+    local  NightlightGrid rasters (viirs_{year}.npy) in --raster-dir - runs offline
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping, shape
+
+from batch_fetch import BatchFetcher, is_transient_ee_error
+from boundary_cache import BoundaryCache, name_key
+from geojson_writer import COMPACT
+from region_names import data_file, region_slug, region_var
+
+PROJECT_ID = 'somalia-dashboard'
+BOUNDARY_CACHE = 'viirs_boundaries.json'
+CHECKPOINT_DIR = 'viirs_checkpoints'
+
+# Somalia's 18 ADM1 regions as named in the dashboard
+ADM1_REGIONS = [
+    'Awdal', 'Bakool', 'Banadir', 'Bari', 'Bay', 'Galgaduud', 'Gedo', 'Hiraan', 'Lower Juba',
+    'Lower Shabelle', 'Middle Juba', 'Middle Shabelle', 'Mudug', 'Nugaal', 'Sanaag', 'Sool',
+    'Togdheer', 'Woqooyi Galbeed'
+]
+
+
+def local_boundaries(data_js, regions):
+    """{region: GeoJSON geometry} for the regions found in the boundary cache of data_js"""
+    if not os.path.exists(data_js):
+        return {}
+    cache = BoundaryCache.open(data_js)
+    found = {}
+    for region in regions:
+        name = cache.resolve(region)
+        if name:
+            found[region] = mapping(cache.geometry(name))
+    return found
+
+
+class EarthEngineBackend:
+    """Samples the VIIRS annual composite through Earth Engine, batches fetched with BatchFetcher"""
+
+    name = 'ee'
+
+    def __init__(self, scale=500, num_pixels=15000, seed=42, fetch_workers=4, batch_size=5000):
+        import ee
+        self.ee = ee
+        self.scale = scale
+        self.num_pixels = num_pixels
+        self.seed = seed
+        self.fetch_workers = fetch_workers
+        self.batch_size = batch_size
+        print(f"Initializing Earth Engine with project: {PROJECT_ID}")
+        ee.Initialize(project=PROJECT_ID)
+
+    def boundaries(self, regions):
+        """All requested ADM1 geometries from FAO GAUL in one request"""
+        ee = self.ee
+        collection = ee.FeatureCollection('FAO/GAUL/2015/level1').filter(ee.Filter.eq('ADM0_NAME', 'Somalia'))
+        features = collection.select(['ADM1_NAME']).getInfo()['features']
+        by_name = {name_key(f['properties']['ADM1_NAME']): f['geometry'] for f in features}
+        return {region: by_name[name_key(region)] for region in regions if name_key(region) in by_name}
+
+    def sample(self, region, geometry, year):
+        ee = self.ee
+        filtered = ee.ImageCollection('NOAA/VIIRS/DNB/ANNUAL_V22').filter(ee.Filter.calendarRange(year, year, 'year'))
+        if filtered.size().getInfo() == 0:
+            return None
+        ee_geometry = ee.Geometry(geometry)
+        samples = filtered.first().select('average').clip(ee_geometry).sample(
+            region=ee_geometry, scale=self.scale, numPixels=self.num_pixels, geometries=True, seed=self.seed)
+        fetcher = BatchFetcher(
+            lambda start, count: samples.toList(count, start).getInfo(),
+            os.path.join(CHECKPOINT_DIR, f'{region_slug(region)}_{year}'),
+            params={'year': year, 'scale': self.scale, 'numPixels': self.num_pixels, 'seed': self.seed},
+            workers=self.fetch_workers, is_transient=is_transient_ee_error, log=lambda message: None)
+        items = fetcher.run(samples.size().getInfo(), self.batch_size)
+        fetcher.clear()
+        return items
+
+
+class LocalRasterBackend:
+    """
+    Samples every pixel centre inside the region from NightlightGrid files
+    ({raster_dir}/viirs_{year}.npy). latency adds a fixed delay per job to
+    stand in for remote compute when benchmarking the scheduler.
+    """
+
+    name = 'local'
+
+    def __init__(self, raster_dir, data_js='data.js', latency=0.0):
+        self.raster_dir = raster_dir
+        self.data_js = data_js
+        self.latency = latency
+        self._grids = {}
+        self._lock = threading.Lock()
+
+    def boundaries(self, regions):
+        return local_boundaries(self.data_js, regions)
+
+    def _grid(self, year):
+        from nightlight_grid import NightlightGrid
+        with self._lock:
+            if year not in self._grids:
+                path = os.path.join(self.raster_dir, f'viirs_{year}.npy')
+                self._grids[year] = NightlightGrid.load(path) if os.path.exists(path) else None
+            return self._grids[year]
+
+    def sample(self, region, geometry, year):
+        grid = self._grid(year)
+        if grid is None:
+            return None
+        time.sleep(self.latency)
+        polygon = shape(geometry)
+        minx, miny, maxx, maxy = polygon.bounds
+        size = grid.pixel_size
+        col0 = max(0, int((minx - grid.west) // size))
+        col1 = min(grid.width, int((maxx - grid.west) // size) + 1)
+        row0 = max(0, int((grid.north - maxy) // size))
+        row1 = min(grid.height, int((grid.north - miny) // size) + 1)
+        if col0 >= col1 or row0 >= row1:
+            return []
+
+        window = np.asarray(grid.data[row0:row1, col0:col1])
+        lons = grid.west + (np.arange(col0, col1) + 0.5) * size
+        lats = grid.north - (np.arange(row0, row1) + 0.5) * size
+        x, y = np.meshgrid(lons, lats)
+        shapely.prepare(polygon)
+        inside = shapely.contains_xy(polygon, x, y) & ~np.isnan(window)
+        return [{'geometry': {'type': 'Point', 'coordinates': [lon, lat]}, 'properties': {'average': value}}
+                for lon, lat, value in zip(x[inside].tolist(), y[inside].tolist(), window[inside].tolist())]
+
+
+def load_boundaries(backend, regions, data_js='data.js', cache_path=BOUNDARY_CACHE):
+    """
+    Region geometries from the local boundary cache; regions it lacks are
+    resolved through the backend once and kept in cache_path (per backend,
+    since ee and data.js outlines differ)
+    """
+    boundaries = local_boundaries(data_js, regions)
+    missing = [region for region in regions if region not in boundaries]
+    cached = {}
+    if missing:
+        cache = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        cached = cache.setdefault(backend.name, {})
+        lookup = [region for region in missing if region not in cached]
+        if lookup:
+            print(f"Resolving {len(lookup)} boundaries through the {backend.name} backend...")
+            resolved = backend.boundaries(lookup)
+            if resolved:
+                cached.update(resolved)
+                with open(cache_path + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(cache, f)
+                os.replace(cache_path + '.tmp', cache_path)
+        boundaries.update((region, cached[region]) for region in missing if region in cached)
+    print(f"✓ Boundaries: {len(boundaries)}/{len(regions)} regions "
+          f"({len(regions) - len(missing)} from {data_js}, {sum(r in cached for r in missing)} from {cache_path})")
+    return {region: boundaries[region] for region in regions if region in boundaries}
+
+
+def format_points(raw_features, region, year):
+    """Format sampled features for Leaflet (same layout as extract_viirs_bakool_full.py)"""
+    features = []
+    for feature in raw_features:
+        coords = feature['geometry']['coordinates']
+        value = feature['properties'].get('average', 0)
+        if value is not None and value >= 0:  # Include all values, even 0
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': coords},
+                'properties': {
+                    'value': round(value, 3),
+                    'lat': coords[1],
+                    'lon': coords[0],
+                    'year': year,
+                    'region': region
+                }
+            })
+    return features
+
+
+def save_outputs(features, region, year, output_dir='.'):
+    """
+    Write the GeoJSON and JS files minified: json's C encoder is only used
+    without indent, and pretty-printing would otherwise dominate each job
+    """
+    slug = region_slug(region)
+    geojson_file = os.path.join(output_dir, f'{slug}_viirs_500m_{year}_full.geojson')
+    with open(geojson_file, 'w') as f:
+        f.write(json.dumps({'type': 'FeatureCollection', 'features': features}, separators=COMPACT))
+
+    js_file = data_file(slug, year, output_dir)
+    with open(js_file, 'w') as f:
+        f.write(f"const {region_var(region)}Nightlight{year} = "
+                f"{json.dumps({'points': [f['properties'] for f in features]}, separators=COMPACT)};")
+    return js_file, geojson_file
+
+
+def run_job(backend, region, geometry, year, output_dir):
+    start = time.perf_counter()
+    raw_features = backend.sample(region, geometry, year)
+    if raw_features is None:
+        return region, year, None, time.perf_counter() - start
+    features = format_points(raw_features, region, year)
+    save_outputs(features, region, year, output_dir)
+    return region, year, len(features), time.perf_counter() - start
+
+
+def run_jobs(backend, boundaries, years, output_dir='.', workers=4, log=print):
+    """Run every region x year job on a thread pool; returns [(region, year, points, seconds)]"""
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, backend, region, geometry, year, output_dir)
+                   for region, geometry in boundaries.items() for year in years]
+        for future in as_completed(futures):
+            region, year, count, elapsed = future.result()
+            results.append((region, year, count, elapsed))
+            if count is None:
+                log(f"  WARNING: No data for {region} {year}, skipped")
+            else:
+                log(f"  ✓ {region} {year}: {count:,} points ({elapsed:.1f}s) [{len(results)}/{len(futures)}]")
+    return sorted(results, key=lambda r: (r[0], r[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract VIIRS nightlight points for ADM1 regions and years')
+    parser.add_argument('--regions', nargs='+', default=['Bakool'],
+                        help='ADM1 region names, or "all" for all 18 (default: Bakool)')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023])
+    parser.add_argument('--backend', choices=['ee', 'local'], default='ee')
+    parser.add_argument('--raster-dir', default='viirs_rasters', help='Rasters for --backend local')
+    parser.add_argument('--data-js', default='data.js', help='Local ADM1 boundaries (default: data.js)')
+    parser.add_argument('--workers', type=int, default=4, help='Region x year jobs run at once (default: 4)')
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+
+    regions = ADM1_REGIONS if args.regions == ['all'] else args.regions
+
+    print("=" * 60)
+    print("VIIRS Nightlight Extraction")
+    print("=" * 60)
+    print(f"Regions: {len(regions)}, years: {', '.join(map(str, args.years))}, "
+          f"backend: {args.backend}, workers: {args.workers}")
+
+    if args.backend == 'ee':
+        backend = EarthEngineBackend()
+    else:
+        backend = LocalRasterBackend(args.raster_dir, args.data_js)
+
+    boundaries = load_boundaries(backend, regions, args.data_js)
+    for region in regions:
+        if region not in boundaries:
+            print(f"WARNING: No boundary found for {region}, skipping")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = run_jobs(backend, boundaries, args.years, args.output_dir, args.workers)
+    wall_time = time.perf_counter() - start
+
+    job_time = sum(r[3] for r in results)
+    print(f"\n{'='*60}")
+    print("Extraction complete!")
+    print(f"  • Jobs: {len(results)} ({sum(1 for r in results if r[2] is not None)} with data)")
+    print(f"  • Points: {sum(r[2] or 0 for r in results):,}")
+    print(f"  • Wall time: {wall_time:.1f}s (sum of job times {job_time:.1f}s, "
+          f"{job_time / wall_time if wall_time else 0:.1f}x concurrency)")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Single-pass GeoJSON + JavaScript output for the dashboard data scripts
+
+Features are serialized once as minified JSON at the final coordinate
+precision and teed into both <name>.geojson and the <name>.js wrapper
+(`var name={...};`) as they are produced. The output is already what
+optimize_geojson.py / optimize_roads_js.py would write, so no separate
+optimize pass is needed.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+COMPACT = (',', ':')
+
+
+def round_array(values, precision):
+    """
+    np.round that matches Python's round() exactly: values whose scaled
+    fraction is too close to .5 for rint to be trusted are rounded by round()
+    """
+    rounded = np.round(values, precision)
+    scaled = values * 10.0 ** precision
+    near_half = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in near_half.tolist():
+        rounded[i] = round(float(values[i]), precision)
+    return rounded
+
+
+
+def round_coordinates(coords, precision):
+    """Recursively round all coordinates to specified decimal places"""
+    if isinstance(coords[0], (int, float)):
+        return [round(c, precision) for c in coords]
+    return [round_coordinates(c, precision) for c in coords]
+
+
+def compact_feature(feature, precision=None):
+    """Serialize a Feature as minified JSON, rounding its coordinates first"""
+    geometry = feature.get('geometry')
+    if precision is not None and geometry and geometry.get('coordinates'):
+        geometry['coordinates'] = round_coordinates(geometry['coordinates'], precision)
+    return json.dumps(feature, separators=COMPACT)
+
+
+class FeatureCollectionWriter:
+    """
+    Stream a FeatureCollection to a .geojson file and, optionally, a .js
+    file declaring it as a variable, serializing each feature only once.
+
+    Files are written under a temporary name; call commit() to move them into
+    place or discard() to drop them. The collection's metadata is only known
+    once every feature has been seen, so it is written after the features
+    array. A SHA-256 of the GeoJSON text is kept for incremental builds.
+
+        writer = FeatureCollectionWriter('x.geojson', 'x.js', 'xData', precision=6)
+        writer.add(feature)
+        writer.close({'total': 1})
+        writer.commit()
+    """
+
+    def __init__(self, geojson_path, js_path=None, js_var=None, js_declaration='var', precision=None):
+        self.geojson_path = geojson_path
+        self.js_path = js_path
+        self.precision = precision
+        self.count = 0
+        self.sha256 = None
+        self._hash = hashlib.sha256()
+        self._files = [open(geojson_path + '.tmp', 'w', encoding='utf-8')]
+        if js_path:
+            self._files.append(open(js_path + '.tmp', 'w', encoding='utf-8'))
+            self._files[1].write(f"{js_declaration} {js_var}=")
+        self._write('{"type":"FeatureCollection","features":[')
+
+    def _write(self, text):
+        self._hash.update(text.encode('utf-8'))
+        for f in self._files:
+            f.write(text)
+
+    def add(self, feature):
+        """Add a Feature dict (its coordinates are rounded in place)"""
+        self.add_json(compact_feature(feature, self.precision))
+
+    def add_json(self, text):
+        """Add a Feature already serialized with compact_feature()"""
+        self._write(',' + text if self.count else text)
+        self.count += 1
+
+    def close(self, metadata=None):
+        """Finish the collection and return the SHA-256 of the GeoJSON text"""
+        tail = ']'
+        if metadata is not None:
+            tail += ',"metadata":' + json.dumps(metadata, separators=COMPACT)
+        self._write(tail + '}')
+        if self.js_path:
+            self._files[1].write(';')
+        for f in self._files:
+            f.close()
+        self.sha256 = self._hash.hexdigest()
+        return self.sha256
+
+    def _paths(self):
+        return [self.geojson_path, self.js_path] if self.js_path else [self.geojson_path]
+
+    def commit(self):
+        for path in self._paths():
+            os.replace(path + '.tmp', path)
+
+    def discard(self):
+        for f in self._files:
+            f.close()
+        for path in self._paths():
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
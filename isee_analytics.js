@@ -123,10 +123,11 @@ function configureDatasets(layers, targetRegion) {
                 resolution: '500m × 500m grid',
                 dataSource: 'VIIRS DNB Nighttime Lights',
                 year: layer.data.metadata?.year,
-                totalPolygons: layer.data.metadata?.total_polygons || layer.data.features?.length,
+                totalPolygons: layer.data.metadata?.total_polygons || layer.data.metadata?.lookup?.index.length
+                    || layer.data.features?.length,
                 classification: layer.data.metadata?.classification,
                 unit: 'nW/cm²/sr',
-                values: extractNightlightStats(layer.data)
+                values: extractNightlightStats(layer.data, layer.region, layer.data.metadata?.year)
             };
         } else if (layer.type === 'population') {
             config.metadata = {
@@ -134,7 +135,7 @@ function configureDatasets(layers, targetRegion) {
                 dataSource: 'Meta/CIESIN High Resolution Population Density Maps',
                 totalCells: layer.data.features?.length,
                 unit: 'persons per cell',
-                values: extractPopulationStats(layer.data)
+                values: extractPopulationStats(layer.data, layer.region)
             };
         } else if (layer.type === 'socioeconomic') {
             config.metadata = {
@@ -184,13 +185,14 @@ function configureDatasets(layers, targetRegion) {
                 };
             } else {
                 // Use legacy roads extraction
+                const legacyStats = extractRoadsStats(layer.data, layer.region);
                 config.metadata = {
                     dataSource: 'Humanitarian Data Exchange - Somalia Roads (2021)',
                     sourceUrl: 'https://data.humdata.org/dataset/somalia-roads',
                     region: layer.region,
-                    totalRoads: extractRoadsStats(layer.data, layer.region).count,
+                    totalRoads: legacyStats.count,
                     unit: 'road segments',
-                    values: extractRoadsStats(layer.data, layer.region),
+                    values: legacyStats,
                     format: 'Legacy'
                 };
             }
@@ -200,9 +202,32 @@ function configureDatasets(layers, targetRegion) {
     });
 }
 
+// Precomputed statistics for region x layer x year from stats_cube.js (build_stats_cube.py),
+// or null when the cube is not loaded or has no entry and the features must be scanned.
+// An entry counting a different number of values than the loaded data was built from
+// other sources and is ignored as stale (build_data_bundles.py also leaves out a cube
+// whose source hashes no longer match).
+function cubeStats(region, layer, year, count) {
+    if (typeof statsCube === 'undefined' || !region) return null;
+    const layers = statsCube.regions[region];
+    const years = layers && layers[layer];
+    const entry = years && years[year == null ? 'all' : String(year)];
+    if (!entry) return null;
+    if (count != null && entry.count !== count) {
+        console.warn(`Statistics cube is stale for ${region} ${layer} (${entry.count} values, data has ${count})`);
+        return null;
+    }
+    return Object.assign({}, entry);
+}
+
 // Extract nightlight statistics
-function extractNightlightStats(data) {
-    const values = data.features.map(f => f.properties.value).filter(v => v != null);
+function extractNightlightStats(data, region, year) {
+    // A dissolved layer has one feature per category; its cell values are in metadata.lookup
+    const lookup = data.metadata && data.metadata.lookup;
+    const values = (lookup ? lookup.value : data.features.map(f => f.properties.value)).filter(v => v != null);
+    const cached = cubeStats(region, 'nightlight', year, values.length);
+    if (cached) return cached;
+
     const stats = calculateStats(values);
     if (stats) {
         stats.rawValues = values; // Store raw values for histogram
@@ -211,8 +236,15 @@ function extractNightlightStats(data) {
 }
 
 // Extract population statistics
-function extractPopulationStats(data) {
-    const values = data.features.map(f => f.properties.population || 0).filter(v => v > 0);
+function extractPopulationStats(data, region) {
+    // Populated cells of the region, as build_stats_cube.py groups them
+    const values = data.features
+        .filter(f => !region || f.properties.region === region)
+        .map(f => f.properties.population || 0)
+        .filter(v => v > 0);
+    const cached = cubeStats(region, 'population', null, values.length);
+    if (cached) return cached;
+
     const stats = calculateStats(values);
     if (stats) {
         stats.rawValues = values; // Store raw values for histogram
@@ -252,8 +284,6 @@ function calculateDistanceV2(coord1, coord2) {
     const lon2 = coord2[0];
     const lat2 = coord2[1];
 
-    console.log('🛣️ DEBUG coords:', { coord1, coord2, lon1, lat1, lon2, lat2 });
-
     if (isNaN(lon1) || isNaN(lat1) || isNaN(lon2) || isNaN(lat2)) {
         console.error('🛣️ NaN in coordinates:', { lon1, lat1, lon2, lat2 });
         return 0;
@@ -265,19 +295,13 @@ function calculateDistanceV2(coord1, coord2) {
     const deltaLat = (lat2 - lat1) * Math.PI / 180;
     const deltaLon = (lon2 - lon1) * Math.PI / 180;
 
-    console.log('🛣️ DEBUG trig values:', { lat1Rad, lat2Rad, deltaLat, deltaLon });
-
     const a = Math.sin(deltaLat / 2) * Math.sin(deltaLat / 2) +
               Math.cos(lat1Rad) * Math.cos(lat2Rad) *
               Math.sin(deltaLon / 2) * Math.sin(deltaLon / 2);
     const c = 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
 
-    console.log('🛣️ DEBUG haversine:', { a, c, sqrtA: Math.sqrt(a), sqrt1minusA: Math.sqrt(1 - a) });
-
     const distance = R * c;
 
-    console.log('🛣️ DEBUG final distance:', distance);
-
     if (isNaN(distance)) {
         console.error('🛣️ NaN distance result:', { coord1, coord2, a, c });
         return 0;
@@ -288,20 +312,25 @@ function calculateDistanceV2(coord1, coord2) {
 
 // Calculate length of a LineString in km
 function calculateLineStringLength(coordinates) {
-    console.log('🛣️ calculateLineStringLength called with', coordinates.length, 'coordinates');
-    console.log('🛣️ First coordinate:', coordinates[0]);
-    console.log('🛣️ Second coordinate:', coordinates[1]);
-
     let totalLength = 0;
     for (let i = 0; i < coordinates.length - 1; i++) {
-        const dist = calculateDistanceV2(coordinates[i], coordinates[i + 1]);
-        console.log(`🛣️ Distance ${i}: ${dist} km`);
-        totalLength += dist;
+        totalLength += calculateDistanceV2(coordinates[i], coordinates[i + 1]);
     }
-    console.log('🛣️ Total length for LineString:', totalLength);
     return totalLength;
 }
 
+// Length of a road in km: its Length_m, else measured from the geometry (as build_stats_cube.py does)
+function roadLengthKm(road) {
+    if (road.properties.Length_m != null) {
+        return (parseFloat(road.properties.Length_m) || 0) / 1000;
+    }
+    if (!road.geometry || !road.geometry.coordinates) return 0;
+    if (road.geometry.type === 'MultiLineString') {
+        return road.geometry.coordinates.reduce((sum, line) => sum + calculateLineStringLength(line), 0);
+    }
+    return calculateLineStringLength(road.geometry.coordinates);
+}
+
 // Extract roads infrastructure statistics
 function extractRoadsStats(data, region) {
     console.log('🛣️ extractRoadsStats called for region:', region);
@@ -390,17 +419,27 @@ function extractOSMRoadsStats(data, region) {
     const regionRoads = data.features || [];
 
     // Count roads and calculate statistics by road class (fclass)
-    const roadsByClass = {};
-    const lengthByClass = {}; // Length in km by road class
-    const roadsBySourceYear = {};
+    let roadsByClass = {};
+    let lengthByClass = {}; // Length in km by road class
+    let roadsBySourceYear = {};
     let totalLength = 0;
     let totalRoads = 0;
+    let lengthStats = null;
     const allLengths = [];
 
-    regionRoads.forEach((road, index) => {
-        const fclass = road.properties.fclass || 'unknown';
-        const lengthMeters = parseFloat(road.properties.Length_m) || 0;
-        const lengthKm = lengthMeters / 1000;
+    const cached = cubeStats(region, 'roads', null, regionRoads.length);
+    if (cached) {
+        roadsByClass = cached.byClass;
+        lengthByClass = cached.lengthByClass;
+        roadsBySourceYear = cached.bySourceYear;
+        totalLength = cached.totalLength;
+        totalRoads = cached.count;
+        lengthStats = cached.lengthStats;
+    }
+
+    (cached ? [] : regionRoads).forEach((road, index) => {
+        const fclass = road.properties.fclass || road.properties.TYPE || 'unknown';
+        const lengthKm = roadLengthKm(road);
         const sourceYear = road.properties.Source_Yea || 'Unknown';
 
         // Count by road class
@@ -420,7 +459,9 @@ function extractOSMRoadsStats(data, region) {
     });
 
     // Calculate road statistics
-    const lengthStats = calculateStats(allLengths);
+    if (!cached) {
+        lengthStats = calculateStats(allLengths);
+    }
 
     // Calculate road density categories
     const roadClassHierarchy = {
@@ -1263,8 +1304,8 @@ function generateLayerCard(analysis) {
                 </div>
             `;
 
-            // Generate histogram if raw values are available
-            if (stats.rawValues && stats.rawValues.length > 0) {
+            // Generate histogram if raw values or precomputed bins are available
+            if ((stats.rawValues && stats.rawValues.length > 0) || stats.histogram) {
                 histogramHTML = `
                     <div style="margin-top: 15px; background: rgba(15, 23, 42, 0.6); padding: 15px; border-radius: 8px;">
                         <h5 style="color: #0ea5e9; margin: 0 0 12px 0; font-size: 0.95em; text-align: center;">Distribution Analysis</h5>
@@ -1486,7 +1527,6 @@ function generateTimeSeriesChart(yearlyData) {
 
 // Generate histogram with bell curve (normal distribution overlay)
 function generateHistogramWithBellCurve(stats, layerName) {
-    const values = stats.rawValues;
     const mean = stats.mean;
     const median = stats.median;
     const stdDev = stats.stdDev;
@@ -1500,16 +1540,19 @@ function generateHistogramWithBellCurve(stats, layerName) {
     const chartWidth = width - padding.left - padding.right;
     const chartHeight = height - padding.top - padding.bottom;
 
-    // Create histogram bins (30 bins)
+    // Create histogram bins (30 bins); the statistics cube ships them precomputed
     const binCount = 30;
     const binWidth = (max - min) / binCount;
-    const bins = new Array(binCount).fill(0);
-
-    // Fill bins with frequency counts
-    values.forEach(value => {
-        const binIndex = Math.min(Math.floor((value - min) / binWidth), binCount - 1);
-        bins[binIndex]++;
-    });
+    let bins = stats.histogram;
+
+    if (!bins) {
+        // Fill bins with frequency counts
+        bins = new Array(binCount).fill(0);
+        stats.rawValues.forEach(value => {
+            const binIndex = Math.min(Math.floor((value - min) / binWidth), binCount - 1);
+            bins[binIndex]++;
+        });
+    }
 
     // Find max frequency for scaling
     const maxFreq = Math.max(...bins);
@@ -1542,7 +1585,7 @@ function generateHistogramWithBellCurve(stats, layerName) {
         const normalDensity = (1 / (stdDev * Math.sqrt(2 * Math.PI))) * Math.exp(exponent);
 
         // Scale to match histogram frequency (approximate)
-        const scaledDensity = normalDensity * values.length * binWidth;
+        const scaledDensity = normalDensity * stats.count * binWidth;
 
         bellCurvePoints.push({
             x: scaleX(x),
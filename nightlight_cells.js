@@ -0,0 +1,58 @@
+// Loader for the columnar nightlight cell store (bakool_nightlight_cells_{year}.js)
+// written by convert_points_to_polygons.py --format columnar.
+// Cells are expanded into 500m square features only when a layer needs them:
+//     L.geoJSON(expandNightlightCells(bakoolNightlightCells2022, map.getBounds()), {...})
+
+function expandNightlightCells(cells, bounds) {
+    const meta = cells.metadata;
+    const halfLat = meta.cell_size_m / meta.meters_per_degree / 2;
+    let minX = -Infinity, minY = -Infinity, maxX = Infinity, maxY = Infinity;
+    if (bounds && typeof bounds.getWest === 'function') {
+        minX = bounds.getWest(); minY = bounds.getSouth(); maxX = bounds.getEast(); maxY = bounds.getNorth();
+    } else if (bounds) {
+        [minX, minY, maxX, maxY] = bounds;
+    }
+
+    const features = [];
+    for (let i = 0; i < cells.lon.length; i++) {
+        const lon = cells.lon[i];
+        const lat = cells.lat[i];
+        if (lon < minX || lon > maxX || lat < minY || lat > maxY) continue;
+
+        const halfLon = meta.cell_size_m / (meta.meters_per_degree * Math.cos(lat * Math.PI / 180)) / 2;
+        const w = lon - halfLon, e = lon + halfLon, s = lat - halfLat, n = lat + halfLat;
+        const category = cells.categories[cells.class[i]];
+        features.push({
+            type: 'Feature',
+            geometry: { type: 'Polygon', coordinates: [[[w, s], [e, s], [e, n], [w, n], [w, s]]] },
+            properties: {
+                value: cells.value[i],
+                category: category.category,
+                color: category.color,
+                label: category.label,
+                lat: lat,
+                lon: lon,
+                year: meta.year,
+                region: meta.region,
+                grid_size: meta.grid_size
+            }
+        });
+    }
+    return { type: 'FeatureCollection', metadata: meta, features: features };
+}
+
+// Per-cell value under a point of the dissolved layer (bakool_nightlight_dissolved_{year}.js),
+// for popups: metadata.lookup holds the flat grid index of every cell, ascending
+function nightlightValueAt(lookup, lat, lng) {
+    const col = Math.floor((lng - lookup.west) / lookup.pixel_size);
+    const row = Math.floor((lookup.north - lat) / lookup.pixel_size);
+    if (col < 0 || col >= lookup.width || row < 0) return null;
+    const target = row * lookup.width + col;
+    let lo = 0, hi = lookup.index.length - 1;
+    while (lo <= hi) {
+        const mid = (lo + hi) >> 1;
+        if (lookup.index[mid] === target) return lookup.value[mid];
+        if (lookup.index[mid] < target) lo = mid + 1; else hi = mid - 1;
+    }
+    return null;
+}
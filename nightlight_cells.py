@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Reader for the columnar nightlight cell store written by
+convert_points_to_polygons.py --format columnar
+
+bakool_nightlight_cells_{year}.json holds one array per column instead of one
+Feature per cell:
+
+    {"metadata": {"year": ..., "count": N, "cell_size_m": 500, ...},
+     "categories": [{"category", "color", "label", "min"}, ...],
+     "lon": [...], "lat": [...], "value": [...], "class": [...]}
+
+"class" indexes "categories". The 500m squares are rebuilt from the centroids
+only when features are needed (cell_features); nightlight_cells.js does the
+same in the dashboard.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from convert_points_to_polygons import POLYGON_PRECISION, cell_bounds
+from geojson_writer import FeatureCollectionWriter, round_array
+
+
+def read_cells(path):
+    """Load a cell store (.json or the .js wrapper) with the columns as NumPy arrays"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.endswith('.js'):
+        content = content.split('=', 1)[1].strip().rstrip(';')
+    cells = json.loads(content)
+    for column in ('lon', 'lat', 'value'):
+        cells[column] = np.array(cells[column], dtype=float)
+    cells['class'] = np.array(cells['class'], dtype=np.int8)
+    return cells
+
+
+def select(cells, bbox=None):
+    """Indices of the cells whose centroid lies in bbox (minx, miny, maxx, maxy); all if None"""
+    if bbox is None:
+        return np.arange(len(cells['lon']))
+    minx, miny, maxx, maxy = bbox
+    lon, lat = cells['lon'], cells['lat']
+    return np.flatnonzero((lon >= minx) & (lon <= maxx) & (lat >= miny) & (lat <= maxy))
+
+
+def cell_features(cells, bbox=None, precision=POLYGON_PRECISION):
+    """
+    Expand cells into the same Features convert_points_to_polygons.py writes
+    (lat/lon properties are the stored, rounded centroid)
+    """
+    index = select(cells, bbox)
+    lat, lon = cells['lat'][index], cells['lon'][index]
+    west, south, east, north = (round_array(b, precision).tolist() for b in cell_bounds(lat, lon))
+    metadata = cells['metadata']
+    for k, i in enumerate(index.tolist()):
+        category = cells['categories'][cells['class'][i]]
+        w, s, e, n = west[k], south[k], east[k], north[k]
+        yield {
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [[[w, s], [e, s], [e, n], [w, n], [w, s]]]
+            },
+            'properties': {
+                'value': float(cells['value'][i]),
+                'category': category['category'],
+                'color': category['color'],
+                'label': category['label'],
+                'lat': float(lat[k]),
+                'lon': float(lon[k]),
+                'year': metadata['year'],
+                'region': metadata['region'],
+                'grid_size': metadata['grid_size']
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or expand a columnar nightlight cell store')
+    parser.add_argument('path', help='bakool_nightlight_cells_{year}.json or .js')
+    parser.add_argument('--bbox', type=float, nargs=4, metavar=('MINX', 'MINY', 'MAXX', 'MAXY'),
+                        help='Only cells whose centroid is inside this box')
+    parser.add_argument('--geojson', help='Expand the (selected) cells into this GeoJSON file')
+    args = parser.parse_args()
+
+    cells = read_cells(args.path)
+    metadata = cells['metadata']
+    print("=" * 60)
+    print(f"  Nightlight Cells: {metadata['region']} {metadata['year']}")
+    print("=" * 60)
+    print(f"\nFile: {args.path} ({os.path.getsize(args.path) / (1024 * 1024):.2f} MB)")
+    print(f"Cells: {len(cells['lon']):,}")
+    counts = np.bincount(cells['class'], minlength=len(cells['categories']))
+    for category, count in zip(cells['categories'], counts.tolist()):
+        print(f"  • {category['category']} (>= {category['min']}): {count:,}")
+
+    if args.geojson:
+        writer = FeatureCollectionWriter(args.geojson)
+        for feature in cell_features(cells, args.bbox):
+            writer.add(feature)
+        writer.close(metadata)
+        writer.commit()
+        print(f"\n[OK] {writer.count:,} features written to {args.geojson}")
+
+
+if __name__ == '__main__':
+    main()
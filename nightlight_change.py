@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Cell-level year-over-year nightlight change
+
+The extraction samples a different random set of pixels each year
+(sample(..., seed=42) over a different image), so the 2022 and 2023 points
+do not line up one to one. This stage puts both years on one 500m grid and
+joins them cell by cell:
+
+- every point is snapped to an integer (row, col) key on a grid anchored at
+  the north-west corner of both years together
+- one hash index (dict) maps each key to a cell id; the earlier year's
+  points are inserted first and the later year's either hit an existing id
+  or add a new cell, so the join is a single linear pass over both years
+- per-cell values are averaged with np.bincount (duplicate points in a
+  cell), and cells seen in only one year keep a null value and delta
+
+Outputs, for the default Bakool 2022 -> 2023:
+
+    bakool_nightlight_change_2022_2023.json / .js    per-cell deltas (columnar)
+    bakool_nightlight_hotspots_2022_2023.geojson / .js
+        500m squares of the cells whose change stands out from the
+        region-wide shift, written like bakool_nightlight_polygons_{year}
+
+The outputs are written next to the input points files unless --output-dir
+is given.
+
+    python nightlight_change.py --years 2022 2023 --region bakool
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from convert_points_to_polygons import PIXEL_SIZE, POLYGON_PRECISION, cell_bounds
+from geojson_writer import FeatureCollectionWriter, round_array
+from region_names import data_file, region_title, region_var
+
+# A cell is a hotspot when its change differs from the median change of the
+# region by HOTSPOT_Z robust standard deviations (1.4826 * MAD), and by at
+# least MIN_CHANGE nW/cm²/sr so that a very uniform year does not flag noise
+HOTSPOT_Z = 3.0
+MIN_CHANGE = 0.05
+
+HOTSPOT_CATEGORIES = [
+    {'category': 'Strong Dimming', 'color': '#1e3a8a', 'label': 'Strong dimming'},
+    {'category': 'Dimming', 'color': '#60a5fa', 'label': 'Dimming'},
+    {'category': 'Brightening', 'color': '#fb923c', 'label': 'Brightening'},
+    {'category': 'Strong Brightening', 'color': '#dc2626', 'label': 'Strong brightening'},
+]
+
+
+def read_points(path):
+    """lat, lon and value arrays of a {region}_nightlight_{year}.js points file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    points = json.loads(content.split('=', 1)[1].strip().rstrip(';'))['points']
+    return tuple(np.fromiter((point[key] for point in points), dtype=float, count=len(points))
+                 for key in ('lat', 'lon', 'value'))
+
+
+def grid_keys(lats, lons, north, west, pixel_size=PIXEL_SIZE):
+    """Integer cell key (row << 32 | col) of each point on the grid anchored at (north, west)"""
+    rows = np.rint((north - lats) / pixel_size).astype(np.int64)
+    cols = np.rint((lons - west) / pixel_size).astype(np.int64)
+    return (rows << 32) | cols
+
+
+def join_cells(*key_arrays):
+    """
+    Hash join of the key arrays: (cell id of every key per array, unique keys
+    in first-seen order). Linear in the total number of keys.
+    """
+    index = {}
+    ids = [np.fromiter((index.setdefault(key, len(index)) for key in keys.tolist()),
+                       dtype=np.int64, count=len(keys))
+           for keys in key_arrays]
+    return ids, np.fromiter(index, dtype=np.int64, count=len(index))
+
+
+def cell_means(ids, values, n_cells):
+    """Mean value per cell id, NaN for cells without a point"""
+    counts = np.bincount(ids, minlength=n_cells)
+    sums = np.bincount(ids, weights=values, minlength=n_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+class YearOverYear:
+    """Per-cell values of two years on a common grid and their change"""
+
+    def __init__(self, region, year_from, year_to, data_dir='.', pixel_size=PIXEL_SIZE):
+        self.region = region
+        self.year_from = year_from
+        self.year_to = year_to
+        self.pixel_size = pixel_size
+
+        (lat_a, lon_a, value_a), (lat_b, lon_b, value_b) = (
+            read_points(data_file(region, year, data_dir)) for year in (year_from, year_to))
+        self.points = (len(value_a), len(value_b))
+
+        # Anchor both years on the same corner so their keys are comparable
+        self.north = max(lat_a.max(), lat_b.max())
+        self.west = min(lon_a.min(), lon_b.min())
+        (ids_a, ids_b), keys = join_cells(grid_keys(lat_a, lon_a, self.north, self.west, pixel_size),
+                                          grid_keys(lat_b, lon_b, self.north, self.west, pixel_size))
+
+        self.lat = self.north - (keys >> 32) * pixel_size
+        self.lon = self.west + (keys & 0xFFFFFFFF) * pixel_size
+        self.value_from = cell_means(ids_a, value_a, len(keys))
+        self.value_to = cell_means(ids_b, value_b, len(keys))
+        self.delta = self.value_to - self.value_from
+
+        # 0: in both years, 1: only in year_from, 2: only in year_to
+        self.status = np.where(np.isnan(self.value_to), 1, np.where(np.isnan(self.value_from), 2, 0))
+        self.statuses = ['both', f'only_{year_from}', f'only_{year_to}']
+        self.hotspots, self.hotspot_class, self.threshold, self.baseline = self._find_hotspots()
+
+    def __len__(self):
+        return len(self.delta)
+
+    def _find_hotspots(self):
+        """Hotspot cell indices, their HOTSPOT_CATEGORIES index, the change threshold and the median change"""
+        both = np.flatnonzero(self.status == 0)
+        if len(both) == 0:
+            return both, both, MIN_CHANGE, 0.0
+        deltas = self.delta[both]
+        baseline = float(np.median(deltas))
+        sigma = 1.4826 * float(np.median(np.abs(deltas - baseline)))
+        threshold = max(HOTSPOT_Z * sigma, MIN_CHANGE)
+
+        anomaly = deltas - baseline
+        hot = np.abs(anomaly) >= threshold
+        strong = np.abs(anomaly[hot]) >= 2 * threshold
+        rising = anomaly[hot] > 0
+        # Strong Dimming, Dimming, Brightening, Strong Brightening
+        classes = np.where(rising, 2 + strong, 1 - strong)
+        return both[hot], classes, threshold, baseline
+
+    def summary(self):
+        both = self.status == 0
+        deltas = self.delta[both]
+        return {
+            'cells': len(self),
+            'cells_both_years': int(both.sum()),
+            f'cells_only_{self.year_from}': int((self.status == 1).sum()),
+            f'cells_only_{self.year_to}': int((self.status == 2).sum()),
+            'mean_change': round(float(deltas.mean()), 4) if len(deltas) else None,
+            'median_change': round(self.baseline, 4),
+            'hotspot_threshold': round(self.threshold, 4),
+            'hotspots': {c['category']: int((self.hotspot_class == i).sum())
+                         for i, c in enumerate(HOTSPOT_CATEGORIES)}
+        }
+
+    def metadata(self):
+        return {
+            'region': region_title(self.region),
+            'year_from': self.year_from,
+            'year_to': self.year_to,
+            'grid_size': '500m × 500m',
+            'pixel_size': self.pixel_size,
+            'points': {str(self.year_from): self.points[0], str(self.year_to): self.points[1]},
+            **self.summary()
+        }
+
+
+def _nullable(values, precision):
+    """Rounded list with NaN as None (null in JSON)"""
+    return [None if v != v else v for v in round_array(values, precision).tolist()]
+
+
+def write_deltas(change, basename, js_var):
+    """Write the per-cell change as a columnar {basename}.json / .js"""
+    text = json.dumps({
+        'metadata': change.metadata(),
+        'statuses': change.statuses,
+        'lon': round_array(change.lon, POLYGON_PRECISION).tolist(),
+        'lat': round_array(change.lat, POLYGON_PRECISION).tolist(),
+        'value_from': _nullable(change.value_from, 3),
+        'value_to': _nullable(change.value_to, 3),
+        'delta': _nullable(change.delta, 3),
+        'status': change.status.tolist()
+    }, separators=(',', ':'))
+    paths = (f'{basename}.json', f'{basename}.js')
+    for path, content in zip(paths, (text, f"const {js_var}={text};")):
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(path + '.tmp', path)
+    return paths
+
+
+def write_hotspots(change, basename, js_var):
+    """Write the hotspot cells as 500m squares to {basename}.geojson / .js"""
+    writer = FeatureCollectionWriter(f'{basename}.geojson', f'{basename}.js', js_var,
+                                     js_declaration='const', precision=POLYGON_PRECISION)
+    cells = change.hotspots
+    west, south, east, north = (b.tolist() for b in cell_bounds(change.lat[cells], change.lon[cells]))
+    region = region_title(change.region)
+    for k, (i, c) in enumerate(zip(cells.tolist(), change.hotspot_class.tolist())):
+        w, s, e, n = west[k], south[k], east[k], north[k]
+        writer.add({
+            'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [[[w, s], [e, s], [e, n], [w, n], [w, s]]]},
+            'properties': dict(
+                HOTSPOT_CATEGORIES[c],
+                value_from=round(float(change.value_from[i]), 3),
+                value_to=round(float(change.value_to[i]), 3),
+                delta=round(float(change.delta[i]), 3),
+                lat=round(float(change.lat[i]), POLYGON_PRECISION),
+                lon=round(float(change.lon[i]), POLYGON_PRECISION),
+                year_from=change.year_from,
+                year_to=change.year_to,
+                region=region,
+                grid_size='500m × 500m'
+            )
+        })
+    writer.close(change.metadata())
+    writer.commit()
+    return writer.geojson_path, writer.js_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cell-level year-over-year nightlight change and hotspots')
+    parser.add_argument('--years', type=int, nargs=2, default=[2022, 2023], metavar=('FROM', 'TO'))
+    parser.add_argument('--region', default='bakool', help='Region slug of the {region}_nightlight_{year}.js files')
+    parser.add_argument('--data-dir', default='.')
+    parser.add_argument('--output-dir', help='Directory for the outputs (default: --data-dir)')
+    args = parser.parse_args()
+    output_dir = args.output_dir or args.data_dir
+    year_from, year_to = args.years
+    name = region_title(args.region)
+
+    print("=" * 60)
+    print(f"{name} Nightlight Change {year_from} -> {year_to}")
+    print("=" * 60)
+
+    change = YearOverYear(args.region, year_from, year_to, args.data_dir)
+    summary = change.summary()
+    print(f"\nPoints: {change.points[0]:,} ({year_from}), {change.points[1]:,} ({year_to})")
+    print(f"Cells on the common 500m grid: {summary['cells']:,}")
+    print(f"  • In both years: {summary['cells_both_years']:,}")
+    print(f"  • Only {year_from}: {summary[f'cells_only_{year_from}']:,}")
+    print(f"  • Only {year_to}: {summary[f'cells_only_{year_to}']:,}")
+    if summary['mean_change'] is not None:
+        print(f"\nChange per cell (nW/cm²/sr): mean {summary['mean_change']:+.4f}, "
+              f"median {summary['median_change']:+.4f}")
+    print(f"Hotspot threshold: ±{summary['hotspot_threshold']:.4f} around the median change")
+    for category, count in summary['hotspots'].items():
+        print(f"  • {category}: {count:,} cells")
+
+    var = region_var(name)
+    suffix = f'{year_from}_{year_to}'
+    os.makedirs(output_dir, exist_ok=True)
+    deltas = write_deltas(change, os.path.join(output_dir, f'{args.region}_nightlight_change_{suffix}'),
+                          f'{var}NightlightChange{suffix}')
+    hotspots = write_hotspots(change, os.path.join(output_dir, f'{args.region}_nightlight_hotspots_{suffix}'),
+                              f'{var}NightlightHotspots{suffix}')
+    print()
+    for path in deltas + hotspots:
+        print(f"✓ {path} ({os.path.getsize(path) / (1024 * 1024):.2f} MB)")
+
+
+if __name__ == '__main__':
+    main()
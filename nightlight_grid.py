@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Raster nightlight grid for the Bakool VIIRS pipeline
+
+Keeps nightlights as what they are - a georeferenced raster - instead of
+100k point features with a 500m square rebuilt around each one:
+
+    bakool_nightlight_grid_{year}.npy   float32 radiance, NaN = no data,
+                                        row 0 is the northern edge
+    bakool_nightlight_grid_{year}.json  sidecar: west/north edge, pixel size,
+                                        width/height, bounds, year, region
+
+The .npy is opened memory-mapped, so large grids are not read up front.
+Classification and statistics are whole-array operations, and the exports
+are a single PNG overlay (for L.imageOverlay) or one merged polygon per
+category instead of one square per cell.
+
+The grid is filled either from the sampled points already extracted
+(bakool_nightlight_{year}.js) or straight from Earth Engine with
+ee.data.computePixels (--source ee), clipped to the Bakool outline from the
+local boundary cache when data.js is available.
+"""
+
+import argparse
+import json
+import math
+import os
+import struct
+import zlib
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping
+
+from boundary_cache import BoundaryCache
+from convert_points_to_polygons import (CATEGORIES, CATEGORY_BREAKS, PIXEL_SIZE, POLYGON_PRECISION, cell_bounds,
+                                        classify_values, load_points)
+from geojson_writer import FeatureCollectionWriter
+
+PROJECT_ID = 'somalia-dashboard'
+
+# Manual Bakool extent from extract_viirs_bakool_full.py (west, south, east, north)
+BAKOOL_BBOX = (43.0, 3.3, 44.8, 5.2)
+
+# Pixels below this are background noise and left out of the exports
+BACKGROUND_THRESHOLD = CATEGORY_BREAKS[0]
+
+
+class NightlightGrid:
+    """
+    A north-up radiance grid in EPSG:4326. Pixel (row, col) covers
+    lon [west + col*size, west + (col+1)*size], lat [north - (row+1)*size, north - row*size].
+    """
+
+    def __init__(self, data, west, north, pixel_size, year, region='Bakool', source=None):
+        self.data = data
+        self.west = west
+        self.north = north
+        self.pixel_size = pixel_size
+        self.year = year
+        self.region = region
+        self.source = source
+        # Category lower bounds; convert_points_to_polygons.py --breaks natural replaces them
+        self.breaks = CATEGORY_BREAKS
+
+    @property
+    def height(self):
+        return self.data.shape[0]
+
+    @property
+    def width(self):
+        return self.data.shape[1]
+
+    @property
+    def bounds(self):
+        """(west, south, east, north)"""
+        return (self.west, self.north - self.height * self.pixel_size,
+                self.west + self.width * self.pixel_size, self.north)
+
+    @classmethod
+    def from_points(cls, points, year, pixel_size=PIXEL_SIZE, region='Bakool'):
+        """
+        Snap sampled pixel centres onto a grid. Cells that were not sampled
+        stay NaN; if two points fall in one cell the last one wins.
+        """
+        lons = np.array([p['lon'] for p in points], dtype=float)
+        lats = np.array([p['lat'] for p in points], dtype=float)
+        values = np.array([p['value'] for p in points], dtype=np.float32)
+
+        west = lons.min() - pixel_size / 2
+        north = lats.max() + pixel_size / 2
+        cols = np.rint((lons - lons.min()) / pixel_size).astype(np.int64)
+        rows = np.rint((lats.max() - lats) / pixel_size).astype(np.int64)
+
+        data = np.full((rows.max() + 1, cols.max() + 1), np.nan, dtype=np.float32)
+        data[rows, cols] = values
+        return cls(data, west, north, pixel_size, year, region, source='points')
+
+    @classmethod
+    def from_ee(cls, year, bbox=BAKOOL_BBOX, pixel_size=PIXEL_SIZE, region='Bakool', geometry=None):
+        """
+        Fetch the VIIRS annual 'average' band for bbox as one array through
+        ee.data.computePixels (requires an initialized Earth Engine session).
+        Pixels outside geometry, when given, are NaN.
+        """
+        import ee
+
+        west, south, east, north = bbox
+        width = math.ceil((east - west) / pixel_size)
+        height = math.ceil((north - south) / pixel_size)
+
+        image = (ee.ImageCollection('NOAA/VIIRS/DNB/ANNUAL_V22')
+                 .filter(ee.Filter.calendarRange(year, year, 'year'))
+                 .first()
+                 .select('average'))
+        if geometry is not None:
+            image = image.clip(geometry)
+        pixels = ee.data.computePixels({
+            'expression': image.unmask(-1),
+            'fileFormat': 'NUMPY_NDARRAY',
+            'grid': {
+                'dimensions': {'width': width, 'height': height},
+                'affineTransform': {
+                    'scaleX': pixel_size, 'shearX': 0, 'translateX': west,
+                    'shearY': 0, 'scaleY': -pixel_size, 'translateY': north
+                },
+                'crsCode': 'EPSG:4326'
+            }
+        })
+        data = np.asarray(pixels['average'], dtype=np.float32)
+        data[data < 0] = np.nan
+        return cls(data, west, north, pixel_size, year, region, source='earthengine')
+
+    @classmethod
+    def load(cls, npy_path, mmap=True):
+        """Open a saved grid; the array is memory-mapped unless mmap=False"""
+        with open(npy_path[:-len('.npy')] + '.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        data = np.load(npy_path, mmap_mode='r' if mmap else None)
+        return cls(data, meta['west'], meta['north'], meta['pixel_size'], meta['year'],
+                   meta['region'], meta.get('source'))
+
+    def save(self, npy_path):
+        np.save(npy_path, np.asarray(self.data, dtype=np.float32))
+        meta = {
+            'west': self.west,
+            'north': self.north,
+            'pixel_size': self.pixel_size,
+            'width': self.width,
+            'height': self.height,
+            'bounds': list(self.bounds),
+            'crs': 'EPSG:4326',
+            'nodata': 'NaN',
+            'year': self.year,
+            'region': self.region,
+            'source': self.source
+        }
+        with open(npy_path[:-len('.npy')] + '.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    def classify(self):
+        """CATEGORIES index per pixel; -1 for background noise and no data"""
+        classes = classify_values(self.data, self.breaks).astype(np.int8)
+        classes[np.isnan(self.data)] = -1
+        return classes
+
+    def stats(self):
+        """Radiance and category statistics over the whole grid"""
+        valid = np.asarray(self.data)[~np.isnan(self.data)]
+        classes = self.classify()
+        counts = np.bincount(classes[classes >= 0], minlength=len(CATEGORIES))
+        result = {
+            'pixels': int(self.data.size),
+            'valid': int(valid.size),
+            'nodata': int(self.data.size - valid.size),
+            'background': int(np.count_nonzero(valid < self.breaks[0])),
+            'categories': {c['category']: int(n) for c, n in zip(CATEGORIES, counts)}
+        }
+        if valid.size:
+            p50, p90, p99 = np.percentile(valid, [50, 90, 99])
+            result.update({
+                'min': float(valid.min()), 'max': float(valid.max()),
+                'mean': float(valid.mean()), 'std': float(valid.std()),
+                'p50': float(p50), 'p90': float(p90), 'p99': float(p99)
+            })
+        return result
+
+    def overlay_rgba(self, opacity=200):
+        """RGBA image of the classified grid; background and no data are transparent"""
+        palette = np.zeros((len(CATEGORIES) + 1, 4), dtype=np.uint8)
+        for i, category in enumerate(CATEGORIES):
+            color = category['color'].lstrip('#')
+            palette[i] = [int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16), opacity]
+        # Index -1 picks the last palette row, which stays fully transparent
+        return palette[self.classify()]
+
+    def class_polygons(self, square_cells=False):
+        """
+        One dissolved (Multi)Polygon per category. Each row is split into runs
+        of equal class, the runs become boxes and the boxes of a class are
+        unioned, so shared cell edges disappear.
+
+        Pixels are square in degrees. With square_cells each run instead spans
+        the 500m squares around its first and last pixel centre, as
+        convert_points_to_polygons.cell_bounds() draws them (cos(lat)-corrected
+        east-west), so the outlines are those of the per-cell polygons with
+        the cells snapped to the grid (within about a metre for sampled points).
+        """
+        classes = self.classify()
+        boxes = {i: [] for i in range(len(CATEGORIES))}
+        cell_counts = np.bincount(classes[classes >= 0], minlength=len(CATEGORIES))
+        size = self.pixel_size
+        for row in range(self.height):
+            line = classes[row]
+            edges = np.flatnonzero(np.diff(line)) + 1
+            starts = np.concatenate(([0], edges))
+            ends = np.concatenate((edges, [self.width]))
+            run_classes = line[starts]
+            keep = run_classes >= 0
+            if not keep.any():
+                continue
+            south = self.north - (row + 1) * size
+            north = self.north - row * size
+            west = self.west + starts[keep] * size
+            east = self.west + ends[keep] * size
+            if square_cells:
+                lat = self.north - (row + 0.5) * size
+                west = cell_bounds(lat, west + size / 2)[0]
+                east = cell_bounds(lat, east - size / 2)[2]
+            for w, e, c in zip(west.tolist(), east.tolist(), run_classes[keep].tolist()):
+                boxes[c].append((w, south, e, north))
+
+        polygons = {}
+        for c, class_boxes in boxes.items():
+            if class_boxes:
+                bounds = np.array(class_boxes)
+                geoms = shapely.box(bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3])
+                polygons[c] = (shapely.union_all(geoms), int(cell_counts[c]))
+        return polygons
+
+
+def write_png(path, rgba):
+    """Write an RGBA uint8 array (height, width, 4) as a PNG (no dependencies)"""
+    height, width, _ = rgba.shape
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)]).tobytes()
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, 9)))
+        f.write(chunk(b'IEND', b''))
+
+
+def write_merged_polygons(grid, geojson_file, js_file, js_var, metadata=None, square_cells=False):
+    """
+    Write one Feature per category with the dissolved cells of that class
+    (see NightlightGrid.class_polygons for square_cells). metadata is merged
+    into the collection metadata. Returns the number of features and of
+    polygon parts across them.
+    """
+    writer = FeatureCollectionWriter(geojson_file, js_file, js_var, js_declaration='const',
+                                     precision=POLYGON_PRECISION)
+    parts = 0
+    for c, (geometry, cells) in sorted(grid.class_polygons(square_cells).items()):
+        parts += int(shapely.get_num_geometries(geometry))
+        writer.add({
+            'type': 'Feature',
+            'geometry': shapely.geometry.mapping(geometry),
+            'properties': dict(CATEGORIES[c], cells=cells, year=grid.year, region=grid.region)
+        })
+    writer.close(dict({'year': grid.year, 'region': grid.region, 'pixel_size': grid.pixel_size,
+                       'bounds': list(grid.bounds)}, **(metadata or {})))
+    writer.commit()
+    return writer.count, parts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and export raster nightlight grids')
+    parser.add_argument('--years', type=int, nargs='+', default=[2022, 2023])
+    parser.add_argument('--source', choices=['points', 'ee'], default='points',
+                        help='points: grid the samples in bakool_nightlight_{year}.js; ee: fetch the full raster')
+    parser.add_argument('--data-js', default='data.js',
+                        help='Bakool outline for --source ee (default: data.js, else the manual extent)')
+    parser.add_argument('--png', action='store_true', help='Write bakool_nightlight_overlay_{year}.png')
+    parser.add_argument('--polygons', action='store_true',
+                        help='Write bakool_nightlight_merged_{year}.geojson/.js (one polygon per category)')
+    args = parser.parse_args()
+
+    if args.source == 'ee':
+        import ee
+        print(f"Initializing Earth Engine with project: {PROJECT_ID}")
+        ee.Initialize(project=PROJECT_ID)
+        bbox, geometry = BAKOOL_BBOX, None
+        if os.path.exists(args.data_js):
+            cache = BoundaryCache.open(args.data_js)
+            name = cache.resolve('Bakool')
+            if name:
+                bbox = cache.bounds(name)
+                geometry = ee.Geometry(mapping(cache.geometry(name)))
+                print(f"Using the {name} boundary from {args.data_js}")
+
+    for year in args.years:
+        print(f"\n{'='*60}")
+        print(f"Bakool {year} - Nightlight Grid")
+        print(f"{'='*60}")
+
+        if args.source == 'ee':
+            grid = NightlightGrid.from_ee(year, bbox=bbox, geometry=geometry)
+        else:
+            grid = NightlightGrid.from_points(load_points(f'bakool_nightlight_{year}.js'), year)
+
+        npy_file = f'bakool_nightlight_grid_{year}.npy'
+        grid.save(npy_file)
+        grid = NightlightGrid.load(npy_file)
+        west, south, east, north = grid.bounds
+        print(f"Grid: {grid.width} x {grid.height} pixels of {grid.pixel_size:.6f}° "
+              f"({os.path.getsize(npy_file) / (1024 * 1024):.2f} MB)")
+        print(f"Bounds: {west:.5f}, {south:.5f}, {east:.5f}, {north:.5f}")
+
+        stats = grid.stats()
+        print(f"\nStatistics:")
+        print(f"  • Valid pixels: {stats['valid']:,} of {stats['pixels']:,} ({stats['nodata']:,} no data)")
+        if stats['valid']:
+            print(f"  • Radiance: min {stats['min']:.3f}, mean {stats['mean']:.3f}, max {stats['max']:.3f} nW/cm²/sr")
+            print(f"  • Percentiles: p50 {stats['p50']:.3f}, p90 {stats['p90']:.3f}, p99 {stats['p99']:.3f}")
+        print(f"  • Background (< {BACKGROUND_THRESHOLD}): {stats['background']:,}")
+        for category, count in stats['categories'].items():
+            print(f"  • {category}: {count:,}")
+
+        if args.png:
+            png_file = f'bakool_nightlight_overlay_{year}.png'
+            write_png(png_file, grid.overlay_rgba())
+            print(f"\nSUCCESS: Overlay saved: {png_file} ({os.path.getsize(png_file) / 1024:.1f} KB)")
+            print(f"  L.imageOverlay('{png_file}', [[{south:.5f}, {west:.5f}], [{north:.5f}, {east:.5f}]])")
+
+        if args.polygons:
+            geojson_file = f'bakool_nightlight_merged_{year}.geojson'
+            js_file = f'bakool_nightlight_merged_{year}.js'
+            count, parts = write_merged_polygons(grid, geojson_file, js_file, f'bakoolNightlightMerged{year}')
+            print(f"\nSUCCESS: {count} merged features ({parts:,} polygons) saved: {geojson_file} "
+                  f"({os.path.getsize(js_file) / (1024 * 1024):.2f} MB)")
+
+    print(f"\n{'='*60}")
+    print("Grid build complete!")
+    print(f"{'='*60}\n")
+
+
+if __name__ == '__main__':
+    main()
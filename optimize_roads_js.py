@@ -2,79 +2,134 @@
 """
 Optimize roads JavaScript files in roads_by_region/ directory
 Reduces coordinate precision and minifies the JS files
+
+With --levels, also writes simplified copies per zoom level
+(<Region>_roads.z6.js, .z8.js, .z10.js) so the dashboard can load a coarse
+version first. Each level declares the same variable as the full file.
+
+Files are optimized in parallel through optimizer_engine.py (NumPy
+rounding, atomic writes, hash-refreshed backups).
 """
 
+import argparse
 import json
 import os
-import shutil
 from pathlib import Path
 
-def round_coordinates(coords, precision=6):
-    """Recursively round all coordinates to specified decimal places"""
-    if isinstance(coords[0], (int, float)):
-        return [round(c, precision) for c in coords]
-    return [round_coordinates(c, precision) for c in coords]
+from build_manifest import MANIFEST_FILE, BuildManifest
+from optimizer_engine import optimize_file, optimize_files, print_summary, round_feature_coordinates, write_atomic
+from precompress import precompress, print_report
 
 def optimize_roads_js(file_path, precision=6):
-    """Optimize a roads JavaScript file"""
-    print(f"\nProcessing: {file_path.name}")
-
-    # Get original size
-    original_size = os.path.getsize(file_path)
+    """Optimize a roads JavaScript file (var regionNameRoads = {...};) through the shared engine"""
+    print(f"\nProcessing: {Path(file_path).name}")
+    result = optimize_file(str(file_path), 'js', precision)
+    original_size, new_size = result['original'], result['new']
     print(f"  Original size: {original_size / 1024 / 1024:.2f} MB")
-
-    # Create backup
-    backup_path = str(file_path) + '.backup'
-    if not os.path.exists(backup_path):
-        shutil.copy2(file_path, backup_path)
-        print(f"  [OK] Backup created")
-
-    # Read the file
+    if result['status'] == 'error':
+        print(f"  ERROR: Could not optimize - {result['error']}")
+        return original_size, original_size
+    if result['backup'] in ('created', 'refreshed'):
+        print(f"  [OK] Backup {result['backup']}")
+    reduction = ((original_size - new_size) / original_size) * 100 if original_size else 0
+    print(f"  Optimized size: {new_size / 1024 / 1024:.2f} MB")
+    print(f"  [OK] Reduced by: {reduction:.1f}% ({(original_size - new_size) / 1024 / 1024:.2f} MB saved)")
+    return original_size, new_size
+
+# Zoom levels written by --levels
+LEVEL_ZOOMS = [6, 8, 10]
+
+def level_tolerance(zoom):
+    """Douglas-Peucker tolerance in degrees: half a 256px screen pixel at zoom"""
+    return 360.0 / (256 * 2 ** zoom) / 2
+
+def load_roads_js(file_path):
+    """Read a roads JS file (var name = {...};) into (var name, GeoJSON dict)"""
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
-
-    # Extract variable name and GeoJSON data
-    # Format: var regionNameRoads = {...};
-    if '=' in content:
-        var_part, json_part = content.split('=', 1)
-        var_name = var_part.strip()
-        json_str = json_part.rstrip(';').strip()
-
-        try:
-            # Parse GeoJSON
-            data = json.loads(json_str)
-
-            # Optimize coordinates
-            if 'features' in data:
-                for feature in data['features']:
-                    if 'geometry' in feature and 'coordinates' in feature['geometry']:
-                        feature['geometry']['coordinates'] = round_coordinates(
-                            feature['geometry']['coordinates'],
-                            precision
-                        )
-
-            # Write back minified
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f"{var_name}={json.dumps(data, separators=(',', ':'))};")
-
-            # Get new size
-            new_size = os.path.getsize(file_path)
-            reduction = ((original_size - new_size) / original_size) * 100
-
-            print(f"  Optimized size: {new_size / 1024 / 1024:.2f} MB")
-            print(f"  [OK] Reduced by: {reduction:.1f}% ({(original_size - new_size) / 1024 / 1024:.2f} MB saved)")
-
-            return original_size, new_size
-
-        except Exception as e:
-            print(f"  ERROR: Could not optimize - {e}")
-            # Restore from backup
-            shutil.copy2(backup_path, file_path)
-            return original_size, original_size
-
-    return original_size, original_size
+    var_part, json_part = content.split('=', 1)
+    return var_part.strip(), json.loads(json_part.strip().rstrip(';'))
+
+def write_simplified_levels(file_path, zooms=LEVEL_ZOOMS, precision=6):
+    """
+    Write one simplified copy of a roads JS file per zoom level.
+    Uses topology-preserving Douglas-Peucker, so simplified lines never
+    self-intersect. Returns [(zoom, vertices, bytes)], full resolution first
+    (zoom None).
+    """
+    from shapely import get_num_coordinates, to_geojson
+    from shapely.geometry import shape
+
+    var_name, data = load_roads_js(file_path)
+    geometries = [shape(feature['geometry']) for feature in data['features']]
+    results = [(None, sum(int(get_num_coordinates(g)) for g in geometries), os.path.getsize(file_path))]
+
+    for zoom in zooms:
+        tolerance = level_tolerance(zoom)
+        features = []
+        vertices = 0
+        for feature, geom in zip(data['features'], geometries):
+            simplified = geom.simplify(tolerance, preserve_topology=True)
+            if simplified.is_empty:
+                continue
+            vertices += int(get_num_coordinates(simplified))
+            features.append({
+                'type': 'Feature',
+                'geometry': json.loads(to_geojson(simplified)),
+                'properties': feature['properties']
+            })
+        # All coordinates of the level at once, as the engine rounds a file
+        round_feature_coordinates([feature['geometry'] for feature in features], precision)
+
+        level = {
+            'type': 'FeatureCollection',
+            'metadata': dict(data.get('metadata', {}), level=f'z{zoom}',
+                             tolerance_deg=round(tolerance, 8)),
+            'features': features
+        }
+        level_path = str(file_path)[:-len('.js')] + f'.z{zoom}.js'
+        write_atomic(level_path, f"{var_name}={json.dumps(level, separators=(',', ':'))};".encode('utf-8'))
+        results.append((zoom, vertices, os.path.getsize(level_path)))
+
+    return results
+
+def print_levels_report(reports):
+    """Per region and per level vertex counts and sizes, relative to full resolution"""
+    print(f"\n{'Region':<22} {'Level':<6} {'Vertices':>12} {'Size MB':>9} {'Vertices -':>11} {'Bytes -':>9}")
+    print("-" * 74)
+    totals = {}
+    for name, results in reports:
+        _, full_vertices, full_bytes = results[0]
+        for zoom, vertices, size in results:
+            label = 'full' if zoom is None else f'z{zoom}'
+            total = totals.setdefault(label, [0, 0])
+            total[0] += vertices
+            total[1] += size
+            print(f"{name:<22} {label:<6} {vertices:>12,} {size / 1024 / 1024:>9.2f} "
+                  f"{(1 - vertices / full_vertices) * 100 if full_vertices else 0:>10.1f}% "
+                  f"{(1 - size / full_bytes) * 100 if full_bytes else 0:>8.1f}%")
+    print("-" * 74)
+    full_vertices, full_bytes = totals.get('full', [0, 0])
+    for label, (vertices, size) in totals.items():
+        print(f"{'All regions':<22} {label:<6} {vertices:>12,} {size / 1024 / 1024:>9.2f} "
+              f"{(1 - vertices / full_vertices) * 100 if full_vertices else 0:>10.1f}% "
+              f"{(1 - size / full_bytes) * 100 if full_bytes else 0:>8.1f}%")
 
 def main():
+    parser = argparse.ArgumentParser(description='Optimize roads_by_region/*.js files')
+    parser.add_argument('--manifest', default=MANIFEST_FILE,
+                        help=f'Build manifest used to skip unchanged files (default: {MANIFEST_FILE})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='List the files that would be optimized and exit')
+    parser.add_argument('--levels', action='store_true',
+                        help='Also write simplified per-zoom copies (<Region>_roads.z<N>.js)')
+    parser.add_argument('--zooms', type=int, nargs='+', default=LEVEL_ZOOMS,
+                        help=f'Zoom levels for --levels (default: {" ".join(map(str, LEVEL_ZOOMS))})')
+    parser.add_argument('--workers', type=int, help='Parallel optimizer processes (default: CPU count)')
+    parser.add_argument('--no-compress', action='store_true',
+                        help='Do not write precompressed .gz/.br siblings')
+    args = parser.parse_args()
+
     print("=" * 70)
     print("  Roads JavaScript Files Optimizer")
     print("=" * 70)
@@ -84,9 +139,6 @@ def main():
     print("  - Creating backups")
     print()
 
-    total_original = 0
-    total_new = 0
-
     roads_dir = Path('roads_by_region')
     if not roads_dir.exists():
         print("ERROR: roads_by_region/ directory not found")
@@ -95,20 +147,44 @@ def main():
     js_files = list(roads_dir.glob('*_roads.js'))
     print(f"Found {len(js_files)} JavaScript files to optimize\n")
 
-    for js_file in sorted(js_files):
-        orig, new = optimize_roads_js(js_file, precision=6)
-        total_original += orig
-        total_new += new
+    # Skip files this script already optimized that have not changed since
+    manifest = BuildManifest(args.manifest)
+    params = {'precision': 6}
+    pending = [f for f in sorted(js_files) if not manifest.is_current('optimize_roads_js', f, params)]
+    print(f"{len(js_files) - len(pending)} unchanged since last optimization, {len(pending)} to process")
+    if args.dry_run:
+        for js_file in pending:
+            print(f"  • {js_file.name}")
+        print("\nDry run - nothing written")
+        return
+
+    results, _ = optimize_files([(str(f), 'js', params['precision']) for f in pending], manifest,
+                                'optimize_roads_js', args.workers)
+    manifest.save()
+
+    if args.levels:
+        print(f"\nWriting simplified levels {', '.join(f'z{z}' for z in args.zooms)}...")
+        reports = []
+        for js_file in sorted(js_files):
+            reports.append((js_file.name[:-len('_roads.js')], write_simplified_levels(js_file, args.zooms)))
+            print(f"  [OK] {js_file.name}")
+        print_levels_report(reports)
+
+    if not args.no_compress:
+        print("\nPrecompressing roads files...")
+        outputs = sorted(str(f) for f in js_files)
+        if args.levels:
+            outputs += [str(js_file)[:-len('.js')] + f'.z{zoom}.js' for js_file in sorted(js_files) for zoom in args.zooms]
+        print_report(*precompress(outputs, manifest))
+        manifest.save()
 
     # Summary
     print("\n" + "=" * 70)
     print("  OPTIMIZATION COMPLETE")
     print("=" * 70)
-    total_reduction = ((total_original - total_new) / total_original) * 100 if total_original > 0 else 0
-    print(f"\nTotal original size:  {total_original / 1024 / 1024:.2f} MB")
-    print(f"Total optimized size: {total_new / 1024 / 1024:.2f} MB")
-    print(f"Total reduction:      {total_reduction:.1f}% ({(total_original - total_new) / 1024 / 1024:.2f} MB saved)")
-    print(f"\n[OK] All files optimized successfully!")
+    print_summary(results)
+    if not any(r['status'] == 'error' for r in results):
+        print(f"\n[OK] All files optimized successfully!")
     print(f"[OK] Backups saved with .backup extension")
 
 if __name__ == '__main__':
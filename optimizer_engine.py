@@ -0,0 +1,217 @@
+"""
+Shared engine for the in-place optimizers (optimize_geojson.py, optimize_roads_js.py)
+
+Each file is optimized in a worker process:
+
+- coordinates of all features are gathered into one flat NumPy buffer and
+  rounded together (round_array, so the digits match Python's round())
+- the result is written to a temporary file in the same directory and moved
+  over the original with os.replace, so a crash never leaves a truncated file
+- file.backup keeps the last unoptimized source: it is written when missing
+  and refreshed when the source changed since (compared by SHA-256), never
+  overwritten with optimized output
+
+Files whose build-manifest entry shows they were already optimized with the
+same parameters are skipped before any worker starts, so a rerun over
+unchanged files only stats them.
+
+    results, skipped = optimize_files([('data.js', 'js', 5), ('roads_by_region/Bay_roads.geojson', 'geojson', 6)],
+                                      manifest, 'optimize_geojson')
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from datajs_parser import iter_assignments
+from geojson_writer import COMPACT, round_array, round_coordinates
+
+
+def _positions(coords, out):
+    """Collect every position ([x, y, ...] list) of a GeoJSON coordinates array into out"""
+    if coords and isinstance(coords[0], (int, float)):
+        out.append(coords)
+    else:
+        for part in coords:
+            _positions(part, out)
+
+
+def round_feature_coordinates(geometries, precision):
+    """
+    Round the coordinates of every geometry in place, all positions at once.
+    Integer coordinates stay integers, as round() leaves them.
+    """
+    positions = []
+    for geometry in geometries:
+        if geometry and geometry.get('coordinates'):
+            _positions(geometry['coordinates'], positions)
+    if not positions:
+        return
+    try:
+        values = np.array(positions, dtype=float)
+    except (ValueError, TypeError):
+        # Mixed 2D/3D positions or non-numeric values: fall back to round()
+        for geometry in geometries:
+            if geometry and geometry.get('coordinates'):
+                geometry['coordinates'] = round_coordinates(geometry['coordinates'], precision)
+        return
+
+    rows = round_array(values.ravel(), precision).reshape(values.shape).tolist()
+    for i in np.flatnonzero((values == np.floor(values)).any(axis=1)).tolist():
+        rows[i] = [v if type(v) is int else r for v, r in zip(positions[i], rows[i])]
+    for position, row in zip(positions, rows):
+        position[:] = row
+
+
+def optimize_geojson_data(data, precision):
+    """Round the coordinates of a FeatureCollection or bare geometry in place"""
+    if 'features' in data:
+        round_feature_coordinates([feature.get('geometry') for feature in data['features']], precision)
+    elif 'coordinates' in data:
+        round_feature_coordinates([data], precision)
+    return data
+
+
+def optimize_text(content, kind, precision):
+    """Optimized text of a .geojson file (kind 'geojson') or a .js data file (kind 'js')"""
+    if kind == 'geojson':
+        return json.dumps(optimize_geojson_data(json.loads(content), precision), separators=COMPACT)
+
+    # Rewrite each top-level object assignment, leaving the text between them as is
+    pieces = []
+    pos = 0
+    for assignment in iter_assignments(content):
+        if not assignment.raw.startswith('{'):
+            continue
+        try:
+            data = optimize_geojson_data(assignment.value(), precision)
+        except (ValueError, TypeError, IndexError, AttributeError):
+            # Not JSON or not GeoJSON-shaped: keep the original
+            continue
+        pieces.append(content[pos:assignment.start])
+        pieces.append(f"{assignment.keyword} {assignment.name}={json.dumps(data, separators=COMPACT)};")
+        pos = assignment.end
+    pieces.append(content[pos:])
+    return ''.join(pieces)
+
+
+def write_atomic(path, data):
+    """Write bytes to path through a temporary file in the same directory"""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def refresh_backup(path, source):
+    """Make path.backup hold source; returns 'created', 'refreshed' or 'current'"""
+    backup_path = f"{path}.backup"
+    if os.path.exists(backup_path):
+        with open(backup_path, 'rb') as f:
+            if _sha256(f.read()) == _sha256(source):
+                return 'current'
+        write_atomic(backup_path, source)
+        return 'refreshed'
+    write_atomic(backup_path, source)
+    return 'created'
+
+
+def optimize_file(path, kind, precision, backup=True):
+    """
+    Optimize one file in place (runs in a worker process). Returns a result
+    dict: path, original/new size, status ('optimized', 'already optimized'
+    or 'error'), backup state, error message and seconds taken.
+    """
+    start = time.perf_counter()
+    result = {'path': path, 'backup': None, 'error': None}
+    with open(path, 'rb') as f:
+        source = f.read()
+    result['original'] = result['new'] = len(source)
+    try:
+        optimized = optimize_text(source.decode('utf-8'), kind, precision).encode('utf-8')
+    except Exception as e:
+        result.update(status='error', error=str(e), seconds=time.perf_counter() - start)
+        return result
+
+    if optimized == source:
+        result['status'] = 'already optimized'
+    else:
+        if backup:
+            result['backup'] = refresh_backup(path, source)
+        write_atomic(path, optimized)
+        result.update(status='optimized', new=len(optimized))
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def optimize_files(jobs, manifest, step, workers=None, log=print):
+    """
+    Optimize [(path, kind, precision)] in a process pool, largest files first,
+    skipping those the manifest shows as already done with that precision.
+    Returns (results, skipped paths); the manifest is updated but not saved.
+    """
+    pending, skipped = [], []
+    for path, kind, precision in jobs:
+        path = str(path)
+        if manifest.is_current(step, path, {'precision': precision}):
+            skipped.append(path)
+        else:
+            pending.append((path, kind, precision))
+    if skipped:
+        log(f"  {len(skipped)} file(s) unchanged since last optimization, skipped")
+    if not pending:
+        return [], skipped
+
+    pending.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+    precisions = {path: precision for path, _, precision in pending}
+    results = []
+
+    def finished(result):
+        results.append(result)
+        name = result['path']
+        if result['status'] == 'error':
+            log(f"  ERROR: {name} could not be optimized ({result['error']}), left unchanged")
+            return
+        manifest.record_output(step, name, {'precision': precisions[name]})
+        original, new = result['original'], result['new']
+        reduction = (original - new) / original * 100 if original else 0
+        backup = f", backup {result['backup']}" if result['backup'] else ''
+        log(f"  [OK] {name}: {original / 1024 / 1024:.2f} MB -> {new / 1024 / 1024:.2f} MB "
+            f"({reduction:.1f}% smaller, {result['status']}{backup}, {result['seconds']:.1f}s)")
+
+    if workers == 1 or len(pending) == 1:
+        for job in pending:
+            finished(optimize_file(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(optimize_file, *job) for job in pending]
+            for future in as_completed(futures):
+                finished(future.result())
+    return results, skipped
+
+
+def print_summary(results):
+    """Totals over optimize_files() results"""
+    total_original = sum(r['original'] for r in results)
+    total_new = sum(r['new'] for r in results)
+    total_reduction = ((total_original - total_new) / total_original) * 100 if total_original > 0 else 0
+    print(f"\nTotal original size:  {total_original / 1024 / 1024:.2f} MB")
+    print(f"Total optimized size: {total_new / 1024 / 1024:.2f} MB")
+    print(f"Total reduction:      {total_reduction:.1f}% ({(total_original - total_new) / 1024 / 1024:.2f} MB saved)")
+    errors = [r for r in results if r['status'] == 'error']
+    if errors:
+        print(f"\nERROR: {len(errors)} file(s) could not be optimized and were left unchanged")
+    return total_original, total_new
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Precompressed .gz / .br siblings for the dashboard's static data files
+
+Static hosts either compress large files like roads_by_region/Bay_roads.js
+on every request or serve them uncompressed. This writes path.gz (gzip level
+9) and path.br (brotli quality 11) next to each file once, at maximum
+compression, so the host can serve them as they are (nginx gzip_static /
+brotli_static, or the equivalent rewrite on other hosts).
+
+Files are compressed in parallel in a process pool. A file whose SHA-256 and
+settings match the build manifest, and whose siblings still exist, is
+skipped. Brotli needs the optional `brotli` package; without it only .gz
+files are written.
+
+    python precompress.py roads_by_region/*.js data.js
+"""
+
+import argparse
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from build_manifest import MANIFEST_FILE, BuildManifest
+from optimizer_engine import write_atomic
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STEP = 'precompress'
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+FORMATS = ['gz', 'br']
+
+
+def available_formats(formats=FORMATS):
+    """formats minus brotli when the package is not installed"""
+    return [fmt for fmt in formats if fmt != 'br' or brotli is not None]
+
+
+def compress_file(path, formats=FORMATS):
+    """Write path.gz / path.br; returns {'path', 'raw', fmt: bytes, fmt + '_time': seconds}"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    result = {'path': path, 'raw': len(data)}
+    for fmt in formats:
+        start = time.perf_counter()
+        if fmt == 'gz':
+            # mtime=0 keeps the output identical for identical input
+            compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        else:
+            compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+        result[fmt + '_time'] = time.perf_counter() - start
+        write_atomic(f'{path}.{fmt}', compressed)
+        result[fmt] = len(compressed)
+    return result
+
+
+def precompress(paths, manifest, formats=FORMATS, workers=None, log=print):
+    """
+    Compress every path that changed since it was last compressed; returns
+    (results, skipped paths). The manifest is updated but not saved.
+    """
+    formats = available_formats(formats)
+    params = {'formats': formats, 'gzip_level': GZIP_LEVEL, 'brotli_quality': BROTLI_QUALITY}
+    pending, skipped = [], []
+    for path in paths:
+        path = str(path)
+        siblings_exist = all(os.path.exists(f'{path}.{fmt}') for fmt in formats)
+        if siblings_exist and manifest.is_current(STEP, path, params):
+            skipped.append(path)
+        else:
+            pending.append(path)
+    if not pending:
+        return [], skipped
+
+    log(f"Compressing {len(pending)} file(s) to {', '.join('.' + fmt for fmt in formats)} "
+        f"({len(skipped)} unchanged)...")
+    if workers == 1 or len(pending) == 1:
+        results = [compress_file(path, formats) for path in pending]
+    else:
+        # Largest first so one big file does not start last and hold up the pool
+        pending.sort(key=os.path.getsize, reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(compress_file, pending, [formats] * len(pending)))
+    for result in results:
+        manifest.record_output(STEP, result['path'], params)
+    return sorted(results, key=lambda r: r['path']), skipped
+
+
+def print_report(results, skipped=()):
+    """Per-file raw / gzip / brotli sizes and compression times"""
+    if not results:
+        print(f"\nPrecompression: {len(skipped)} file(s) unchanged, nothing to do")
+        return
+    formats = [fmt for fmt in FORMATS if fmt in results[0]]
+    header = f"{'File':<40} {'Raw MB':>9}"
+    for fmt in formats:
+        header += f" {fmt + ' MB':>9} {'ratio':>6} {'time s':>7}"
+    print("\n" + header)
+    print("-" * len(header))
+    totals = {'raw': 0}
+    for result in results:
+        line = f"{os.path.basename(result['path'])[:40]:<40} {result['raw'] / 1024 / 1024:>9.2f}"
+        totals['raw'] += result['raw']
+        for fmt in formats:
+            line += (f" {result[fmt] / 1024 / 1024:>9.2f} {result[fmt] / result['raw'] * 100 if result['raw'] else 0:>5.1f}%"
+                     f" {result[fmt + '_time']:>7.2f}")
+            totals[fmt] = totals.get(fmt, 0) + result[fmt]
+            totals[fmt + '_time'] = totals.get(fmt + '_time', 0) + result[fmt + '_time']
+        print(line)
+    line = f"{'Total':<40} {totals['raw'] / 1024 / 1024:>9.2f}"
+    for fmt in formats:
+        line += (f" {totals[fmt] / 1024 / 1024:>9.2f} {totals[fmt] / totals['raw'] * 100 if totals['raw'] else 0:>5.1f}%"
+                 f" {totals[fmt + '_time']:>7.2f}")
+    print("-" * len(header))
+    print(line)
+    if skipped:
+        print(f"({len(skipped)} unchanged file(s) skipped)")
+    if brotli is None:
+        print("Note: brotli is not installed (pip install brotli), so no .br files were written")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write precompressed .gz/.br siblings of static data files')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+    parser.add_argument('--workers', type=int, help='Parallel compression processes (default: CPU count)')
+    parser.add_argument('--manifest', default=MANIFEST_FILE,
+                        help=f'Build manifest used to skip unchanged files (default: {MANIFEST_FILE})')
+    args = parser.parse_args()
+
+    manifest = BuildManifest(args.manifest)
+    start = time.perf_counter()
+    results, skipped = precompress(args.paths, manifest, args.formats, args.workers)
+    manifest.save()
+    print_report(results, skipped)
+    print(f"\n[OK] Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,150 +2,585 @@
 Process OSM Roads data by clipping to ADM1 regions
 Extract only essential fields: fclass, Length_m, Source_Yea
 Creates separate lightweight JSON files per region
+
+Roads_json.json (610MB ESRI JSON) is read as a stream: the `features` array is
+decoded one record at a time and every road is written straight to its
+region's files, so memory stays flat no matter how big the input is. Use
+--load-all to fall back to a single json.load of the whole file.
+
+Outputs are written once, minified at 6 decimals, to both the .geojson and
+the .js wrapper; they do not need a separate optimize_roads_js.py pass.
 """
+import argparse
+import codecs
 import json
-from shapely.geometry import shape, LineString, MultiLineString, Point
-from shapely.ops import unary_union
+import math
 import os
+import re
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from boundary_cache import BoundaryCache
+from build_manifest import MANIFEST_FILE, BuildManifest, sha256_bytes
+from geojson_writer import FeatureCollectionWriter, compact_feature
+from shapely import STRtree, get_parts
+from shapely.geometry import MultiLineString, mapping, shape
+from shapely.prepared import prep
 
 # Force UTF-8 encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
-print("="*60)
-print("Processing Roads by Region - ADM1 Clip")
-print("="*60)
+# Bytes read from Roads_json.json per refill of the streaming buffer
+STREAM_CHUNK_SIZE = 1024 * 1024
 
-# Load ADM1 boundaries from data.js
-print("\n[1/4] Loading ADM1 boundaries from data.js...")
-with open('data.js', 'r', encoding='utf-8') as f:
-    data_js = f.read()
+# Bump when the output format changes so the build manifest forces a full rebuild
+BUILD_VERSION = 2
 
-# Extract the adm1Boundaries JSON from the JavaScript file
-import re
-match = re.search(r'const adm1Boundaries = ({.*?});', data_js, re.DOTALL)
-if not match:
-    print("❌ ERROR: Could not find adm1Boundaries in data.js")
-    exit(1)
-
-adm1_data = json.loads(match.group(1))
-print(f"✓ Loaded {len(adm1_data['features'])} regions")
-
-# Create region polygons dictionary
-region_polygons = {}
-for feature in adm1_data['features']:
-    region_name = feature['properties'].get('name') or feature['properties'].get('ADM1_EN')
-    if region_name:
-        region_polygons[region_name] = shape(feature['geometry'])
-        print(f"  • {region_name}")
+# Decimal places kept in road coordinates (~11cm), as optimize_roads_js.py uses
+ROADS_PRECISION = 6
 
-# Load Roads data
-print(f"\n[2/4] Loading Roads data (this may take a while - 610MB file)...")
-with open('Roads_json.json', 'r', encoding='utf-8') as f:
-    roads_data = json.load(f)
+# Road records per work unit handed to the assigner (and to each pool worker)
+CHUNK_SIZE = 5000
 
-total_roads = len(roads_data['features'])
-print(f"✓ Loaded {total_roads:,} road segments")
+# Mean Earth radius used for road lengths (same as the dashboard's haversine)
+EARTH_RADIUS_M = 6371000
 
-# Process roads by region
-print("\n[3/4] Clipping roads to regions...")
-roads_by_region = {region: [] for region in region_polygons.keys()}
-unassigned_count = 0
+# Whitespace and separators between records of a JSON array
+_ARRAY_SEPARATOR = re.compile(r'[\s,]*')
 
-for i, road in enumerate(roads_data['features']):
-    if (i + 1) % 1000 == 0:
-        print(f"  Processing road {i+1:,}/{total_roads:,} ({(i+1)/total_roads*100:.1f}%)")
 
+def peak_memory_mb(children=False):
+    """
+    Peak resident memory in MB of this process, or of the largest finished
+    child process when children=True (None where unsupported)
+    """
     try:
-        # Convert ESRI JSON format to GeoJSON format
-        # ESRI format: {"paths": [[[x,y], [x,y]...]]}
-        # GeoJSON format: {"type": "LineString", "coordinates": [[x,y], [x,y]...]}
-
-        esri_geom = road['geometry']
-        if 'paths' not in esri_geom or not esri_geom['paths']:
-            continue
-
+        import resource
+    except ImportError:
+        # No resource module on Windows
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def format_memory(mb):
+    return f"{mb:,.1f} MB" if mb is not None else "n/a"
+
+
+class RoadFeatureStream:
+    """
+    Iterate over the records of a top-level JSON array (ESRI `features`)
+    without loading the whole file.
+
+    The file is read in fixed-size chunks and each record is decoded with
+    json.JSONDecoder.raw_decode as soon as it is complete, so only the record
+    being decoded (plus one chunk) is held in memory.
+    """
+
+    def __init__(self, path, key='features', chunk_size=STREAM_CHUNK_SIZE):
+        self.path = path
+        self.key = key
+        self.chunk_size = chunk_size
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+
+    def _read(self, f, decoder):
+        chunk = f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        return decoder.decode(chunk, final=not chunk)
+
+    def _seek_array(self, f, decoder):
+        """Return the buffered text following the opening '[' of the array"""
+        marker = f'"{self.key}"'
+        buf = ''
+        while True:
+            chunk = self._read(f, decoder)
+            if not chunk:
+                raise ValueError(f"'{self.key}' array not found in {self.path}")
+            buf += chunk
+            idx = buf.find(marker)
+            if idx == -1:
+                # Keep the tail in case the key spans two chunks
+                buf = buf[-len(marker):]
+                continue
+            bracket = buf.find('[', idx + len(marker))
+            if bracket != -1:
+                return buf[bracket + 1:]
+            buf = buf[idx:]
+
+    def __iter__(self):
+        json_decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder('utf-8')()
+        with open(self.path, 'rb') as f:
+            buf = self._seek_array(f, text_decoder)
+            pos = 0
+            while True:
+                pos = _ARRAY_SEPARATOR.match(buf, pos).end()
+                if pos >= len(buf):
+                    chunk = self._read(f, text_decoder)
+                    if not chunk:
+                        return
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                    continue
+                if buf[pos] == ']':
+                    return
+                try:
+                    record, end = json_decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Record is split across chunks - pull in more text
+                    chunk = self._read(f, text_decoder)
+                    if not chunk:
+                        raise
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                    continue
+                yield record
+                pos = end
+
+    @property
+    def progress(self):
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+
+def load_region_polygons(data_js_path):
+    """Load ADM1 boundaries from data.js (via boundary_cache.py) into a {region name: polygon} dict"""
+    region_polygons = BoundaryCache.open(data_js_path).polygons(level=1)
+    if not region_polygons:
+        print("❌ ERROR: Could not find adm1Boundaries in data.js")
+        sys.exit(1)
+
+    print(f"✓ Loaded {len(region_polygons)} regions")
+    for region_name in region_polygons:
+        print(f"  • {region_name}")
+    return region_polygons
+
+
+class RegionAssigner:
+    """
+    Find the region containing a road centroid.
+
+    Region polygons go into an STRtree, so a centroid is only tested against
+    the one or two regions whose bounding box contains it. Candidates are
+    checked with prepared geometries in region_polygons order, which keeps the
+    same first-match result as looping over every region.
+    """
+
+    def __init__(self, region_polygons):
+        self.names = list(region_polygons.keys())
+        self.polygons = list(region_polygons.values())
+        self.prepared = [prep(poly) for poly in self.polygons]
+        self.tree = STRtree(self.polygons)
+
+    def assign(self, point):
+        """Return the name of the region containing point, or None"""
+        for idx in sorted(self.tree.query(point)):
+            if self.prepared[idx].contains(point):
+                return self.names[idx]
+        return None
+
+    def clip(self, geom):
+        """
+        Split a road geometry along region borders.
+
+        Returns a list of (region name, part) in region order. A road whose
+        bounding box lies inside a single region comes back whole without any
+        intersection; only roads whose box crosses a border are intersected
+        with each candidate region.
+        """
+        candidates = sorted(self.tree.query(geom))
+        envelope = geom.envelope
+        for idx in candidates:
+            if self.prepared[idx].contains(envelope):
+                return [(self.names[idx], geom)]
+
+        parts = []
+        for idx in candidates:
+            if not self.prepared[idx].intersects(geom):
+                continue
+            lines = [part for part in get_parts(geom.intersection(self.polygons[idx]))
+                     if part.geom_type == 'LineString' and not part.is_empty]
+            if lines:
+                parts.append((self.names[idx], lines[0] if len(lines) == 1 else MultiLineString(lines)))
+        return parts
+
+
+def haversine_length_m(geom):
+    """Great-circle length of a (Multi)LineString in lon/lat degrees, in metres"""
+    total = 0.0
+    for line in get_parts(geom):
+        coords = line.coords
+        for (lon1, lat1), (lon2, lat2) in zip(coords, coords[1:]):
+            phi1, phi2 = math.radians(lat1), math.radians(lat2)
+            dphi = phi2 - phi1
+            dlmb = math.radians(lon2 - lon1)
+            a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+            total += 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+    return total
+
+
+def convert_road(road, all_paths=False):
+    """
+    Convert an ESRI road record to a slim GeoJSON Feature.
+    Returns None when the record has no usable geometry.
+
+    By default only the first path is kept (LineString). With all_paths every
+    path is kept and multi-path roads become a MultiLineString.
+    """
+    # ESRI format: {"paths": [[[x,y], [x,y]...]]}
+    # GeoJSON format: {"type": "LineString", "coordinates": [[x,y], [x,y]...]}
+    esri_geom = road.get('geometry') or {}
+    if 'paths' not in esri_geom or not esri_geom['paths']:
+        return None
+
+    if all_paths:
+        paths = [path for path in esri_geom['paths'] if len(path) >= 2]
+        if not paths:
+            return None
+        if len(paths) == 1:
+            geometry = {'type': 'LineString', 'coordinates': paths[0]}
+        else:
+            geometry = {'type': 'MultiLineString', 'coordinates': paths}
+    else:
         # For LineString, take the first path
         coords = esri_geom['paths'][0]
         if not coords:
-            continue
-
-        geojson_geom = {
-            'type': 'LineString',
-            'coordinates': coords
+            return None
+        geometry = {'type': 'LineString', 'coordinates': coords}
+
+    attributes = road.get('attributes') or {}
+    return {
+        'type': 'Feature',
+        'geometry': geometry,
+        'properties': {
+            'fclass': attributes.get('fclass', 'unknown'),
+            'Length_m': attributes.get('Length_m', 0),
+            'Source_Yea': attributes.get('Source_Yea', '2023')
         }
+    }
+
+
+def clip_feature(feature, assigner):
+    """
+    Split a converted road feature along region borders.
+
+    Returns ([(region name, feature)], dropped length in metres). Roads
+    inside one region are returned unchanged; clipped pieces get the road's
+    Length_m shared out in proportion to their great-circle length. The share
+    of any stretch outside every region (across the border or in a gap of the
+    boundary coverage) is not assigned to a piece and is returned as dropped,
+    so the pieces add up to the original length only when nothing was dropped.
+    """
+    geom = shape(feature['geometry'])
+    parts = assigner.clip(geom)
+    if len(parts) == 1 and parts[0][1] is geom:
+        return [(parts[0][0], feature)], 0.0
+
+    total_length = haversine_length_m(geom)
+    length_m = float(feature['properties'].get('Length_m') or 0) or total_length
+    clipped = []
+    kept_m = 0.0
+    for region_name, part in parts:
+        properties = dict(feature['properties'])
+        if total_length > 0:
+            share_m = length_m * haversine_length_m(part) / total_length
+            kept_m += share_m
+            # Rounded like the other outputs so reruns stay byte-stable
+            properties['Length_m'] = round(share_m, 2)
+        clipped.append((region_name, {
+            'type': 'Feature',
+            'geometry': mapping(part),
+            'properties': properties
+        }))
+    return clipped, max(length_m - kept_m, 0.0) if total_length > 0 else 0.0
+
+
+def assign_chunk(roads, first_index, assigner, exact=False):
+    """
+    Convert and assign one chunk of ESRI road records.
+
+    Returns (assigned, unassigned_count, warnings, dropped_m) where assigned is a list of
+    (region name, feature as minified JSON at ROADS_PRECISION) in input order. With exact=True
+    roads keep all their paths and are clipped at region borders instead of
+    being assigned whole by centroid; dropped_m is the Length_m of the
+    stretches outside every region.
+    """
+    assigned = []
+    warnings = []
+    unassigned_count = 0
+    dropped_m = 0.0
+
+    for i, road in enumerate(roads, first_index + 1):
+        try:
+            feature = convert_road(road, all_paths=exact)
+            if feature is None:
+                continue
+
+            if exact:
+                pieces, dropped = clip_feature(feature, assigner)
+                dropped_m += dropped
+                for region_name, piece in pieces:
+                    assigned.append((region_name, compact_feature(piece, ROADS_PRECISION)))
+                if not pieces:
+                    unassigned_count += 1
+                continue
+
+            # Centroid point-in-polygon test (faster than full intersection)
+            centroid = shape(feature['geometry']).centroid
+
+            # Find which region contains this road
+            region_name = assigner.assign(centroid)
+            if region_name is not None:
+                assigned.append((region_name, compact_feature(feature, ROADS_PRECISION)))
+            else:
+                unassigned_count += 1
+
+        except Exception as e:
+            warnings.append(f"Error processing road {i}: {e}")
+            continue
 
-        # Get road geometry using GeoJSON format
-        road_geom = shape(geojson_geom)
-
-        # Get centroid for point-in-polygon test (faster than full intersection)
-        centroid = road_geom.centroid
-
-        # Find which region contains this road
-        assigned = False
-        for region_name, region_poly in region_polygons.items():
-            if region_poly.contains(centroid):
-                # Extract only essential fields
-                simplified_road = {
-                    'type': 'Feature',
-                    'geometry': geojson_geom,
-                    'properties': {
-                        'fclass': road['attributes'].get('fclass', 'unknown'),
-                        'Length_m': road['attributes'].get('Length_m', 0),
-                        'Source_Yea': road['attributes'].get('Source_Yea', '2023')
-                    }
-                }
-                roads_by_region[region_name].append(simplified_road)
-                assigned = True
+    return assigned, unassigned_count, warnings, dropped_m
+
+
+def iter_chunks(roads, size):
+    """
+    Group the road stream into lists of up to size records, yielding
+    (index of the chunk's first record in the stream, chunk)
+    """
+    chunk = []
+    first_index = 0
+    for road in roads:
+        chunk.append(road)
+        if len(chunk) == size:
+            yield first_index, chunk
+            first_index += size
+            chunk = []
+    if chunk:
+        yield first_index, chunk
+
+
+# Per-process assigner and mode, set once by the pool initializer
+_worker_assigner = None
+_worker_exact = False
+
+
+def _init_worker(region_polygons, exact):
+    global _worker_assigner, _worker_exact
+    _worker_assigner = RegionAssigner(region_polygons)
+    _worker_exact = exact
+
+
+def _assign_chunk_in_worker(roads, first_index):
+    return assign_chunk(roads, first_index, _worker_assigner, _worker_exact)
+
+
+def _map_chunks_in_pool(chunks, region_polygons, workers, exact):
+    """
+    Run assign_chunk over iter_chunks() output in a process pool and yield (chunk size,
+    result) in the original chunk order. At most 2 chunks per worker are in
+    flight so the stream is never read far ahead of the merge.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(region_polygons, exact)) as pool:
+        pending = deque()
+        for first_index, chunk in chunks:
+            pending.append((len(chunk), pool.submit(_assign_chunk_in_worker, chunk, first_index)))
+            if len(pending) >= workers * 2:
+                size, future = pending.popleft()
+                yield size, future.result()
+        while pending:
+            size, future = pending.popleft()
+            yield size, future.result()
+
+
+def assign_roads(roads, region_polygons, sink, progress=None, workers=1, exact=False,
+                 chunk_size=CHUNK_SIZE):
+    """
+    Assign each road to the region containing its centroid and hand it to
+    sink.add_line(region, feature_json). Returns (processed_count,
+    unassigned_count, Length_m dropped outside every region by exact clipping).
+
+    With workers > 1 chunks are assigned in a process pool and merged back in
+    input order, so the sink sees exactly the same sequence as a serial run.
+    exact=True clips border-crossing roads instead of assigning by centroid.
+    """
+    chunks = iter_chunks(roads, chunk_size)
+    if workers > 1:
+        results = _map_chunks_in_pool(chunks, region_polygons, workers, exact)
+    else:
+        assigner = RegionAssigner(region_polygons)
+        results = ((len(chunk), assign_chunk(chunk, first_index, assigner, exact))
+                   for first_index, chunk in chunks)
+
+    processed = 0
+    unassigned_count = 0
+    dropped_m = 0.0
+    start = time.perf_counter()
+
+    for size, (assigned, unassigned, warnings, dropped) in results:
+        for region_name, line in assigned:
+            sink.add_line(region_name, line)
+        for warning in warnings:
+            print(f"  ⚠ Warning: {warning}")
+        unassigned_count += unassigned
+        dropped_m += dropped
+        processed += size
+        if progress is not None:
+            progress(processed, time.perf_counter() - start)
+
+    return processed, unassigned_count, dropped_m
+
+
+def region_file_names(region_name):
+    """Output file names for a region: (<Region>_roads.geojson, <Region>_roads.js, JS var name)"""
+    safe_name = region_name.replace(' ', '_').replace('/', '_')
+    return f'{safe_name}_roads.geojson', f'{safe_name}_roads.js', f'{safe_name.lower()}Roads'
+
+
+def boundary_fingerprints(region_polygons):
+    """Content hash and bounding box of every region polygon"""
+    return {
+        name: {'hash': sha256_bytes(poly.wkb), 'bbox': list(poly.bounds)}
+        for name, poly in region_polygons.items()
+    }
+
+
+def _boxes_overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def plan_rebuild(manifest, state, params, roads_hash, boundaries, output_dir, force=False):
+    """
+    Decide which regions need their road files regenerated.
+
+    Returns {region name: reason}. A changed boundary can move roads into or
+    out of any region it overlaps, so regions whose bounding box touches the
+    old or new box of a changed region are rebuilt too.
+    """
+    if force:
+        return {name: 'forced rebuild' for name in boundaries}
+    if not state:
+        return {name: 'no previous build' for name in boundaries}
+    if state.get('params') != params:
+        return {name: 'script version or parameters changed' for name in boundaries}
+    if state.get('roads') != roads_hash:
+        return {name: 'roads input changed' for name in boundaries}
+
+    previous = state.get('regions', {})
+    dirty = {}
+    changed_boxes = []
+    for name, boundary in boundaries.items():
+        old = previous.get(name)
+        if old is None:
+            dirty[name] = 'new region'
+            changed_boxes.append(boundary['bbox'])
+        elif old['boundary'] != boundary['hash']:
+            dirty[name] = 'boundary changed'
+            changed_boxes.extend([old['bbox'], boundary['bbox']])
+    for name, old in previous.items():
+        if name not in boundaries:
+            changed_boxes.append(old['bbox'])
+
+    for name, boundary in boundaries.items():
+        if name in dirty:
+            continue
+        if any(_boxes_overlap(boundary['bbox'], other) for other in changed_boxes):
+            dirty[name] = 'neighbouring boundary changed'
+            continue
+        for file_name in previous[name]['files']:
+            if not manifest.is_unchanged(os.path.join(output_dir, file_name)):
+                dirty[name] = 'output missing or modified'
                 break
+    return dirty
+
+
+class RegionOutputs:
+    """
+    One FeatureCollectionWriter per region being rebuilt. Features are teed
+    into <Region>_roads.geojson and <Region>_roads.js as they are assigned,
+    so nothing accumulates in memory and each feature is serialized once.
+    """
+
+    def __init__(self, regions, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.writers = {}
+        for region_name in regions:
+            geojson_name, js_name, var_name = region_file_names(region_name)
+            self.writers[region_name] = FeatureCollectionWriter(
+                os.path.join(output_dir, geojson_name), os.path.join(output_dir, js_name),
+                var_name, precision=ROADS_PRECISION)
+
+    def add_line(self, region, line):
+        """Append a feature already serialized with compact_feature()"""
+        writer = self.writers.get(region)
+        if writer is not None:
+            writer.add_json(line)
+
+    def discard(self):
+        for writer in self.writers.values():
+            writer.discard()
+
+
+def save_region_files(outputs, manifest, state):
+    """
+    Finish the regional files written by outputs.
+
+    If a region's new GeoJSON matches the content hash recorded for it and
+    the files on disk are still the ones the pipeline last produced, the old
+    files are kept untouched; otherwise the new files replace them.
+    """
+    output_dir = outputs.output_dir
+    region_stats = []
+    regions_state = state.setdefault('regions', {})
+
+    for region_name, writer in outputs.writers.items():
+        geojson_name, js_name, _ = region_file_names(region_name)
+        geojson_file = os.path.join(output_dir, geojson_name)
+        js_file = os.path.join(output_dir, js_name)
+        previous = regions_state.get(region_name, {})
+        road_count = writer.count
+
+        content = writer.close({
+            'region': region_name,
+            'total_roads': road_count,
+            'data_source': 'OpenStreetMap Somalia Roads 2023',
+            'fields': ['fclass', 'Length_m', 'Source_Yea']
+        })
 
-        if not assigned:
-            unassigned_count += 1
-
-    except Exception as e:
-        print(f"  ⚠ Warning: Error processing road {i+1}: {e}")
-        continue
-
-print(f"\n✓ Road processing complete")
-print(f"  • Assigned: {total_roads - unassigned_count:,}")
-print(f"  • Unassigned: {unassigned_count:,}")
-
-# Save separate files per region
-print("\n[4/4] Saving regional road files...")
-
-output_dir = 'roads_by_region'
-os.makedirs(output_dir, exist_ok=True)
-
-region_stats = []
-
-for region_name, roads in roads_by_region.items():
-    if len(roads) > 0:
-        # Create GeoJSON for this region
-        region_geojson = {
-            'type': 'FeatureCollection',
-            'metadata': {
-                'region': region_name,
-                'total_roads': len(roads),
-                'data_source': 'OpenStreetMap Somalia Roads 2023',
-                'fields': ['fclass', 'Length_m', 'Source_Yea']
-            },
-            'features': roads
-        }
-
-        # Save GeoJSON
-        safe_name = region_name.replace(' ', '_').replace('/', '_')
-        geojson_file = os.path.join(output_dir, f'{safe_name}_roads.geojson')
-
-        with open(geojson_file, 'w', encoding='utf-8') as f:
-            json.dump(region_geojson, f, indent=2)
-
-        # Create JavaScript version
-        js_content = f"var {safe_name.lower()}Roads = {json.dumps(region_geojson, indent=2)};"
-        js_file = os.path.join(output_dir, f'{safe_name}_roads.js')
+        if road_count == 0:
+            # Region no longer has roads - drop stale outputs
+            writer.discard()
+            for file_name in previous.get('files', []):
+                path = os.path.join(output_dir, file_name)
+                if os.path.exists(path):
+                    os.remove(path)
+                manifest.forget_file(path)
+            regions_state[region_name] = dict(previous, content=None, roads=0, files=[])
+            continue
 
-        with open(js_file, 'w', encoding='utf-8') as f:
-            f.write(js_content)
+        unchanged = (content == previous.get('content') and
+                     all(manifest.is_unchanged(os.path.join(output_dir, name))
+                         for name in previous.get('files', [])))
+        if unchanged:
+            writer.discard()
+            status = 'unchanged, kept'
+        else:
+            writer.commit()
+            # Written at the optimizers' final precision and minified, so
+            # optimize_geojson.py / optimize_roads_js.py can skip these files
+            manifest.record_output('optimize_geojson', geojson_file, {'precision': ROADS_PRECISION})
+            manifest.record_output('optimize_roads_js', js_file, {'precision': ROADS_PRECISION})
+            status = 'written'
+
+        regions_state[region_name] = dict(previous, content=content, roads=road_count,
+                                          files=[geojson_name, js_name])
 
         # Calculate file sizes
         geojson_size = os.path.getsize(geojson_file) / (1024 * 1024)
@@ -153,31 +588,161 @@ for region_name, roads in roads_by_region.items():
 
         region_stats.append({
             'region': region_name,
-            'roads': len(roads),
+            'roads': road_count,
             'geojson_size': geojson_size,
             'js_size': js_size
         })
 
-        print(f"  ✓ {region_name}: {len(roads):,} roads ({js_size:.2f} MB)")
-
-# Print summary
-print("\n" + "="*60)
-print("PROCESSING COMPLETE - SUMMARY")
-print("="*60)
-
-region_stats.sort(key=lambda x: x['roads'], reverse=True)
-
-print(f"\nTotal Regions: {len(region_stats)}")
-print(f"\nTop 10 Regions by Road Count:")
-for i, stat in enumerate(region_stats[:10], 1):
-    print(f"  {i:2}. {stat['region']:<25} {stat['roads']:>6,} roads ({stat['js_size']:>6.2f} MB)")
-
-total_size = sum(s['js_size'] for s in region_stats)
-print(f"\nTotal file size (all regions): {total_size:.2f} MB")
-print(f"Original file size: 610.00 MB")
-print(f"Size reduction: {(1 - total_size/610)*100:.1f}%")
-
-print(f"\n✓ All files saved to '{output_dir}/' directory")
-print("\nFiles created per region:")
-print("  • [RegionName]_roads.geojson - GeoJSON format")
-print("  • [RegionName]_roads.js - JavaScript format for dashboard")
+        print(f"  ✓ {region_name}: {road_count:,} roads ({js_size:.2f} MB, {status})")
+
+    return region_stats
+
+
+def print_summary(region_stats, output_dir):
+    print("\n" + "="*60)
+    print("PROCESSING COMPLETE - SUMMARY")
+    print("="*60)
+
+    region_stats.sort(key=lambda x: x['roads'], reverse=True)
+
+    print(f"\nTotal Regions: {len(region_stats)}")
+    print(f"\nTop 10 Regions by Road Count:")
+    for i, stat in enumerate(region_stats[:10], 1):
+        print(f"  {i:2}. {stat['region']:<25} {stat['roads']:>6,} roads ({stat['js_size']:>6.2f} MB)")
+
+    total_size = sum(s['js_size'] for s in region_stats)
+    print(f"\nTotal file size (all regions): {total_size:.2f} MB")
+    print(f"Original file size: 610.00 MB")
+    print(f"Size reduction: {(1 - total_size/610)*100:.1f}%")
+
+    print(f"\n✓ All files saved to '{output_dir}/' directory")
+    print("\nFiles created per region:")
+    print("  • [RegionName]_roads.geojson - GeoJSON format")
+    print("  • [RegionName]_roads.js - JavaScript format for dashboard")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Clip OSM roads to ADM1 regions')
+    parser.add_argument('--roads', default='Roads_json.json',
+                        help='ESRI JSON roads file (default: Roads_json.json)')
+    parser.add_argument('--data-js', default='data.js',
+                        help='Dashboard data file with adm1Boundaries (default: data.js)')
+    parser.add_argument('--output-dir', default='roads_by_region',
+                        help='Output directory (default: roads_by_region)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Assign roads in N worker processes (default: 1, serial)')
+    parser.add_argument('--exact', action='store_true',
+                        help='Keep every ESRI path and clip roads that cross region borders '
+                             '(Length_m is split between the clipped pieces)')
+    parser.add_argument('--load-all', action='store_true',
+                        help='Load the whole roads file with json.load instead of streaming it')
+    parser.add_argument('--manifest', default=MANIFEST_FILE,
+                        help=f'Build manifest used for incremental rebuilds (default: {MANIFEST_FILE})')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild every region even if its inputs are unchanged')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='List the regions that would be rebuilt and exit')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("Processing Roads by Region - ADM1 Clip")
+    print("="*60)
+
+    # Load ADM1 boundaries from data.js
+    print("\n[1/4] Loading ADM1 boundaries from data.js...")
+    region_polygons = load_region_polygons(args.data_js)
+
+    # Work out which regions changed since the last build
+    manifest = BuildManifest(args.manifest)
+    state = manifest.step('process_roads_by_region')
+    params = {'build_version': BUILD_VERSION, 'exact': args.exact}
+    roads_hash = manifest.file_hash(args.roads)
+    boundaries = boundary_fingerprints(region_polygons)
+    dirty = plan_rebuild(manifest, state, params, roads_hash, boundaries, args.output_dir, args.force)
+    removed = [name for name in state.get('regions', {}) if name not in boundaries]
+
+    print(f"\n✓ {len(dirty)} of {len(boundaries)} regions need rebuilding")
+    for region_name, reason in dirty.items():
+        print(f"  • {region_name}: {reason}")
+    for region_name in removed:
+        print(f"  • {region_name}: removed from data.js (outputs will be deleted)")
+    if args.dry_run:
+        print("\nDry run - nothing written")
+        return
+    if not dirty and not removed:
+        print("\n✓ All regional road files are up to date")
+        return
+
+    input_mb = os.path.getsize(args.roads) / (1024 * 1024)
+    if args.load_all:
+        print(f"\n[2/4] Loading Roads data (this may take a while - {input_mb:.0f}MB file)...")
+        with open(args.roads, 'r', encoding='utf-8') as f:
+            roads = json.load(f)['features']
+        total_roads = len(roads)
+        print(f"✓ Loaded {total_roads:,} road segments")
+
+        def progress(done, elapsed):
+            print(f"  Processing road {done:,}/{total_roads:,} ({done/total_roads*100:.1f}%)")
+    else:
+        print(f"\n[2/4] Streaming Roads data ({input_mb:.0f}MB file, one feature at a time)...")
+        roads = RoadFeatureStream(args.roads)
+
+        def progress(done, elapsed):
+            rate = done / elapsed if elapsed > 0 else 0
+            print(f"  Processing road {done:,} ({roads.progress*100:.1f}% of input, {rate:,.0f} features/s)")
+
+    # Process roads by region
+    mode = 'exact border clipping' if args.exact else 'centroid assignment'
+    if args.workers > 1:
+        print(f"\n[3/4] Clipping roads to regions ({mode}, {args.workers} worker processes)...")
+    else:
+        print(f"\n[3/4] Clipping roads to regions ({mode})...")
+    start = time.perf_counter()
+    outputs = RegionOutputs(dirty.keys(), args.output_dir)
+    try:
+        total_roads, unassigned_count, dropped_m = assign_roads(roads, region_polygons, outputs, progress,
+                                                                workers=args.workers, exact=args.exact)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n✓ Road processing complete")
+        print(f"  • Assigned: {total_roads - unassigned_count:,}")
+        print(f"  • Unassigned: {unassigned_count:,}")
+        if args.exact:
+            print(f"  • Length outside every region (dropped): {dropped_m / 1000:,.1f} km")
+        print(f"  • Throughput: {total_roads / elapsed if elapsed > 0 else 0:,.0f} features/s ({elapsed:.1f}s)")
+        print(f"  • Peak memory: {format_memory(peak_memory_mb())}")
+        if args.workers > 1:
+            print(f"  • Peak memory per worker: {format_memory(peak_memory_mb(children=True))}")
+
+        # Finish the per-region files written during assignment
+        print("\n[4/4] Saving regional road files...")
+        region_stats = save_region_files(outputs, manifest, state)
+    except BaseException:
+        outputs.discard()
+        raise
+
+    # Record what this build was made from
+    regions_state = state.setdefault('regions', {})
+    for region_name in dirty:
+        regions_state[region_name].update(boundary=boundaries[region_name]['hash'],
+                                          bbox=boundaries[region_name]['bbox'])
+    for region_name in removed:
+        for file_name in regions_state.pop(region_name).get('files', []):
+            path = os.path.join(args.output_dir, file_name)
+            if os.path.exists(path):
+                os.remove(path)
+            manifest.forget_file(path)
+    state['params'] = params
+    state['roads'] = roads_hash
+    manifest.record_file(args.roads, roads_hash)
+    manifest.save()
+
+    print_summary(region_stats, args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
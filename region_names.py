@@ -0,0 +1,30 @@
+"""
+Region names shared by the nightlight scripts
+
+The dashboard names a region 'Lower Shabelle'. Its files use the slug
+(lower_shabelle_nightlight_2023.js) and its data scripts a camelCase variable
+(const lowerShabelleNightlight2023 = ...). This module has no dependencies, so
+readers of the point files need not import the extraction backends.
+"""
+import os
+
+
+def region_slug(region):
+    """'Lower Shabelle' -> 'lower_shabelle' (file names)"""
+    return region.lower().replace(' ', '_').replace('-', '_')
+
+
+def region_title(slug):
+    """'lower_shabelle' -> 'Lower Shabelle'"""
+    return slug.replace('_', ' ').title()
+
+
+def region_var(region):
+    """'Lower Shabelle' -> 'lowerShabelle' (JavaScript variable names)"""
+    words = region_slug(region).split('_')
+    return words[0] + ''.join(w.capitalize() for w in words[1:])
+
+
+def data_file(region, year, data_dir='.'):
+    """Points file of a region slug and year: {data_dir}/{region}_nightlight_{year}.js"""
+    return os.path.join(data_dir, f'{region}_nightlight_{year}.js')
@@ -250,93 +250,81 @@
             marker.addTo(mpiLayer);
         });
 
-        // Add nightlight vector points with purple-to-yellow gradient
-        console.log(`Loading ${nightlightData.points.length} nightlight points (purple-yellow gradient)...`);
-        
-        nightlightData.points.forEach((point, idx) => {
-            const color = getNightlightColor(point.value);
-            const radius = getNightlightRadius(point.value);
-            
-            const marker = L.circleMarker([point.lat, point.lon], {
-                radius: radius,
-                fillColor: color,
-                color: color,
-                weight: 1,
-                opacity: 0.8,
-                fillOpacity: 0.7
-            });
-            
-            marker.bindTooltip(`${point.value.toFixed(2)} nW`, {
-                permanent: false,
-                direction: 'top',
-                offset: [0, -5]
-            });
-            
-            marker.bindPopup(`
-                <div class="popup-header" style="background: ${color}; color: ${point.value > 3 ? '#1a1a2e' : 'white'};">💡 Nightlight Point</div>
-                <div class="popup-body">
-                    <div class="popup-metric">
-                        <span class="metric-label">💡 Radiance:</span>
-                        <span class="metric-value">${point.value.toFixed(2)} nW/cm²/sr</span>
-                    </div>
-                    <div class="popup-metric">
-                        <span class="metric-label">📍 Location:</span>
-                        <span class="metric-value" style="font-size: 0.85em;">${point.lat.toFixed(4)}°N, ${point.lon.toFixed(4)}°E</span>
-                    </div>
-                    <div class="popup-metric">
-                        <span class="metric-label">📏 Grid Center:</span>
-                        <span class="metric-value">500m × 500m</span>
-                    </div>
-                    <div class="source-link">
-                        📋 <a href="https://eogdata.mines.edu/products/vnl/" target="_blank">VIIRS Nightlight 2023-2024</a>
-                    </div>
-                </div>
-            `, {
-                maxWidth: 300,
-                autoPan: false,
-                className: 'fixed-right-popup'
-            });
-            
-            marker.addTo(nightlightLayer);
-        });
-        
-        console.log('✓ Nightlight points loaded with purple-yellow gradient');
-
-        mpiLayer.addTo(map);
-        // nightlightLayer not added by default - user must check it
-
-        const detailedNLBakool2022 = L.layerGroup();
-        const detailedNLBakool2023 = L.layerGroup();
-        const detailedNLLS = L.layerGroup();
-
-        // Add Bakool detailed nightlight 2022 (500m polygons with classification)
-        console.log(`Loading ${bakoolNightlightPolygons2022.features.length} Bakool nightlight polygons (2022)...`);
+        // Layers whose data is a lazily loaded bundle (data_loader.js): the layer is
+        // built the first time it is needed and later calls reuse the same promise.
+        // datasets is a list of dataset names or a function returning a promise of the data.
+        function lazyLayer(datasets, build) {
+            let ready = null;
+            const load = typeof datasets === 'function' ? datasets : function() {
+                return loadDatasets(datasets);
+            };
+            return function() {
+                if (!ready) {
+                    ready = load().then(build);
+                }
+                return ready;
+            };
+        }
 
-        L.geoJSON(bakoolNightlightPolygons2022, {
-            style: function(feature) {
-                return {
-                    fillColor: feature.properties.color,
-                    color: feature.properties.color,
-                    weight: 1,
-                    opacity: 0.8,
-                    fillOpacity: 0.7
-                };
-            },
-            onEachFeature: function(feature, layer) {
-                const props = feature.properties;
+        // Bakool 500m cells of a year as a FeatureCollection: the columnar store expanded on
+        // demand (nightlight_cells.js) when it was built, else the per-cell polygon file.
+        // Top-level const data is not a window property, so each year passes getters.
+        function loadBakoolCells(year, getCells, getPolygons) {
+            return loadOptionalDataset(`bakoolNightlightCells${year}`, `bakool_nightlight_cells_${year}.js`)
+                .then(function() {
+                    return expandNightlightCells(getCells());
+                })
+                .catch(function() {
+                    return loadDataset(`bakoolNightlightPolygons${year}`).then(getPolygons);
+                });
+        }
 
-                layer.bindTooltip(`${props.value.toFixed(2)} nW (2022) - ${props.label}`, {
-                    permanent: false,
-                    direction: 'top',
-                    offset: [0, -5]
+        // Bakool nightlight of a year: the dissolved layer (one polygon per category, the cell
+        // values in metadata.lookup) when it was built, else the 500m cells above
+        function loadBakoolNightlight(year, getDissolved, getCells, getPolygons) {
+            return loadOptionalDataset(`bakoolNightlightDissolved${year}`, `bakool_nightlight_dissolved_${year}.js`)
+                .then(getDissolved)
+                .catch(function() {
+                    return loadBakoolCells(year, getCells, getPolygons);
                 });
+        }
 
-                layer.bindPopup(`
-                    <div class="popup-header" style="background: ${props.color}; color: white;">💡 Nightlight 2022</div>
+        // Draw a dissolved nightlight collection into group; a click looks up the value of
+        // the 500m cell under the cursor (nightlightValueAt in nightlight_cells.js)
+        function addDissolvedNightlight(collection, year, group) {
+            const lookup = collection.metadata.lookup;
+            console.log(`Loading ${collection.features.length} dissolved Bakool nightlight categories (${year}, ${lookup.index.length} cells)...`);
+
+            L.geoJSON(collection, {
+                style: function(feature) {
+                    return {
+                        fillColor: feature.properties.color,
+                        color: feature.properties.color,
+                        weight: 1,
+                        opacity: 0.8,
+                        fillOpacity: 0.7
+                    };
+                },
+                onEachFeature: function(feature, layer) {
+                    layer.bindTooltip(`${feature.properties.label} (${year}) - ${feature.properties.cells} cells`, {
+                        permanent: false,
+                        direction: 'top',
+                        offset: [0, -5]
+                    });
+                }
+            }).on('click', function(e) {
+                const props = e.layer.feature.properties;
+                const value = nightlightValueAt(lookup, e.latlng.lat, e.latlng.lng);
+                L.popup({
+                    maxWidth: 300,
+                    autoPan: false,
+                    className: 'fixed-right-popup'
+                }).setLatLng(e.latlng).setContent(`
+                    <div class="popup-header" style="background: ${props.color}; color: white;">💡 Nightlight ${year}</div>
                     <div class="popup-body">
                         <div class="popup-metric">
                             <span class="metric-label">💡 Radiance:</span>
-                            <span class="metric-value">${props.value.toFixed(3)} nW/cm²/sr</span>
+                            <span class="metric-value">${value == null ? 'n/a' : value.toFixed(3) + ' nW/cm²/sr'}</span>
                         </div>
                         <div class="popup-metric">
                             <span class="metric-label">🏷️ Category:</span>
@@ -344,85 +332,70 @@
                         </div>
                         <div class="popup-metric">
                             <span class="metric-label">📅 Year:</span>
-                            <span class="metric-value">2022</span>
+                            <span class="metric-value">${year}</span>
                         </div>
                         <div class="popup-metric">
                             <span class="metric-label">📍 Location:</span>
-                            <span class="metric-value" style="font-size: 0.85em;">${props.lat.toFixed(4)}°N, ${props.lon.toFixed(4)}°E</span>
+                            <span class="metric-value" style="font-size: 0.85em;">${e.latlng.lat.toFixed(4)}°N, ${e.latlng.lng.toFixed(4)}°E</span>
                         </div>
                         <div class="popup-metric">
                             <span class="metric-label">📏 Grid:</span>
-                            <span class="metric-value">${props.grid_size}</span>
+                            <span class="metric-value">${collection.metadata.grid_size}</span>
                         </div>
                         <div class="popup-metric">
                             <span class="metric-label">🗺️ Region:</span>
                             <span class="metric-value">Bakool</span>
                         </div>
                         <div class="source-link">
-                            📋 <a href="https://developers.google.com/earth-engine/datasets/catalog/NOAA_VIIRS_DNB_ANNUAL_V22" target="_blank">VIIRS DNB Annual 2022</a>
+                            📋 <a href="https://developers.google.com/earth-engine/datasets/catalog/NOAA_VIIRS_DNB_ANNUAL_V22" target="_blank">VIIRS DNB Annual ${year}</a>
                         </div>
                     </div>
-                `, {
-                    maxWidth: 300,
-                    autoPan: false,
-                    className: 'fixed-right-popup'
-                });
-            }
-        }).addTo(detailedNLBakool2022);
-
-        console.log('Bakool 2022 nightlight polygons loaded');
+                `).openOn(map);
+            }).addTo(group);
 
-        // Add Bakool detailed nightlight 2023 (500m polygons with classification)
-        console.log(`Loading ${bakoolNightlightPolygons2023.features.length} Bakool nightlight polygons (2023)...`);
+            console.log(`Bakool ${year} dissolved nightlight loaded`);
+        }
 
-        L.geoJSON(bakoolNightlightPolygons2023, {
-            style: function(feature) {
-                return {
-                    fillColor: feature.properties.color,
-                    color: feature.properties.color,
+        // Add nightlight vector points with purple-to-yellow gradient (built when the layer is first shown)
+        const ensureNightlightPoints = lazyLayer(['nightlightData'], function() {
+            console.log(`Loading ${nightlightData.points.length} nightlight points (purple-yellow gradient)...`);
+        
+            nightlightData.points.forEach((point, idx) => {
+                const color = getNightlightColor(point.value);
+                const radius = getNightlightRadius(point.value);
+            
+                const marker = L.circleMarker([point.lat, point.lon], {
+                    radius: radius,
+                    fillColor: color,
+                    color: color,
                     weight: 1,
                     opacity: 0.8,
                     fillOpacity: 0.7
-                };
-            },
-            onEachFeature: function(feature, layer) {
-                const props = feature.properties;
-
-                layer.bindTooltip(`${props.value.toFixed(2)} nW (2023) - ${props.label}`, {
+                });
+            
+                marker.bindTooltip(`${point.value.toFixed(2)} nW`, {
                     permanent: false,
                     direction: 'top',
                     offset: [0, -5]
                 });
-
-                layer.bindPopup(`
-                    <div class="popup-header" style="background: ${props.color}; color: white;">💡 Nightlight 2023</div>
+            
+                marker.bindPopup(`
+                    <div class="popup-header" style="background: ${color}; color: ${point.value > 3 ? '#1a1a2e' : 'white'};">💡 Nightlight Point</div>
                     <div class="popup-body">
                         <div class="popup-metric">
                             <span class="metric-label">💡 Radiance:</span>
-                            <span class="metric-value">${props.value.toFixed(3)} nW/cm²/sr</span>
-                        </div>
-                        <div class="popup-metric">
-                            <span class="metric-label">🏷️ Category:</span>
-                            <span class="metric-value">${props.category}</span>
-                        </div>
-                        <div class="popup-metric">
-                            <span class="metric-label">📅 Year:</span>
-                            <span class="metric-value">2023</span>
+                            <span class="metric-value">${point.value.toFixed(2)} nW/cm²/sr</span>
                         </div>
                         <div class="popup-metric">
                             <span class="metric-label">📍 Location:</span>
-                            <span class="metric-value" style="font-size: 0.85em;">${props.lat.toFixed(4)}°N, ${props.lon.toFixed(4)}°E</span>
-                        </div>
-                        <div class="popup-metric">
-                            <span class="metric-label">📏 Grid:</span>
-                            <span class="metric-value">${props.grid_size}</span>
+                            <span class="metric-value" style="font-size: 0.85em;">${point.lat.toFixed(4)}°N, ${point.lon.toFixed(4)}°E</span>
                         </div>
                         <div class="popup-metric">
-                            <span class="metric-label">🗺️ Region:</span>
-                            <span class="metric-value">Bakool</span>
+                            <span class="metric-label">📏 Grid Center:</span>
+                            <span class="metric-value">500m × 500m</span>
                         </div>
                         <div class="source-link">
-                            📋 <a href="https://developers.google.com/earth-engine/datasets/catalog/NOAA_VIIRS_DNB_ANNUAL_V22" target="_blank">VIIRS DNB Annual 2023</a>
+                            📋 <a href="https://eogdata.mines.edu/products/vnl/" target="_blank">VIIRS Nightlight 2023-2024</a>
                         </div>
                     </div>
                 `, {
@@ -430,10 +403,170 @@
                     autoPan: false,
                     className: 'fixed-right-popup'
                 });
+            
+                marker.addTo(nightlightLayer);
+            });
+        
+            console.log('✓ Nightlight points loaded with purple-yellow gradient');
+        });
+        nightlightLayer.on('add', ensureNightlightPoints);
+
+        mpiLayer.addTo(map);
+        // nightlightLayer not added by default - user must check it
+
+        const detailedNLBakool2022 = L.layerGroup();
+        const detailedNLBakool2023 = L.layerGroup();
+        const detailedNLLS = L.layerGroup();
+
+        // Add Bakool detailed nightlight 2022 (500m polygons with classification, built on first use)
+        const ensureBakool2022 = lazyLayer(function() {
+            return loadBakoolNightlight(2022, () => bakoolNightlightDissolved2022, () => bakoolNightlightCells2022,
+                                        () => bakoolNightlightPolygons2022);
+        }, function(cells) {
+            if (cells.metadata && cells.metadata.lookup) {
+                addDissolvedNightlight(cells, 2022, detailedNLBakool2022);
+                return cells;
+            }
+
+            console.log(`Loading ${cells.features.length} Bakool nightlight polygons (2022)...`);
+
+            L.geoJSON(cells, {
+                style: function(feature) {
+                    return {
+                        fillColor: feature.properties.color,
+                        color: feature.properties.color,
+                        weight: 1,
+                        opacity: 0.8,
+                        fillOpacity: 0.7
+                    };
+                },
+                onEachFeature: function(feature, layer) {
+                    const props = feature.properties;
+
+                    layer.bindTooltip(`${props.value.toFixed(2)} nW (2022) - ${props.label}`, {
+                        permanent: false,
+                        direction: 'top',
+                        offset: [0, -5]
+                    });
+
+                    layer.bindPopup(`
+                        <div class="popup-header" style="background: ${props.color}; color: white;">💡 Nightlight 2022</div>
+                        <div class="popup-body">
+                            <div class="popup-metric">
+                                <span class="metric-label">💡 Radiance:</span>
+                                <span class="metric-value">${props.value.toFixed(3)} nW/cm²/sr</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">🏷️ Category:</span>
+                                <span class="metric-value">${props.category}</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">📅 Year:</span>
+                                <span class="metric-value">2022</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">📍 Location:</span>
+                                <span class="metric-value" style="font-size: 0.85em;">${props.lat.toFixed(4)}°N, ${props.lon.toFixed(4)}°E</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">📏 Grid:</span>
+                                <span class="metric-value">${props.grid_size}</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">🗺️ Region:</span>
+                                <span class="metric-value">Bakool</span>
+                            </div>
+                            <div class="source-link">
+                                📋 <a href="https://developers.google.com/earth-engine/datasets/catalog/NOAA_VIIRS_DNB_ANNUAL_V22" target="_blank">VIIRS DNB Annual 2022</a>
+                            </div>
+                        </div>
+                    `, {
+                        maxWidth: 300,
+                        autoPan: false,
+                        className: 'fixed-right-popup'
+                    });
+                }
+            }).addTo(detailedNLBakool2022);
+
+            console.log('Bakool 2022 nightlight polygons loaded');
+            return cells;
+        });
+        detailedNLBakool2022.on('add', ensureBakool2022);
+
+        // Add Bakool detailed nightlight 2023 (500m polygons with classification, built on first use)
+        const ensureBakool2023 = lazyLayer(function() {
+            return loadBakoolNightlight(2023, () => bakoolNightlightDissolved2023, () => bakoolNightlightCells2023,
+                                        () => bakoolNightlightPolygons2023);
+        }, function(cells) {
+            if (cells.metadata && cells.metadata.lookup) {
+                addDissolvedNightlight(cells, 2023, detailedNLBakool2023);
+                return cells;
             }
-        }).addTo(detailedNLBakool2023);
 
-        console.log('Bakool 2023 nightlight polygons loaded');
+            console.log(`Loading ${cells.features.length} Bakool nightlight polygons (2023)...`);
+
+            L.geoJSON(cells, {
+                style: function(feature) {
+                    return {
+                        fillColor: feature.properties.color,
+                        color: feature.properties.color,
+                        weight: 1,
+                        opacity: 0.8,
+                        fillOpacity: 0.7
+                    };
+                },
+                onEachFeature: function(feature, layer) {
+                    const props = feature.properties;
+
+                    layer.bindTooltip(`${props.value.toFixed(2)} nW (2023) - ${props.label}`, {
+                        permanent: false,
+                        direction: 'top',
+                        offset: [0, -5]
+                    });
+
+                    layer.bindPopup(`
+                        <div class="popup-header" style="background: ${props.color}; color: white;">💡 Nightlight 2023</div>
+                        <div class="popup-body">
+                            <div class="popup-metric">
+                                <span class="metric-label">💡 Radiance:</span>
+                                <span class="metric-value">${props.value.toFixed(3)} nW/cm²/sr</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">🏷️ Category:</span>
+                                <span class="metric-value">${props.category}</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">📅 Year:</span>
+                                <span class="metric-value">2023</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">📍 Location:</span>
+                                <span class="metric-value" style="font-size: 0.85em;">${props.lat.toFixed(4)}°N, ${props.lon.toFixed(4)}°E</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">📏 Grid:</span>
+                                <span class="metric-value">${props.grid_size}</span>
+                            </div>
+                            <div class="popup-metric">
+                                <span class="metric-label">🗺️ Region:</span>
+                                <span class="metric-value">Bakool</span>
+                            </div>
+                            <div class="source-link">
+                                📋 <a href="https://developers.google.com/earth-engine/datasets/catalog/NOAA_VIIRS_DNB_ANNUAL_V22" target="_blank">VIIRS DNB Annual 2023</a>
+                            </div>
+                        </div>
+                    `, {
+                        maxWidth: 300,
+                        autoPan: false,
+                        className: 'fixed-right-popup'
+                    });
+                }
+            }).addTo(detailedNLBakool2023);
+
+            console.log('Bakool 2023 nightlight polygons loaded');
+            return cells;
+        });
+        detailedNLBakool2023.on('add', ensureBakool2023);
 
         // Add Somalia ADM1 (regional) boundaries - thicker lines
         let selectedRegion = null;  // Track selected region
@@ -645,7 +778,7 @@
             }
         }
 
-        const roadsLayer = L.geoJSON(roadsData, {
+        const roadsLayer = L.geoJSON(null, {  // Filled from roadsData when the layer is first shown
             style: function(feature) {
                 return {
                     color: getRoadColor(feature.properties.TYPE),
@@ -700,6 +833,9 @@
                 `);
             }
         });  // Not added to map by default - user must check it
+        roadsLayer.on('add', lazyLayer(['roadsData'], function() {
+            roadsLayer.addData(roadsData);
+        }));
 
         // POPULATION LAYER - Females Age 0-12 months (500m grid, 3 classes)
         // Create separate layers for each class for individual control
@@ -725,7 +861,7 @@
             }
         }
 
-        const populationLayer = L.geoJSON(populationData, {
+        const populationLayer = L.geoJSON(null, {  // Filled by refreshPopulationLayer once populationData is loaded
             filter: function(feature) {
                 // Only show features in active classes
                 return activePopClasses.has(feature.properties.pop_class);
@@ -794,20 +930,22 @@
 
         // Function to refresh population layer based on active classes
         function refreshPopulationLayer() {
-            map.removeLayer(populationLayer);
-            populationLayer.clearLayers();
+            loadDataset('populationData').then(function() {
+                map.removeLayer(populationLayer);
+                populationLayer.clearLayers();
+            
+                populationData.features.forEach(function(feature) {
+                    if (activePopClasses.has(feature.properties.pop_class)) {
+                        L.geoJSON(feature, populationLayer.options).addTo(populationLayer);
+                    }
+                });
             
-            populationData.features.forEach(function(feature) {
-                if (activePopClasses.has(feature.properties.pop_class)) {
-                    L.geoJSON(feature, populationLayer.options).addTo(populationLayer);
+                if (document.getElementById('infantsToggle').checked && 
+                    document.getElementById('femaleToggle').checked &&
+                    document.getElementById('populationMainToggle').checked) {
+                    map.addLayer(populationLayer);
                 }
             });
-            
-            if (document.getElementById('infantsToggle').checked && 
-                document.getElementById('femaleToggle').checked &&
-                document.getElementById('populationMainToggle').checked) {
-                map.addLayer(populationLayer);
-            }
         }
 
         // Combined Layer Control and AI Insights (side-by-side wrapper)
@@ -2081,27 +2219,35 @@
                                 console.log('Target Region:', droppedRegion);
                                 console.log('='.repeat(60));
 
-                                if (typeof runISEEAnalytics === 'function') {
-                                    // Prepare layer references to pass to analytics function
-                                    const layerRefs = {
-                                        detailedNLBakool2022: detailedNLBakool2022,
-                                        detailedNLBakool2023: detailedNLBakool2023,
-                                        bakoolNightlightPolygons2022: bakoolNightlightPolygons2022,
-                                        bakoolNightlightPolygons2023: bakoolNightlightPolygons2023,
-                                        clippedRoadsLayer: clippedRoadsLayer,
-                                        activeRoadsRegion: activeRoadsRegion,
-                                        roadsData: roadsData,
-                                        regionLayer: droppedRegionLayer,
-                                        allRegionLayers: allRegionLayers,
-                                        somaliaData: adm1Boundaries  // Pass MPI/region data for basic analysis
-                                    };
-
-                                    // Call runISEEAnalytics with region parameter
-                                    runISEEAnalytics(activeBakoolLayers, map, layerRefs, droppedRegion);
-                                } else {
-                                    console.error('ERROR: runISEEAnalytics is not defined!');
-                                    alert('Error: iSEE Analytics function not loaded. Please refresh the page.');
-                                }
+                                // The Bakool polygon layers are lazily loaded; make sure both are in before analysing.
+                                // Without the statistics cube the analytics scan the layer features instead
+                                const statsCubeLoaded = loadDataset('statsCube').catch(function(error) {
+                                    console.warn('No statistics cube (' + error.message + ')');
+                                });
+                                Promise.all([ensureBakool2022(), ensureBakool2023(), statsCubeLoaded]).then(function(loaded) {
+                                    if (typeof runISEEAnalytics === 'function') {
+                                        // Prepare layer references to pass to analytics function
+                                        const layerRefs = {
+                                            detailedNLBakool2022: detailedNLBakool2022,
+                                            detailedNLBakool2023: detailedNLBakool2023,
+                                            // The data each layer was built from (dissolved layer, columnar store or polygon file)
+                                            bakoolNightlightPolygons2022: loaded[0],
+                                            bakoolNightlightPolygons2023: loaded[1],
+                                            clippedRoadsLayer: clippedRoadsLayer,
+                                            activeRoadsRegion: activeRoadsRegion,
+                                            roadsData: roadsData,
+                                            regionLayer: droppedRegionLayer,
+                                            allRegionLayers: allRegionLayers,
+                                            somaliaData: adm1Boundaries  // Pass MPI/region data for basic analysis
+                                        };
+
+                                        // Call runISEEAnalytics with region parameter
+                                        runISEEAnalytics(activeBakoolLayers, map, layerRefs, droppedRegion);
+                                    } else {
+                                        console.error('ERROR: runISEEAnalytics is not defined!');
+                                        alert('Error: iSEE Analytics function not loaded. Please refresh the page.');
+                                    }
+                                });
                             }, 2000);
                         }
                     } else {
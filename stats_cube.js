@@ -0,0 +1 @@
+const statsCube = {"version":1,"histogramBins":30,"sources":{"bakool_nightlight_polygons_2022.js":"1a4445243ffb1fb5f85445a68ccfdb7d15dedf9b8fd75e2acb1eaa6f5bc53380","bakool_nightlight_polygons_2023.js":"4ce51d88299825c2658d68d8effa624ba68447e689d42c59b0287f4e67827bba","roads_by_region/Awdal_roads.js":"48a73cae08cef9e7407de801d81bb405c8d047cb6c9cd76a2598c7f3cbee5e25","roads_by_region/Bakool_roads.js":"54037618ce074e95f2c3d3679e734bd9473e30f6d11f17d8a83398db78d57f8d","roads_by_region/Banadir_roads.js":"e1414010c96e73ee946b7ad12cbd35d6ec9b315e58380208cfe3b82b21058d0a","roads_by_region/Middle_Juba_roads.js":"7ed25b12047423f2a9e4bc862e712d52a863fd146606fc07eca31bb6d795ea0b"},"regions":{"Bakool":{"nightlight":{"2022":{"count":2,"min":0.584,"max":0.655,"mean":0.6195,"median":0.655,"stdDev":0.0355,"q1":0.584,"q3":0.655,"histogram":[1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1]},"2023":{"count":15,"min":0.5,"max":0.807,"mean":0.6318,"median":0.643,"stdDev":0.106772,"q1":0.513,"q3":0.727,"histogram":[3,2,0,0,1,0,0,0,1,0,0,0,0,1,0,0,0,0,0,1,2,0,1,1,0,0,1,0,0,1]}},"roads":{"all":{"count":2949,"totalLength":10056.691,"byClass":{"path":12,"residential":20,"secondary":30,"tertiary":63,"track":48,"track_grade2":1518,"track_grade3":660,"track_grade4":7,"track_grade5":45,"unclassified":546},"lengthByClass":{"path":12.118,"residential":17.874,"secondary":210.365,"tertiary":467.724,"track":108.388,"track_grade2":6470.458,"track_grade3":1036.8,"track_grade4":16.691,"track_grade5":361.502,"unclassified":1354.771},"bySourceYear":{"2023":2949},"lengthBySourceYear":{"2023":10056.691},"lengthStats":{"count":2949,"min":0.001023,"max":83.958564,"mean":3.410204,"median":1.520164,"stdDev":5.237947,"q1":0.307674,"q3":4.422992,"histogram":[1867,494,261,135,75,38,24,13,11,7,8,5,3,1,3,1,2,0,0,0,0,0,0,0,0,0,0,0,0,1]}}}},"Awdal":{"roads":{"all":{"count":3745,"totalLength":5572.874,"byClass":{"path":470,"residential":1648,"secondary":6,"tertiary":55,"track":734,"track_grade2":18,"track_grade4":33,"trunk":91,"unclassified":690},"lengthByClass":{"path":882.806,"residential":321.907,"secondary":2.292,"tertiary":238.983,"track":1503.499,"track_grade2":31.172,"track_grade4":112.496,"trunk":300.411,"unclassified":2179.309},"bySourceYear":{"2023":3745},"lengthBySourceYear":{"2023":5572.874},"lengthStats":{"count":3745,"min":0.001704,"max":68.069968,"mean":1.488084,"median":0.414443,"stdDev":3.318215,"q1":0.119701,"q3":1.540841,"histogram":[3077,392,132,51,30,16,14,4,2,5,10,4,0,2,1,1,1,1,0,0,0,0,0,0,0,0,1,0,0,1]}}}},"Banadir":{"roads":{"all":{"count":7224,"totalLength":2212.3,"byClass":{"footway":4,"path":127,"pedestrian":2,"primary":26,"primary_link":12,"residential":5804,"secondary":45,"secondary_link":13,"service":371,"steps":1,"tertiary":120,"tertiary_link":8,"track":18,"track_grade2":32,"track_grade3":113,"track_grade4":4,"track_grade5":5,"unclassified":519},"lengthByClass":{"footway":0.263,"path":17.247,"pedestrian":0.216,"primary":30.435,"primary_link":0.104,"residential":1387.639,"secondary":50.723,"secondary_link":0.097,"service":62.508,"steps":0.048,"tertiary":83.8,"tertiary_link":0.388,"track":8.673,"track_grade2":44.368,"track_grade3":101.282,"track_grade4":1.376,"track_grade5":2.346,"unclassified":420.788},"bySourceYear":{"2023":7224},"lengthBySourceYear":{"2023":2212.3},"lengthStats":{"count":7224,"min":0.001468,"max":14.90621,"mean":0.306243,"median":0.155827,"stdDev":0.535634,"q1":0.078629,"q3":0.332372,"histogram":[6076,769,220,72,36,13,13,6,2,4,4,1,1,0,2,0,1,0,0,0,1,0,0,0,1,1,0,0,0,1]}}}},"Middle Juba":{"roads":{"all":{"count":3417,"totalLength":8965.188,"byClass":{"living_street":1,"path":16,"primary":4,"residential":657,"secondary":56,"secondary_link":2,"service":1,"tertiary":30,"track":93,"track_grade2":1595,"track_grade3":227,"track_grade4":7,"track_grade5":376,"unclassified":352},"lengthByClass":{"living_street":0.043,"path":4.811,"primary":40.556,"residential":142.397,"secondary":170.298,"secondary_link":0.086,"service":0.069,"tertiary":223.708,"track":144.319,"track_grade2":5331.259,"track_grade3":342.107,"track_grade4":2.667,"track_grade5":1602.032,"unclassified":960.836},"bySourceYear":{"2023":3417},"lengthBySourceYear":{"2023":8965.188},"lengthStats":{"count":3417,"min":0.001268,"max":65.923659,"mean":2.623702,"median":1.256645,"stdDev":4.273662,"q1":0.310469,"q3":3.334678,"histogram":[2179,641,274,135,78,27,27,13,7,7,1,9,5,2,5,1,0,0,1,0,2,0,0,0,0,0,1,0,0,2]}}}}}};
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Out-of-core nightlight statistics
+
+The exact analysis (analyze_nightlight_distribution.py) holds every value of
+a region-year in memory. For all regions over many years of VIIRS composites
+the values are streamed in fixed-size chunks instead and summarized by three
+mergeable structures:
+
+- RunningMoments: count, mean, variance (Welford / Chan: each chunk's own
+  moments are folded into the running ones), min and max - exact
+- KLLSketch: a KLL quantile sketch of about 3k weighted items, whatever
+  the input size; tracks a guaranteed bound on its rank error
+- FixedHistogram: exact count, sum and sum of squares per fixed bin
+  (0.005 nW/cm²/sr wide up to 2, 1% wider per bin above) plus the count of
+  values exactly on each edge, so the contextual bin counts are exact (the
+  closed top bin too),
+  every sketch quantile and rank is clamped into the bounds the histogram
+  guarantees, and natural breaks run on the bin means
+
+Summaries of different chunks, years and regions merge with merge(), so a
+decade of all-Somalia composites never has to be in memory at once:
+
+    summary = StreamingSummary.from_file('bakool_nightlight_2023.js')
+    summary.merge(StreamingSummary.from_file('bakool_nightlight_2022.js'))
+    summary.quantiles([0.5, 0.9])
+
+Reads {region}_nightlight_{year}.js points files (any text with "value"
+keys, e.g. the polygon files) and .npy grids from nightlight_grid.py
+(memory-mapped, NaN = no data).
+"""
+
+import re
+
+import numpy as np
+
+from natural_breaks import class_minimums
+
+# Bytes read per chunk (about 80k pretty-printed points, 1M float64 grid cells)
+CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_K = 200
+# 0.005 nW/cm²/sr wide up to 2 (every classification threshold is an edge),
+# then 1% wider per bin up to about 1000 for city centres
+DEFAULT_EDGES = np.unique(np.round(np.concatenate((np.arange(400) * 0.005, 2 * 1.01 ** np.arange(625))), 3))
+
+VALUE_PATTERN = re.compile(rb'"value"\s*:\s*(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)')
+
+
+def iter_value_chunks(path, chunk_bytes=CHUNK_BYTES):
+    """Yield the values of a points file or .npy grid as float arrays, chunk_bytes of input at a time"""
+    if path.endswith('.npy'):
+        grid = np.load(path, mmap_mode='r').reshape(-1)
+        step = max(1, chunk_bytes // grid.itemsize)
+        for start in range(0, len(grid), step):
+            chunk = np.asarray(grid[start:start + step], dtype=float)
+            yield chunk[np.isfinite(chunk)]
+        return
+
+    tail = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk_bytes)
+            text = tail + block
+            if block:
+                # A "value" entry never spans the start of an object, so cut
+                # before the last '{' and keep the rest for the next chunk
+                cut = text.rfind(b'{')
+                if cut <= 0:
+                    tail = text
+                    continue
+                text, tail = text[:cut], text[cut:]
+            values = np.array(VALUE_PATTERN.findall(text), dtype=float)
+            if len(values):
+                yield values
+            if not block:
+                return
+
+
+class RunningMoments:
+    """Exact count, mean, variance, min and max over any number of chunks"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        # Chan et al.'s pairwise form of Welford's update
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def update(self, values):
+        if len(values):
+            mean = float(values.mean())
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Population variance (like np.var)"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty 2016). Level h holds items
+    of weight 2^h; when a level outgrows its capacity it is sorted and every
+    other item (random offset) moves up a level. Capacities shrink by 2/3 per
+    level below the top, so the sketch keeps about 3k items.
+
+    Each compaction at level h moves any rank by at most 2^h, so rank_error
+    is a guaranteed bound on the absolute rank error of every query; the
+    typical error is far smaller because the random offsets cancel out.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.count = 0
+        self.rank_error = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None
+
+    def _capacity(self, level):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - level))))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind at this level
+                even = len(items) - len(items) % 2
+                promoted = items[self._rng.integers(2):even:2]
+                self.levels[level] = items[even:]
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+                self.rank_error += 2 ** level
+            level += 1
+        self._sorted = None
+
+    def update(self, values):
+        self.count += len(values)
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self.rank_error += other.rank_error
+        self._compress()
+        return self
+
+    def items(self):
+        """Sorted items, their weights and cumulative weights"""
+        if self._sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(a), 2 ** h, dtype=np.int64) for h, a in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            self._sorted = items[order], weights[order], np.cumsum(weights[order])
+        return self._sorted
+
+    def rank(self, values, inclusive=False):
+        """Estimated number of values < each of values (<= with inclusive)"""
+        items, _, cumulative = self.items()
+        positions = np.searchsorted(items, values, side='right' if inclusive else 'left')
+        return np.concatenate(([0], cumulative))[positions]
+
+    def quantiles(self, probabilities):
+        """Estimated value at each probability (rank p * (count - 1), like np.quantile)"""
+        items, _, cumulative = self.items()
+        ranks = np.asarray(probabilities, dtype=float) * (self.count - 1)
+        return items[np.minimum(np.searchsorted(cumulative, ranks, side='right'), len(items) - 1)]
+
+
+class FixedHistogram:
+    """
+    Exact count, sum and sum of squares per bin on fixed edges: bin 0 is
+    below edges[0], bin i is [edges[i-1], edges[i]) and the last bin at or
+    above edges[-1]. on_edge counts the values equal to each edge, so ranks
+    at an edge are exact whether or not the edge itself is included.
+    Histograms merge only when their edges are identical.
+    """
+
+    def __init__(self, edges=DEFAULT_EDGES):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.sums = np.zeros(len(self.edges) + 1)
+        self.squares = np.zeros(len(self.edges) + 1)
+        self.on_edge = np.zeros(len(self.edges), dtype=np.int64)
+
+    def _edge_hits(self, values, bins):
+        """Whether each value equals the lower edge of its bin"""
+        return (bins > 0) & (self.edges[np.maximum(bins - 1, 0)] == values)
+
+    def update(self, values):
+        bins = np.searchsorted(self.edges, values, side='right')
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        self.sums += np.bincount(bins, weights=values, minlength=len(self.counts))
+        self.squares += np.bincount(bins, weights=values * values, minlength=len(self.counts))
+        hits = bins[self._edge_hits(values, bins)] - 1
+        self.on_edge += np.bincount(hits, minlength=len(self.on_edge))
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Histograms with different edges cannot be merged")
+        self.counts += other.counts
+        self.sums += other.sums
+        self.squares += other.squares
+        self.on_edge += other.on_edge
+        return self
+
+    def rank_bounds(self, values, inclusive=False):
+        """
+        (low, high) bounds of the exact number of values < each of values
+        (<= with inclusive). Both are exact for a value on an edge.
+        """
+        below = np.concatenate(([0], np.cumsum(self.counts)))
+        values = np.asarray(values, dtype=float)
+        bins = np.searchsorted(self.edges, values, side='right')
+        low, high = below[bins], below[bins + 1]
+        hits = self._edge_hits(values, bins)
+        if inclusive:
+            low = np.where(hits, low + self.on_edge[np.maximum(bins - 1, 0)], low)
+        high = np.where(hits, low, high)
+        return low, high
+
+    def bins_of_ranks(self, ranks):
+        """Bin index holding the value of each 0-based rank"""
+        return np.searchsorted(np.cumsum(self.counts), ranks, side='right')
+
+
+class StreamingSummary:
+    """Moments, quantile sketch and histogram of one stream of values, mergeable across files"""
+
+    def __init__(self, k=DEFAULT_K, edges=DEFAULT_EDGES, seed=0):
+        self.moments = RunningMoments()
+        self.sketch = KLLSketch(k, seed)
+        self.histogram = FixedHistogram(edges)
+
+    @classmethod
+    def from_file(cls, path, chunk_bytes=CHUNK_BYTES, **kwargs):
+        summary = cls(**kwargs)
+        for chunk in iter_value_chunks(path, chunk_bytes):
+            summary.update(chunk)
+        return summary
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        self.moments.update(values)
+        self.sketch.update(values)
+        self.histogram.update(values)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+        return self
+
+    def quantile_bounds(self, probabilities):
+        """Guaranteed (low, high) interval of each exact quantile, from the histogram and min/max"""
+        ranks = np.asarray(probabilities, dtype=float) * (self.count - 1)
+        lower = np.concatenate(([self.moments.min], self.histogram.edges, [self.moments.max]))
+        low = lower[self.histogram.bins_of_ranks(np.floor(ranks))]
+        high = lower[self.histogram.bins_of_ranks(np.ceil(ranks)) + 1]
+        return np.maximum(low, self.moments.min), np.minimum(high, self.moments.max)
+
+    def quantiles(self, probabilities):
+        """Sketch quantiles clamped into their guaranteed interval (exact min and max at 0 and 1)"""
+        probabilities = np.asarray(probabilities, dtype=float)
+        low, high = self.quantile_bounds(probabilities)
+        estimates = np.clip(self.sketch.quantiles(probabilities), low, high)
+        estimates[probabilities <= 0] = self.moments.min
+        estimates[probabilities >= 1] = self.moments.max
+        return estimates
+
+    def rank(self, values, inclusive=False):
+        """Sketch rank clamped into the exact bounds from the histogram"""
+        low, high = self.histogram.rank_bounds(values, inclusive)
+        return np.clip(self.sketch.rank(values, inclusive), low, high)
+
+    def bin_counts(self, edges, open_top=False, upper_bounds=False):
+        """
+        Counts per bin like analyze_nightlight_distribution.bin_counts(), from
+        rank(): exact for edges on histogram edges, estimated in between
+        """
+        edges = np.asarray(edges, dtype=float)
+        ranks = self.rank(edges, inclusive=upper_bounds)
+        if upper_bounds:
+            ranks[0] = 0
+        elif open_top:
+            ranks[-1] = self.count
+        else:
+            ranks[-1] = self.rank(edges[-1:], inclusive=True)[0]
+        return np.diff(ranks)
+
+    def natural_breaks(self, k):
+        """
+        Fisher-Jenks breaks on histogram edges and their exact goodness of
+        variance fit. Classes that never split a bin leave the within-bin
+        deviations unchanged, so natural breaks of the bin means weighted by
+        their counts are the optimal classes among those bounded by edges.
+        """
+        h = self.histogram
+        occupied = np.flatnonzero(h.counts)
+        means = h.sums[occupied] / h.counts[occupied]
+        starts = occupied[np.searchsorted(means, class_minimums(means, k, weights=h.counts[occupied]))]
+        lower = np.concatenate(([self.moments.min], h.edges))
+        breaks = [self.moments.min] + lower[starts[1:]].tolist() + [self.moments.max]
+
+        classes = np.searchsorted(starts, occupied, side='right') - 1
+        counts, sums, squares = (np.bincount(classes, weights=a[occupied]) for a in (h.counts, h.sums, h.squares))
+        within = float((squares - sums * sums / counts).sum())
+        return breaks, 1 - within / self.moments.m2 if self.moments.m2 > 0 else 1.0